@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+from helpers import SYMBOL, synthetic_history
+
+from trade_pro.strategy import base, result_cache
+from trade_pro.strategy.resample import aggregate_ohlcv
+from trade_pro.strategy.store import ColumnStore
+
+
+@pytest.fixture
+def history() -> dict[str, pd.DataFrame]:
+    """90 days of hourly synthetic candles"""
+    return synthetic_history(90 * 24)
+
+
+@pytest.fixture
+def stores(monkeypatch, tmp_path):
+    """Synthetic 15 minutes candles and their 1h and 1d aggregates in columnar
+    stores, read by the engines in place of the stored candles"""
+    quarters = synthetic_history(60 * 96, "15m")["15m"]
+    history = {"15m": quarters}
+    for timeframe in ("1h", "1d"):
+        history[timeframe] = aggregate_ohlcv(quarters, timeframe)
+    for timeframe, df in history.items():
+        ColumnStore(SYMBOL, timeframe, tmp_path).write(df)
+    monkeypatch.setattr(base, "candle_store", lambda symbol, tf: ColumnStore(symbol, tf, tmp_path))
+    for module in (base, result_cache):
+        monkeypatch.setattr(
+            module,
+            "get_data",
+            lambda symbol, tf, start=None, end=None: ColumnStore(symbol, tf, tmp_path).read(
+                start, end
+            ),
+        )
+    return {timeframe: history[timeframe] for timeframe in ("1h", "1d")}
@@ -0,0 +1,101 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.bench import synthetic_ohlcv
+from trade_pro.strategy.resample import aggregate_ohlcv
+from trade_pro.strategy.streaming import RollingSMA, TrendFilter, merge_candles
+
+SYMBOL = "SYNTH"
+
+
+class CrossStrategy(Base):
+    """Moving average cross with a daily trend filter, its indicators only use
+    pandas so the engines can be compared without pandas_ta"""
+
+    def __init__(
+        self,
+        symbol: str = SYMBOL,
+        initial_balance: float = 1000.0,
+        timeframes: list[str] | None = None,
+        *,
+        fast: int = 5,
+        slow: int = 20,
+        trend: int = 5,
+        **kwargs,
+    ):
+        super().__init__(symbol, initial_balance, timeframes or ["1h", "1d"], **kwargs)
+        self.fast = fast
+        self.slow = slow
+        self.trend_period = trend
+
+    def compute_indicators(self, data: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        main, daily = self.timeframes
+        df = data[main]
+        close = df["close"]
+        spread = close.rolling(self.fast).mean() - close.rolling(self.slow).mean()
+        df["SPREAD_SIGN"] = np.where(spread > 0, 1, -1)
+        trend = data[daily]["close"]
+        bullish = trend > trend.rolling(self.trend_period).mean()
+        df["BULLISH_TREND"] = self.align(data, daily, bullish, fill=False)
+        return df
+
+    def lookback(self) -> dict[str, int]:
+        main, daily = self.timeframes
+        return {main: self.slow, daily: self.trend_period}
+
+    def warm_up(self, histo_data: dict[str, pd.DataFrame]) -> bool:
+        self.fast_sma = RollingSMA(self.fast)
+        self.slow_sma = RollingSMA(self.slow)
+        self.trend = TrendFilter(self.trend_period)
+        self.window = deque(maxlen=2)
+        for timeframe, timestamp, candle in merge_candles(histo_data):
+            self.update_indicators(timeframe, timestamp, candle)
+        return True
+
+    def update_indicators(
+        self, timeframe: str, timestamp: pd.Timestamp, candle: dict[str, float]
+    ) -> None:
+        close = candle["close"]
+        if timeframe != self.timeframes[0]:
+            self.trend.update(close)
+            return
+        spread = self.fast_sma.update(close) - self.slow_sma.update(close)
+        row = {
+            "close": close,
+            "SPREAD_SIGN": 1 if spread > 0 else -1,
+            "BULLISH_TREND": self.trend.bullish,
+        }
+        self.window.append((timestamp, row))
+
+    def indicator_window(self) -> pd.DataFrame:
+        timestamps, rows = zip(*self.window)
+        return pd.DataFrame(list(rows), index=pd.DatetimeIndex(timestamps, name="timestamp"))
+
+    def entry_condition(self, df: pd.DataFrame, *, index: int = -1) -> bool:
+        row, prev = df.iloc[index], df.iloc[index - 1]
+        return (
+            not self.position
+            and prev["SPREAD_SIGN"] == -1
+            and row["SPREAD_SIGN"] == 1
+            and bool(row["BULLISH_TREND"])
+        )
+
+    def exit_condition(self, df: pd.DataFrame, *, index: int = -1) -> bool:
+        row, prev = df.iloc[index], df.iloc[index - 1]
+        return self.position and prev["SPREAD_SIGN"] == 1 and row["SPREAD_SIGN"] == -1
+
+    def compute_signals(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        sign = df["SPREAD_SIGN"].to_numpy()
+        prev = np.roll(sign, 1)
+        entries = (prev == -1) & (sign == 1) & df["BULLISH_TREND"].to_numpy().astype(bool)
+        exits = (prev == 1) & (sign == -1)
+        return entries, exits
+
+
+def synthetic_history(n: int, timeframe: str = "1h", *, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """`n` synthetic candles of `timeframe` and the daily candles made of them"""
+    df = synthetic_ohlcv(n, timeframe, seed=seed)
+    return {timeframe: df, "1d": aggregate_ohlcv(df, "1d")}
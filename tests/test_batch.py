@@ -0,0 +1,21 @@
+import pytest
+from helpers import CrossStrategy
+
+from trade_pro.strategy.batch import evaluate_batch, supports_batch
+from trade_pro.strategy.optimization import use_batch
+
+CONFIG = {"symbol": "SYNTH", "timeframes": ["1h", "1d"]}
+
+
+def test_strategies_without_batched_signals(history):
+    assert not supports_batch(CrossStrategy)
+    assert not use_batch(CrossStrategy, CONFIG, {"parameters": {"fast": [5, 10]}})
+    assert CrossStrategy().compute_signals_batch(history, [{"fast": 5}]) is None
+    with pytest.raises(Exception, match="does not compute batched signals"):
+        evaluate_batch(CrossStrategy, CONFIG, history, [{"fast": 5}])
+
+
+def test_mas_strategy_supports_batched_signals():
+    from trade_pro.strategy.strategies.mas_strategy import MASStrategy
+
+    assert supports_batch(MASStrategy)
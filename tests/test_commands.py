@@ -0,0 +1,153 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import CrossStrategy
+
+from trade_pro import config
+from trade_pro.strategy.fake_exchange import FakeExchange
+from trade_pro.strategy.live import LiveRunner, SimulatedClock
+from trade_pro.strategy.snapshot import SnapshotBoard, StrategySnapshot
+from trade_pro.telegram.commands import (
+    MAX_TRADES,
+    StateCommands,
+    allowed_chats,
+    telegram_commands,
+)
+from trade_pro.telegram.fake_bot import FakeBot, send_command
+
+NAME = "SYNTH cross"
+
+
+@pytest.fixture
+def strategy(history) -> CrossStrategy:
+    """Strategy with closed trades and an open position"""
+    strategy = CrossStrategy()
+    strategy.mode = "backtest"
+    data = strategy.compute_indicators({tf: df.copy() for tf, df in history.items()})
+    strategy.simulate(data)
+    if not strategy.position:
+        strategy.entry = strategy.open_position(data["close"].iloc[-1], data.index[-1])
+    return strategy
+
+
+@pytest.fixture
+def board(strategy, history) -> SnapshotBoard:
+    board = SnapshotBoard()
+    last = history["1h"].iloc[-1]
+    board.publish(StrategySnapshot.of(NAME, strategy, last.name, last["close"]))
+    return board
+
+
+def ask(
+    board: SnapshotBoard, text: str, chat_id: int = 0, allowed_chats: set[str] | None = None
+) -> list[str]:
+    if allowed_chats is None:
+        allowed_chats = {str(chat_id)}
+    handlers = StateCommands(board, allowed_chats).handlers()
+    return asyncio.run(send_command(FakeBot(), handlers, text, chat_id))
+
+
+def test_snapshot_board_swaps_the_mapping(board, strategy):
+    before = board.snapshots()
+    board.publish(StrategySnapshot.of("other", strategy))
+    assert list(before) == [NAME]
+    assert list(board.snapshots()) == [NAME, "other"]
+    assert [s.name for s in board.find("synth")] == [NAME, "other"]
+    assert [s.name for s in board.find("cross")] == [NAME]
+    board.remove("other")
+    assert list(board.snapshots()) == [NAME]
+
+
+def test_snapshot_equity_is_marked_to_market(board, strategy, history):
+    snapshot = board.find()[0]
+    assert snapshot.position
+    assert snapshot.equity == pytest.approx(strategy.mark_to_market(history["1h"])[-1])
+    assert snapshot.equity < snapshot.units * snapshot.last_close
+
+
+def test_snapshot_trades_are_read_only(board):
+    snapshot = board.find()[0]
+    with pytest.raises(ValueError):
+        snapshot.trades["pnl"][0] = 0.0
+
+
+def test_status_command(board, history):
+    (reply,) = ask(board, "/status")
+    assert reply.startswith(f"📊 {NAME} (1h), candle {history['1h'].index[-1]:%Y-%m-%d %H:%M}")
+    assert "Position: " in reply and "SYNTH @" in reply
+
+
+def test_stats_command(board, strategy):
+    (reply,) = ask(board, "/stats SYNTH")
+    assert f"Trades: {len(strategy.trades)} (" in reply
+    assert f"Balance: ${strategy.balance:.2f}" in reply
+
+
+def test_trades_command_lists_the_latest_first(board, strategy):
+    (reply,) = ask(board, "/trades 2")
+    lines = reply.splitlines()
+    assert lines[0] == f"🧾 {NAME}, last 2 of {len(strategy.trades)} trades"
+    latest = strategy.trades.to_frame().iloc[-1]
+    assert lines[1].startswith(f"{latest['entry_time']:%Y-%m-%d %H:%M} → ")
+    (reply,) = ask(board, f"/trades {MAX_TRADES * 10}")
+    assert len(reply.splitlines()) == 1 + min(len(strategy.trades), MAX_TRADES)
+
+
+def test_commands_without_a_match(board):
+    assert ask(board, "/status BTC") == ["No running strategy matches 'BTC'"]
+    assert ask(SnapshotBoard(), "/trades") == ["No running strategy"]
+
+
+def test_commands_ignore_other_chats(board):
+    assert ask(board, "/status", chat_id=1, allowed_chats={"2"}) == []
+    assert len(ask(board, "/status", chat_id=2, allowed_chats={"2"})) == 1
+
+
+def test_commands_answer_nobody_without_an_allow_list(board):
+    handlers = StateCommands(board).handlers()
+    for command in ("/status", "/stats", "/trades"):
+        assert asyncio.run(send_command(FakeBot(), handlers, command, 0)) == []
+
+
+def test_allowed_chats_from_the_configuration(monkeypatch):
+    monkeypatch.setattr(config, "TELEGRAM_CHAT_ID", "")
+    monkeypatch.setattr(config, "TELEGRAM_ALLOWED_CHATS", "")
+    assert allowed_chats() is None
+    monkeypatch.setattr(config, "TELEGRAM_CHAT_ID", "1")
+    monkeypatch.setattr(config, "TELEGRAM_ALLOWED_CHATS", " 2, 3,")
+    assert allowed_chats() == {"1", "2", "3"}
+
+
+def test_live_runner_publishes_then_removes_its_snapshot(history):
+    start = pd.Timestamp("2017-03-01")
+    strategy = CrossStrategy()
+    clock = SimulatedClock(start)
+    board = SnapshotBoard()
+    runner = LiveRunner(
+        strategy,
+        {tf: df.loc[:start] for tf, df in history.items()},
+        exchange=FakeExchange(
+            {(strategy.symbol, tf): df for tf, df in history.items()}, clock=clock
+        ),
+        clock=clock,
+        name=NAME,
+        board=board,
+    )
+    assert board.find()[0].candle_time == start - pd.Timedelta(1, "h")
+
+    async def main():
+        task = asyncio.create_task(runner.run(until=start + pd.Timedelta(2, "D")))
+        while board.find()[0].candle_time < start:
+            await asyncio.sleep(0)
+        assert not np.isnan(board.find()[0].last_close)
+        await task
+
+    asyncio.run(main())
+    assert board.snapshots() == {}
+
+
+def test_no_commands_without_a_bot_token(monkeypatch):
+    monkeypatch.setattr(config, "TELEGRAM_BOT_TOKEN", "")
+    assert telegram_commands() is None
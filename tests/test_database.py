@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import CrossStrategy
+
+from trade_pro.database import BATCH_ROWS, Run, SQLiteDatabase, strategy_run
+from trade_pro.errors import NotDataFound
+
+
+@pytest.fixture
+def database(tmp_path):
+    with SQLiteDatabase(tmp_path.joinpath("results.db")) as database:
+        yield database
+
+
+@pytest.fixture
+def backtest(history) -> CrossStrategy:
+    strategy = CrossStrategy()
+    strategy.mode = "backtest"
+    strategy.simulate(strategy.compute_indicators({tf: df.copy() for tf, df in history.items()}))
+    return strategy
+
+
+def run(symbol: str = "SYNTH", **stats: float) -> Run:
+    return Run("CrossStrategy", "test", symbol, "optimization", {"fast": 5}, stats)
+
+
+def test_save_runs_round_trips(database, backtest):
+    params = {"symbol": "SYNTH", "fast": 5, "slow": 20}
+    (run_id,) = database.save_runs([strategy_run(backtest, "test", params)])
+
+    (saved,) = database.best_runs("SYNTH").to_dict("records")
+    assert saved["params"] == {"fast": 5, "slow": 20}
+    assert saved["mode"] == "backtest"
+    assert saved["total_trades"] == len(backtest.trades) > 0
+    assert saved["final_balance"] == pytest.approx(backtest.balance)
+
+    trades = database.trades(run_id)
+    expected = backtest.trades.to_frame().reset_index(drop=True)
+    pd.testing.assert_frame_equal(trades[expected.columns], expected, check_dtype=False)
+    pd.testing.assert_series_equal(database.equity(run_id), backtest.equity, check_freq=False)
+
+
+def test_equity_across_insert_batches(database):
+    index = pd.date_range("2017-01-01", periods=2 * BATCH_ROWS + 3, freq="1min", name="timestamp")
+    equity = pd.Series(np.arange(len(index), dtype=float), index=index, name="equity")
+    first = Run("CrossStrategy", "test", "SYNTH", "backtest", {}, {}, equity=equity)
+    second = Run("CrossStrategy", "test", "SYNTH", "backtest", {}, {}, equity=equity * 2)
+    ids = database.save_runs([first, second])
+    assert ids == [1, 2]
+    pd.testing.assert_series_equal(database.equity(1), equity, check_freq=False)
+    pd.testing.assert_series_equal(database.equity(2), equity * 2, check_freq=False)
+    assert database.save_runs([run()]) == [3]
+
+
+def test_best_runs_rank_within_a_symbol(database):
+    database.save_runs(
+        [
+            run(total_pnl=10.0, profit_factor=1.5),
+            run(total_pnl=30.0, profit_factor=np.inf),
+            run(total_pnl=np.nan, profit_factor=0.5),
+            run("OTHER", total_pnl=100.0, profit_factor=9.0),
+            run(total_pnl=20.0, profit_factor=2.0),
+        ]
+    )
+    assert database.best_runs("SYNTH")["total_pnl"].tolist() == [30.0, 20.0, 10.0]
+    assert database.best_runs("SYNTH", "profit_factor", limit=2)["profit_factor"].tolist() == [
+        np.inf,
+        2.0,
+    ]
+    assert database.best_runs("OTHER").index.tolist() == [4]
+
+
+def test_unknown_run(database):
+    with pytest.raises(NotDataFound):
+        database.trades(1)
+    with pytest.raises(ValueError):
+        database.best_runs("SYNTH", "unknown")
@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from trade_pro.strategy.bench import synthetic_ohlcv
+from trade_pro.strategy.downloader import LIMIT, download
+from trade_pro.strategy.fake_exchange import FakeExchange
+from trade_pro.strategy.resample import aggregate_ohlcv
+from trade_pro.strategy.store import ColumnStore
+
+SYMBOL = "SYNTH"
+START = pd.Timestamp("2017-01-01")
+MIDDLE = START + pd.Timedelta(1500, "h")
+END = START + pd.Timedelta(3000, "h")
+
+
+@pytest.fixture
+def source() -> pd.DataFrame:
+    return synthetic_ohlcv(3000)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay, *args: sleep(0, *args))
+
+
+def fetch(exchange, directory, start, end, symbols=(SYMBOL,), timeframes=("1h",)):
+    return asyncio.run(
+        download(list(symbols), list(timeframes), start, end, exchange=exchange, data_dir=directory)
+    )
+
+
+def assert_stored(directory, expected: pd.DataFrame, symbol: str = SYMBOL, timeframe="1h"):
+    stored = ColumnStore(symbol, timeframe, directory).read()
+    pd.testing.assert_frame_equal(stored, expected, check_freq=False)
+
+
+def test_download_into_an_empty_store(tmp_path, source):
+    exchange = FakeExchange({(SYMBOL, "1h"): source})
+    counts = fetch(exchange, tmp_path, START, END)
+    assert counts == {(SYMBOL, "1h"): 3000}
+    assert exchange.requests == 3000 // LIMIT
+    assert_stored(tmp_path, source)
+    assert not tmp_path.joinpath(".downloads", f"{SYMBOL}_1h").exists()
+
+
+def test_incremental_download_fetches_from_the_last_candle(tmp_path, source):
+    fetch(FakeExchange({(SYMBOL, "1h"): source}), tmp_path, START, MIDDLE)
+    assert_stored(tmp_path, source.loc[: MIDDLE - pd.Timedelta(1, "h")])
+    exchange = FakeExchange({(SYMBOL, "1h"): source})
+    assert fetch(exchange, tmp_path, START, END) == {(SYMBOL, "1h"): 1500}
+    assert exchange.requests == 2
+    assert_stored(tmp_path, source)
+
+
+def test_backfill_keeps_the_store_contiguous(tmp_path, source):
+    fetch(FakeExchange({(SYMBOL, "1h"): source}), tmp_path, MIDDLE, END)
+    fetch(FakeExchange({(SYMBOL, "1h"): source}), tmp_path, START, END)
+    assert_stored(tmp_path, source)
+    timestamps = ColumnStore(SYMBOL, "1h", tmp_path).columns()["timestamp"]
+    assert np.all(np.diff(timestamps) == pd.Timedelta(1, "h").value)
+
+
+def test_up_to_date_store_makes_a_single_request(tmp_path, source):
+    fetch(FakeExchange({(SYMBOL, "1h"): source}), tmp_path, START, END)
+    exchange = FakeExchange({(SYMBOL, "1h"): source})
+    assert fetch(exchange, tmp_path, START, END) == {(SYMBOL, "1h"): 0}
+    # the last candle, which may have been open when it was stored
+    assert exchange.requests == 1
+    assert_stored(tmp_path, source)
+
+
+def test_failed_requests_are_retried(tmp_path, source):
+    exchange = FakeExchange({(SYMBOL, "1h"): source}, failures=3)
+    fetch(exchange, tmp_path, START, END)
+    assert exchange.requests == 3000 // LIMIT + 3
+    assert_stored(tmp_path, source)
+
+
+def test_download_of_several_symbols_and_timeframes(tmp_path):
+    data = {}
+    for seed, symbol in enumerate((SYMBOL, "OTHER")):
+        hourly = synthetic_ohlcv(3000, seed=seed)
+        data[(symbol, "1h")] = hourly
+        data[(symbol, "4h")] = aggregate_ohlcv(hourly, "4h")
+    counts = fetch(FakeExchange(data), tmp_path, START, END, (SYMBOL, "OTHER"), ("1h", "4h"))
+    assert counts == {
+        (SYMBOL, "1h"): 3000,
+        (SYMBOL, "4h"): 750,
+        ("OTHER", "1h"): 3000,
+        ("OTHER", "4h"): 750,
+    }
+    for (symbol, timeframe), df in data.items():
+        assert_stored(tmp_path, df, symbol, timeframe)
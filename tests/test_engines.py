@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import CrossStrategy, synthetic_history
+
+from trade_pro.strategy.replay import diff_trades
+from trade_pro.strategy.utils import load_strategy_config
+
+
+def simulate(strategy, history: dict[str, pd.DataFrame]):
+    strategy.mode = "backtest"
+    strategy.simulate(strategy.compute_indicators({tf: df.copy() for tf, df in history.items()}))
+    return strategy
+
+
+def assert_same_backtest(vectorized, loop) -> None:
+    assert len(vectorized.trades) == len(loop.trades) > 0
+    assert diff_trades(vectorized.trades, loop.trades).empty
+    assert vectorized.position == loop.position
+    np.testing.assert_allclose(vectorized.equity.to_numpy(), loop.equity.to_numpy())
+
+
+@pytest.mark.parametrize("start_backtest_index", [0, 500])
+def test_vectorized_backtest_matches_the_loop(history, start_backtest_index):
+    options = {"start_backtest_index": start_backtest_index}
+    loop = simulate(CrossStrategy(vectorized=False, **options), history)
+    vectorized = simulate(CrossStrategy(**options), history)
+    assert_same_backtest(vectorized, loop)
+    assert loop.trades.to_frame()["entry_time"].min() >= history["1h"].index[start_backtest_index]
+
+
+def test_mas_strategy_vectorized_backtest_matches_the_loop():
+    pytest.importorskip("pandas_ta")
+    from trade_pro.strategy.strategies.mas_strategy import MASStrategy
+
+    config = load_strategy_config("mas_strategy_btcusdt")
+    config.pop("optimization", None)
+    history = synthetic_history(2 * 365 * 24)
+    loop = simulate(MASStrategy(**config, vectorized=False), history)
+    vectorized = simulate(MASStrategy(**config), history)
+    assert_same_backtest(vectorized, loop)
@@ -0,0 +1,100 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from helpers import CrossStrategy
+
+from trade_pro.strategy import replay as replay_module
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.fake_exchange import FakeExchange
+from trade_pro.strategy.live import LiveRunner, SimulatedClock
+from trade_pro.strategy.replay import diff_trades, replay
+from trade_pro.strategy.snapshot import SnapshotBoard
+from trade_pro.strategy.streaming import closed_candles
+
+START = pd.Timestamp("2017-03-01")
+
+
+@pytest.fixture
+def stored(monkeypatch, tmp_path, history):
+    """`CrossStrategy` reading `history` instead of the stored candles"""
+    monkeypatch.setattr(
+        CrossStrategy, "load_data", lambda self: {tf: df.copy() for tf, df in history.items()}
+    )
+    monkeypatch.setattr(replay_module, "RESULTS_DIR", tmp_path)
+    return history
+
+
+@pytest.mark.parametrize("tick", [None, pd.Timedelta(6, "h")])
+def test_replay_trades_like_the_backtest(stored, tick):
+    report = replay(CrossStrategy, {}, "test", START, tick=tick)
+    assert report["live_trades"] > 0
+    assert report["live_trades"] == report["backtest_trades"]
+    assert report["different_trades"] == 0
+    assert report["bars"] == len(stored["1h"].loc[START - pd.Timedelta(1, "h") :]) - 1
+
+
+class BatchCrossStrategy(CrossStrategy):
+    """`CrossStrategy` without the streaming indicators"""
+
+    warm_up = Base.warm_up
+    update_indicators = Base.update_indicators
+    indicator_window = Base.indicator_window
+
+
+def test_replay_without_streaming_indicators(stored):
+    assert BatchCrossStrategy().indicator_window() is None
+    report = replay(BatchCrossStrategy, {}, "test", START, START + pd.Timedelta(10, "D"))
+    assert report["live_trades"] > 0
+    assert report["different_trades"] == 0
+
+
+def run_live(history, until, **exchange_options) -> tuple[CrossStrategy, FakeExchange]:
+    strategy = CrossStrategy()
+    strategy.mode = "live"
+    clock = SimulatedClock(START)
+    exchange = FakeExchange(
+        {(strategy.symbol, tf): df for tf, df in history.items()}, clock=clock, **exchange_options
+    )
+    runner = LiveRunner(
+        strategy,
+        {tf: df.loc[:START] for tf, df in history.items()},
+        exchange=exchange,
+        clock=clock,
+        board=SnapshotBoard(),
+    )
+    asyncio.run(runner.run(until=until))
+    assert runner.streaming
+    return strategy, exchange
+
+
+def test_live_engine_recovers_from_exchange_failures(history):
+    until = START + pd.Timedelta(10, "D")
+    reference, _ = run_live(history, until)
+    strategy, exchange = run_live(history, until, failures=5)
+    assert exchange.failures == 0
+    assert len(strategy.trades) == len(reference.trades) > 0
+    assert diff_trades(strategy.trades, reference.trades).empty
+
+
+def test_live_engine_only_sees_closed_candles(history):
+    until = START + pd.Timedelta(3, "D")
+    strategy, _ = run_live(history, until, partial=True)
+    window = strategy.indicator_window()
+    last_closed = closed_candles(history["1h"], "1h", until).index[-1]
+    assert window.index[-1] == last_closed
+    assert window["close"].iloc[-1] == history["1h"].loc[last_closed, "close"]
+
+
+def test_next_wake_follows_the_earliest_candle_close(history):
+    strategy = CrossStrategy()
+    runner = LiveRunner(
+        strategy,
+        history,
+        exchange=FakeExchange({}),
+        clock=SimulatedClock(START),
+        delay=pd.Timedelta(2, "s"),
+        board=SnapshotBoard(),
+    )
+    now = pd.Timestamp("2017-03-01 10:20")
+    assert runner.next_wake(now) == pd.Timestamp("2017-03-01 11:00:02")
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import time
+
+from trade_pro.telegram.fake_bot import FakeBot
+from trade_pro.telegram.notifier import Notifier, split_messages
+
+FAST = {"coalesce": 0.01, "min_interval": 0.0, "max_backoff": 0.01}
+
+
+def deliver(notifier: Notifier, texts: list[str], *, timeout: float = 5.0) -> None:
+    """Start `notifier`, queue `texts` and stop it once they are handled"""
+
+    async def main():
+        await notifier.start()
+        for text in texts:
+            notifier.notify(text)
+        await notifier.stop(timeout)
+
+    asyncio.run(main())
+
+
+def test_messages_queued_together_are_sent_as_one():
+    bot = FakeBot()
+    deliver(Notifier(bot, 1, **FAST), ["entry", "exit", "entry"])
+    assert bot.messages == [(1, "entry\nexit\nentry")]
+
+
+def test_split_messages_respects_the_limit():
+    messages = split_messages(["a" * 6, "b" * 3, "c" * 12], limit=10)
+    assert messages == ["a" * 6 + "\n" + "b" * 3, "c" * 10, "c" * 2]
+    assert all(len(message) <= 10 for message in messages)
+
+
+def test_failed_sends_are_retried():
+    bot = FakeBot(failures=2)
+    notifier = Notifier(bot, 1, **FAST)
+    deliver(notifier, ["entry"])
+    assert bot.messages == [(1, "entry")]
+    assert bot.requests == 3
+    assert notifier.sent == 1
+
+
+def test_rate_limit_answers_are_waited_for():
+    bot = FakeBot(rate_limited=1, retry_after=0.2)
+    begin = time.perf_counter()
+    deliver(Notifier(bot, 1, **FAST), ["entry"])
+    assert time.perf_counter() - begin >= 0.2
+    assert bot.messages == [(1, "entry")]
+
+
+def test_undelivered_messages_are_spilled_then_sent_again(tmp_path):
+    spill_path = tmp_path.joinpath("spill.jsonl")
+    notifier = Notifier(FakeBot(failures=10), 1, max_retries=2, spill_path=spill_path, **FAST)
+    deliver(notifier, ["entry"])
+    assert notifier.sent == 0
+    assert [json.loads(line) for line in spill_path.read_text().splitlines()] == ["entry"]
+
+    bot = FakeBot()
+    deliver(Notifier(bot, 1, spill_path=spill_path, **FAST), [])
+    assert bot.messages == [(1, "entry")]
+    assert not spill_path.exists()
+
+
+def test_notify_does_not_wait_when_the_queue_is_full(tmp_path):
+    spill_path = tmp_path.joinpath("spill.jsonl")
+    notifier = Notifier(FakeBot(), 1, maxsize=1, spill_path=spill_path, **FAST)
+    assert notifier.notify("entry")
+    assert not notifier.notify("exit")
+    assert spill_path.read_text() == '"exit"\n'
+
+
+def test_stop_spills_what_is_not_sent_in_time(tmp_path):
+    spill_path = tmp_path.joinpath("spill.jsonl")
+    notifier = Notifier(FakeBot(latency=1.0), 1, spill_path=spill_path, **FAST)
+    begin = time.perf_counter()
+    deliver(notifier, ["entry"], timeout=0.1)
+    assert time.perf_counter() - begin < 1.0
+    assert notifier.sent == 0
+    assert spill_path.read_text() == '"entry"\n'
@@ -0,0 +1,57 @@
+import pytest
+from helpers import SYMBOL, CrossStrategy
+
+from trade_pro.strategy import base
+from trade_pro.strategy.replay import diff_trades
+from trade_pro.strategy.result_cache import ResultCache
+from trade_pro.strategy.store import ColumnStore
+
+CONFIG = {
+    "symbol": SYMBOL,
+    "timeframes": ["1h", "1d"],
+    "intrabar_timeframe": "15m",
+    "stop_loss": 0.02,
+    "trailing_stop": 0.015,
+}
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path) -> ResultCache:
+    cache = ResultCache(tmp_path.joinpath("cache"))
+    monkeypatch.setattr(base, "result_cache", cache)
+    return cache
+
+
+def run(config) -> CrossStrategy:
+    strategy = CrossStrategy(**config)
+    strategy.run("backtest", config)
+    return strategy
+
+
+def lower_intrabar_lows(directory) -> None:
+    store = ColumnStore(SYMBOL, "15m", directory)
+    candles = store.read().copy()
+    candles.iloc[::50, candles.columns.get_loc("low")] *= 0.9
+    store.write(candles)
+
+
+def test_backtest_is_read_back_from_the_cache(stores, cache):
+    first = run(CONFIG)
+    second = run(CONFIG)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert diff_trades(first.trades, second.trades).empty
+
+
+def test_intrabar_candles_change_the_backtest_key(stores, cache, tmp_path):
+    first = run(CONFIG)
+    lower_intrabar_lows(tmp_path)
+    second = run(CONFIG)
+    assert (cache.misses, cache.hits) == (2, 0)
+    assert not diff_trades(first.trades, second.trades).empty
+
+
+def test_intrabar_candles_are_not_read_without_stops(stores, cache, tmp_path):
+    config = {key: CONFIG[key] for key in ("symbol", "timeframes", "intrabar_timeframe")}
+    key = cache.backtest_key(CrossStrategy, config, stores)
+    lower_intrabar_lows(tmp_path)
+    assert cache.backtest_key(CrossStrategy, config, stores) == key
@@ -0,0 +1,93 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import CrossStrategy
+
+from trade_pro.strategy.replay import diff_trades
+from trade_pro.strategy.stops import FIRST_WINDOW, first_touch, first_touch_loop, uses_stops
+
+LEVELS = {"stop_loss": 0.02, "take_profit": 0.03, "trailing_stop": 0.015}
+
+
+def random_candles(rng: np.random.Generator, n: int) -> tuple[np.ndarray, ...]:
+    """Candles whose opens gap away from the previous close now and then"""
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.005, n)))
+    gaps = rng.normal(0, 0.01, n) * (rng.random(n) < 0.05)
+    opens = np.concatenate([[100.0], close[:-1]]) * (1 + gaps)
+    highs = np.maximum(opens, close) * (1 + np.abs(rng.normal(0, 0.003, n)))
+    lows = np.minimum(opens, close) * (1 - np.abs(rng.normal(0, 0.003, n)))
+    return opens, highs, lows
+
+
+@pytest.mark.parametrize(
+    "names",
+    [names for size in (1, 2, 3) for names in itertools.combinations(LEVELS, size)],
+)
+def test_first_touch_matches_the_loop(names):
+    rng = np.random.default_rng(len(names))
+    levels = {name: LEVELS[name] for name in names}
+    for n in [0, 1, 2, FIRST_WINDOW - 1, FIRST_WINDOW, FIRST_WINDOW + 1, 1000] * 30:
+        opens, highs, lows = random_candles(rng, n)
+        reference = 100 * (1 + rng.normal(0, 0.01))
+        peak = reference * (1 + abs(rng.normal(0, 0.01)))
+        expected = first_touch_loop(opens, highs, lows, reference, peak=peak, **levels)
+        result = first_touch(opens, highs, lows, reference, peak=peak, **levels)
+        assert result[0] == expected[0]
+        np.testing.assert_allclose(result[1:], expected[1:], rtol=1e-12)
+
+
+def test_gap_through_a_level_fills_at_the_open():
+    opens = np.array([100.0, 95.0])
+    highs = np.array([101.0, 96.0])
+    lows = np.array([99.5, 94.0])
+    at, fill, _ = first_touch(opens, highs, lows, 100.0, stop_loss=0.02)
+    assert (at, fill) == (1, 95.0)
+
+
+def test_uses_stops():
+    assert not uses_stops({"fast": 5})
+    assert uses_stops({"stop_loss": 0.02})
+    assert not uses_stops({"stop_loss": None})
+    assert uses_stops({}, {"trailing_stop": [0.01, 0.02]})
+
+
+def backtest(history: dict[str, pd.DataFrame], **kwargs) -> CrossStrategy:
+    strategy = CrossStrategy(**kwargs)
+    strategy.mode = "backtest"
+    strategy.simulate(strategy.compute_indicators({tf: df.copy() for tf, df in history.items()}))
+    return strategy
+
+
+def assert_same_backtest(strategy: CrossStrategy, reference: CrossStrategy) -> None:
+    assert len(strategy.trades) == len(reference.trades) > 0
+    assert diff_trades(strategy.trades, reference.trades).empty
+    np.testing.assert_allclose(strategy.equity.to_numpy(), reference.equity.to_numpy())
+
+
+@pytest.mark.parametrize(
+    "levels", [{"stop_loss": 0.01}, {"take_profit": 0.01, "trailing_stop": 0.005}, LEVELS]
+)
+def test_vectorized_engine_matches_the_loop(history, levels):
+    loop = backtest(history, vectorized=False, **levels)
+    vectorized = backtest(history, **levels)
+    assert_same_backtest(vectorized, loop)
+    # the protective exits did close some trades
+    assert not diff_trades(loop.trades, backtest(history).trades).empty
+
+
+def test_intrabar_candles_engines_match(stores):
+    options = {"intrabar_timeframe": "15m", **LEVELS}
+    loop = backtest(stores, vectorized=False, **options)
+    assert_same_backtest(backtest(stores, **options), loop)
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_chunked_backtest_matches_in_memory(stores, vectorized):
+    options = {"intrabar_timeframe": "15m", "vectorized": vectorized, **LEVELS}
+    reference = backtest(stores, **options)
+    chunked = CrossStrategy(**options)
+    chunked.mode = "backtest"
+    chunked.simulate_chunked(100)
+    assert_same_backtest(chunked, reference)
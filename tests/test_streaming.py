@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from helpers import synthetic_history
+
+from trade_pro.strategy.bench import synthetic_ohlcv
+from trade_pro.strategy.streaming import (
+    EMA,
+    MACD,
+    RMA,
+    RSI,
+    RollingSMA,
+    TrendFilter,
+    closed_candles,
+    merge_candles,
+)
+from trade_pro.strategy.utils import load_strategy_config
+
+
+@pytest.fixture
+def close() -> pd.Series:
+    return synthetic_ohlcv(2000, seed=1)["close"]
+
+
+@pytest.fixture
+def ta():
+    return pytest.importorskip("pandas_ta")
+
+
+def stream(indicator, close: pd.Series) -> np.ndarray:
+    return np.array([indicator.update(value) for value in close])
+
+
+def test_rolling_sma_matches_rolling_mean(close):
+    expected = close.rolling(20).mean().to_numpy()
+    np.testing.assert_allclose(stream(RollingSMA(20), close), expected, rtol=1e-12)
+
+
+def test_trend_filter_matches_batch(close):
+    expected = (close > close.rolling(12).mean()).to_numpy()
+    np.testing.assert_array_equal(stream(TrendFilter(12), close), expected)
+
+
+@pytest.mark.parametrize("length", [2, 9, 40])
+def test_ema_matches_pandas_ta(ta, close, length):
+    expected = ta.ema(close, length=length).to_numpy()
+    np.testing.assert_allclose(stream(EMA(length), close), expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("length", [2, 14, 29])
+def test_rma_matches_pandas_ta(ta, close, length):
+    expected = ta.rma(close, length=length).to_numpy()
+    np.testing.assert_allclose(stream(RMA(length), close), expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("length", [14, 29])
+def test_rsi_matches_pandas_ta(ta, close, length):
+    expected = ta.rsi(close, length=length).to_numpy()
+    np.testing.assert_allclose(stream(RSI(length), close), expected, rtol=1e-9)
+
+
+def test_macd_matches_pandas_ta(ta, close):
+    expected = ta.macd(close, 12, 26, 9)
+    macd = MACD(12, 26, 9)
+    values = np.array([macd.update(value) for value in close])
+    np.testing.assert_allclose(values[:, 0], expected["MACD_12_26_9"], rtol=1e-9)
+    np.testing.assert_allclose(values[:, 1], expected["MACDs_12_26_9"], rtol=1e-9)
+
+
+def test_merge_candles_orders_by_close_higher_timeframes_first():
+    data = synthetic_history(72)
+    events = [(timeframe, timestamp) for timeframe, timestamp, _ in merge_candles(data)]
+    assert len(events) == 72 + 3
+    # the daily candle closes with the last hourly candle of the day, and comes first
+    day = events.index(("1d", pd.Timestamp("2017-01-01")))
+    assert events[day + 1] == ("1h", pd.Timestamp("2017-01-01 23:00"))
+    closes = [timestamp + pd.Timedelta(1, timeframe[-1]) for timeframe, timestamp in events]
+    assert closes == sorted(closes)
+
+
+def test_closed_candles_drops_the_open_candle():
+    df = synthetic_ohlcv(10)
+    closed = closed_candles(df, "1h", df.index[-1] + pd.Timedelta(30, "min"))
+    assert closed.index[-1] == df.index[-2]
+
+
+def test_mas_strategy_streaming_matches_compute_indicators(ta):
+    from trade_pro.strategy.strategies.mas_strategy import MASStrategy
+
+    config = load_strategy_config("mas_strategy_btcusdt")
+    config.pop("optimization", None)
+    strategy = MASStrategy(**config)
+    data = synthetic_history(200 * 24)
+    split = 150 * 24
+    strategy.warm_up({"1h": data["1h"].iloc[:split], "1d": data["1d"].iloc[:150]})
+    expected = strategy.compute_indicators({tf: df.copy() for tf, df in data.items()})
+    columns = ["SPREAD_SIGN", "RSI", "MACD", "MACD_SIGNAL", "BULLISH_TREND"]
+
+    new_candles = {"1h": data["1h"].iloc[split:], "1d": data["1d"].iloc[150:]}
+    for timeframe, timestamp, candle in merge_candles(new_candles):
+        strategy.update_indicators(timeframe, timestamp, candle)
+        if timeframe != "1h":
+            continue
+        window = strategy.indicator_window()
+        pd.testing.assert_frame_equal(
+            window[columns],
+            expected.loc[window.index, columns],
+            check_dtype=False,
+            check_freq=False,
+            rtol=1e-9,
+        )
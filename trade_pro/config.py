@@ -1,12 +1,19 @@
 import logging
+import os
 from configparser import ConfigParser
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 
 from trade_pro.utils import load_configuration_data
 
 ROOT = Path(__file__).parents[1]
 
+TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "")
+# chats allowed to query the strategies state besides TELEGRAM_CHAT_ID, comma separated
+TELEGRAM_ALLOWED_CHATS = os.environ.get("TELEGRAM_ALLOWED_CHATS", "")
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +25,8 @@ class Database:
     port: int
     user: str
     ref_table: str
+    # "postgres" or "sqlite", `database` then being the file path
+    backend: str = "postgres"
 
 
 def bootstrap_configuration(path: str | Path = ROOT.joinpath("trade_pro.ini")) -> None:
@@ -28,4 +37,18 @@ def bootstrap_configuration(path: str | Path = ROOT.joinpath("trade_pro.ini")) -
     load_configuration_data(config_dict)
 
 
-bootstrap_configuration()
+def database_configuration(path: str | Path = ROOT.joinpath("trade_pro.ini")) -> Database:
+    """`[database]` section of the configuration file"""
+    from apischema import deserialize
+
+    config = ConfigParser()
+    config.read(path)
+    if not config.has_section("database"):
+        raise Exception(f"No 'database' section in configuration file {path}")
+    return deserialize(Database, dict(config.items("database")), coerce=True)
+
+
+@cache
+def ensure_configuration() -> None:
+    """Load the configuration file once, on first use rather than at import"""
+    bootstrap_configuration()
@@ -0,0 +1,430 @@
+import json
+import logging
+import sqlite3
+import threading
+from abc import abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.config import Database, database_configuration
+from trade_pro.errors import NotDataFound
+
+logger = logging.getLogger(__name__)
+
+TRADE_METRICS = (
+    "total_trades",
+    "win_trades",
+    "lose_trades",
+    "max_win",
+    "max_lose",
+    "win_rate",
+    "pnl_weighted_win_rate",
+    "profit_factor",
+    "sharpe_like",
+    "max_drawdown",
+    "total_pnl",
+    "final_balance",
+)
+RUN_METRICS = (*TRADE_METRICS, "max_drawdown_bar", "max_drawdown_bar_pct", "sharpe")
+# metrics with a (symbol, metric) index for the best runs queries
+INDEXED_METRICS = ("total_pnl", "final_balance", "profit_factor", "sharpe")
+RUN_COLUMNS = ("id", "created", "strategy", "config", "symbol", "mode", "params", *RUN_METRICS)
+TRADE_COLUMNS = (
+    "run_id",
+    "entry_time",
+    "exit_time",
+    "entry_price",
+    "exit_price",
+    "pnl",
+    "return_pct",
+    "old_balance",
+    "new_balance",
+)
+EQUITY_COLUMNS = ("run_id", "timestamp", "equity")
+# rows per executemany call
+BATCH_ROWS = 10_000
+
+
+@dataclass
+class Run:
+    """One backtest (or optimization / walk-forward evaluation) to persist,
+    `trades` are `TRADE_DTYPE` records, times are stored as ns since epoch"""
+
+    strategy: str
+    config: str
+    symbol: str
+    mode: str
+    params: dict[str, Any]
+    stats: dict[str, float]
+    trades: np.ndarray | None = None
+    equity: pd.Series | None = None
+    created: pd.Timestamp = field(default_factory=lambda: pd.Timestamp.now(tz="UTC"))
+
+    def row(self, run_id: int) -> tuple:
+        metrics = [_number(self.stats.get(metric)) for metric in RUN_METRICS]
+        params = json.dumps(self.params, default=str, sort_keys=True)
+        return (
+            run_id,
+            self.created.value,
+            self.strategy,
+            self.config,
+            self.symbol,
+            self.mode,
+            params,
+            *metrics,
+        )
+
+
+def strategy_run(strategy: Any, config: str, params: dict[str, Any]) -> Run:
+    """`Run` of a strategy after `simulate`, `params` being the arguments it
+    was built with"""
+    return Run(
+        strategy=type(strategy).__name__,
+        config=config,
+        symbol=strategy.symbol,
+        mode=strategy.mode or "backtest",
+        params={name: value for name, value in params.items() if name != "symbol"},
+        stats=strategy.backtest_stats(strategy.trades, strategy.equity),
+        trades=strategy.trades.records,
+        equity=strategy.equity,
+    )
+
+
+def table_runs(
+    table: pd.DataFrame, strategy: str, config_name: str, config: dict[str, Any], mode: str
+) -> list[Run]:
+    """`Run` of every row of an optimization or walk-forward results table,
+    columns other than the metrics being parameters"""
+    fixed = {name: value for name, value in config.items() if name != "symbol"}
+    runs = []
+    for row in table.to_dict("records"):
+        stats = {metric: row.pop(metric) for metric in RUN_METRICS if metric in row}
+        runs.append(
+            Run(
+                strategy=strategy,
+                config=config_name,
+                symbol=config["symbol"],
+                mode=mode,
+                params={**fixed, **row},
+                stats=stats,
+            )
+        )
+    return runs
+
+
+class ResultsDatabase:
+    """Runs, trades and equity curves tables named after the `ref_table`
+    prefix, written in bulk: the ids of a whole list of runs are reserved in
+    one query and every table is filled with one bulk insert per call.
+
+    Backends implement the connection handling, the id reservation and the
+    bulk insert.
+    """
+
+    placeholder = "?"
+    types = {"id": "INTEGER", "int": "INTEGER", "float": "REAL", "text": "TEXT"}
+
+    def __init__(self, prefix: str):
+        self.runs_table = f"{prefix}_runs"
+        self.trades_table = f"{prefix}_trades"
+        self.equity_table = f"{prefix}_equity"
+
+    @abstractmethod
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Connection of a transaction, committed when the block exits"""
+
+    @abstractmethod
+    def reserve_ids(self, connection: Any, count: int) -> list[int]:
+        """`count` unused run ids"""
+
+    @abstractmethod
+    def insert_rows(
+        self, connection: Any, table: str, columns: tuple[str, ...], rows: Iterable[tuple]
+    ) -> None:
+        """Bulk insert of `rows`"""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ResultsDatabase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def schema(self) -> list[str]:
+        t = self.types
+        metrics = ",\n".join(f"    {metric} {t['float']}" for metric in RUN_METRICS)
+        statements = [
+            f"""CREATE TABLE IF NOT EXISTS {self.runs_table} (
+    id {t["id"]} PRIMARY KEY,
+    created {t["int"]} NOT NULL,
+    strategy {t["text"]} NOT NULL,
+    config {t["text"]} NOT NULL,
+    symbol {t["text"]} NOT NULL,
+    mode {t["text"]} NOT NULL,
+    params {t["text"]} NOT NULL,
+{metrics}
+)""",
+            f"""CREATE TABLE IF NOT EXISTS {self.trades_table} (
+    run_id {t["id"]} NOT NULL REFERENCES {self.runs_table} (id) ON DELETE CASCADE,
+    entry_time {t["int"]} NOT NULL,
+    exit_time {t["int"]} NOT NULL,
+    entry_price {t["float"]} NOT NULL,
+    exit_price {t["float"]} NOT NULL,
+    pnl {t["float"]} NOT NULL,
+    return_pct {t["float"]} NOT NULL,
+    old_balance {t["float"]} NOT NULL,
+    new_balance {t["float"]} NOT NULL
+)""",
+            f"""CREATE TABLE IF NOT EXISTS {self.equity_table} (
+    run_id {t["id"]} NOT NULL REFERENCES {self.runs_table} (id) ON DELETE CASCADE,
+    timestamp {t["int"]} NOT NULL,
+    equity {t["float"]} NOT NULL,
+    PRIMARY KEY (run_id, timestamp)
+)""",
+            f"CREATE INDEX IF NOT EXISTS {self.trades_table}_run_id "
+            f"ON {self.trades_table} (run_id)",
+        ]
+        statements += [
+            f"CREATE INDEX IF NOT EXISTS {self.runs_table}_symbol_{metric} "
+            f"ON {self.runs_table} (symbol, {metric} DESC)"
+            for metric in INDEXED_METRICS
+        ]
+        return statements
+
+    def create_schema(self) -> None:
+        with self.connection() as connection:
+            for statement in self.schema():
+                connection.execute(statement)
+
+    def save_runs(self, runs: list[Run]) -> list[int]:
+        """Insert `runs` with their trades and equity curves in one
+        transaction, returns their ids"""
+        if not runs:
+            return []
+        with self.connection() as connection:
+            ids = self.reserve_ids(connection, len(runs))
+            self.insert_rows(
+                connection,
+                self.runs_table,
+                RUN_COLUMNS,
+                (run.row(run_id) for run_id, run in zip(ids, runs)),
+            )
+            self.insert_rows(
+                connection,
+                self.trades_table,
+                TRADE_COLUMNS,
+                (
+                    (run_id, *record)
+                    for run_id, run in zip(ids, runs)
+                    if run.trades is not None
+                    for record in run.trades.tolist()
+                ),
+            )
+            self.insert_rows(
+                connection,
+                self.equity_table,
+                EQUITY_COLUMNS,
+                (
+                    (run_id, timestamp, equity)
+                    for run_id, run in zip(ids, runs)
+                    if run.equity is not None
+                    for timestamp, equity in zip(
+                        run.equity.index.asi8.tolist(), run.equity.to_numpy().tolist()
+                    )
+                ),
+            )
+        logger.info("Saved %d runs to %s", len(runs), self.runs_table)
+        return ids
+
+    def best_runs(
+        self,
+        symbol: str,
+        metric: str = "total_pnl",
+        *,
+        strategy: str | None = None,
+        mode: str | None = None,
+        limit: int = 10,
+    ) -> pd.DataFrame:
+        """Runs of `symbol` with the highest `metric`"""
+        if metric not in RUN_METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {RUN_METRICS}")
+        p = self.placeholder
+        filters, values = [f"symbol = {p}", f"{metric} IS NOT NULL"], [symbol]
+        if strategy is not None:
+            filters.append(f"strategy = {p}")
+            values.append(strategy)
+        if mode is not None:
+            filters.append(f"mode = {p}")
+            values.append(mode)
+        query = (
+            f"SELECT * FROM {self.runs_table} WHERE {' AND '.join(filters)} "
+            f"ORDER BY {metric} DESC LIMIT {int(limit)}"
+        )
+        table = self._frame(query, values)
+        table["created"] = pd.to_datetime(table["created"], utc=True)
+        table["params"] = table["params"].map(json.loads)
+        return table.set_index("id")
+
+    def trades(self, run_id: int) -> pd.DataFrame:
+        self._check_run(run_id)
+        table = self._frame(
+            f"SELECT * FROM {self.trades_table} WHERE run_id = {self.placeholder} "
+            "ORDER BY entry_time",
+            [run_id],
+        )
+        for column in ("entry_time", "exit_time"):
+            table[column] = pd.to_datetime(table[column])
+        return table.drop(columns="run_id")
+
+    def equity(self, run_id: int) -> pd.Series:
+        self._check_run(run_id)
+        table = self._frame(
+            f"SELECT timestamp, equity FROM {self.equity_table} "
+            f"WHERE run_id = {self.placeholder} ORDER BY timestamp",
+            [run_id],
+        )
+        index = pd.DatetimeIndex(pd.to_datetime(table["timestamp"]), name="timestamp")
+        return pd.Series(table["equity"].to_numpy(), index=index, name="equity")
+
+    def _check_run(self, run_id: int) -> None:
+        query = f"SELECT id FROM {self.runs_table} WHERE id = {self.placeholder}"
+        if len(self._frame(query, [run_id])) == 0:
+            raise NotDataFound(table=self.runs_table, id=run_id)
+
+    def _frame(self, query: str, values: list[Any]) -> pd.DataFrame:
+        with self.connection() as connection:
+            cursor = connection.execute(query, values)
+            columns = [column[0] for column in cursor.description]
+            return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+class SQLiteDatabase(ResultsDatabase):
+    """Local stand-in of the Postgres database in a single SQLite file, one
+    connection shared by the threads of the process"""
+
+    def __init__(self, path: str | Path, prefix: str = "strategy"):
+        super().__init__(prefix)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection_ = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection_.execute("PRAGMA foreign_keys = ON")
+        self.connection_.execute("PRAGMA journal_mode = WAL")
+        self.connection_.execute("PRAGMA synchronous = NORMAL")
+        self.create_schema()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self.lock:
+            self.connection_.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection_
+            except BaseException:
+                self.connection_.execute("ROLLBACK")
+                raise
+            self.connection_.execute("COMMIT")
+
+    def reserve_ids(self, connection: sqlite3.Connection, count: int) -> list[int]:
+        # the write lock of the transaction is held, nobody else inserts runs
+        (last,) = connection.execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM {self.runs_table}"
+        ).fetchone()
+        return list(range(last + 1, last + 1 + count))
+
+    def insert_rows(
+        self,
+        connection: sqlite3.Connection,
+        table: str,
+        columns: tuple[str, ...],
+        rows: Iterable[tuple],
+    ) -> None:
+        query = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(self.placeholder for _ in columns)})"
+        )
+        rows = iter(rows)
+        while batch := list(islice(rows, BATCH_ROWS)):
+            connection.executemany(query, batch)
+
+    def close(self) -> None:
+        self.connection_.close()
+
+
+class PostgresDatabase(ResultsDatabase):
+    """Postgres tables written with COPY through a connection pool, needs the
+    `psycopg` and `psycopg_pool` packages (`pip install trade_pro[postgres]`)"""
+
+    placeholder = "%s"
+    types = {"id": "BIGINT", "int": "BIGINT", "float": "DOUBLE PRECISION", "text": "TEXT"}
+
+    def __init__(self, config: Database, *, min_size: int = 1, max_size: int = 4):
+        from psycopg_pool import ConnectionPool
+
+        super().__init__(config.ref_table)
+        self.pool = ConnectionPool(
+            f"host={config.host} port={config.port} dbname={config.database} "
+            f"user={config.user} password={config.password}",
+            min_size=min_size,
+            max_size=max_size,
+            open=True,
+        )
+        self.create_schema()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        with self.pool.connection() as connection:
+            yield connection
+
+    def schema(self) -> list[str]:
+        sequence = f"{self.runs_table}_id"
+        statements = super().schema()
+        statements[0] = statements[0].replace(
+            "id BIGINT PRIMARY KEY", f"id BIGINT PRIMARY KEY DEFAULT nextval('{sequence}')"
+        )
+        return [f"CREATE SEQUENCE IF NOT EXISTS {sequence}", *statements]
+
+    def reserve_ids(self, connection: Any, count: int) -> list[int]:
+        cursor = connection.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)", [f"{self.runs_table}_id", count]
+        )
+        return [run_id for (run_id,) in cursor.fetchall()]
+
+    def insert_rows(
+        self, connection: Any, table: str, columns: tuple[str, ...], rows: Iterable[tuple]
+    ) -> None:
+        with connection.cursor() as cursor:
+            with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def open_database(config: Database | None = None) -> ResultsDatabase:
+    """Database of the `[database]` section of the configuration file,
+    `backend = sqlite` uses `database` as the SQLite file path"""
+    config = config or database_configuration()
+    if config.backend == "sqlite":
+        return SQLiteDatabase(config.database, config.ref_table)
+    if config.backend == "postgres":
+        return PostgresDatabase(config)
+    raise Exception(f"Database backend {config.backend} not supported")
+
+
+def _number(value: Any) -> float | None:
+    """Metric as stored, NaN as NULL. Infinities are kept (a profit factor
+    without losing trade), SQLite REAL and Postgres double precision store
+    them and rank them first."""
+    if value is None:
+        return None
+    value = float(value)
+    return None if np.isnan(value) else value
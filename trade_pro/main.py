@@ -1,10 +1,13 @@
+import json
 import logging
+import sys
+from contextlib import nullcontext
+from pathlib import Path
 
 import click
-import pandas as pd
 
-from trade_pro.strategy.runner import run as strategy_runner
-from trade_pro.strategy.utils import fetch_data
+# commands import their modules when invoked, `--help` stays fast
+from trade_pro.strategy.bench_cases import CASES, DEFAULT_SIZES, SIZES
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
@@ -19,27 +22,270 @@ def cli():
 
 
 @cli.command()
-@click.option("--mode", required=True, type=click.Choice(["live", "backtest", "optimization"]))
+@click.option(
+    "--mode", required=True, type=click.Choice(["live", "backtest", "optimization", "walk_forward"])
+)
 @click.option("--name", required=True)
 @click.option("--config", required=True)
-def run(mode: str, name: str, config: str):
+@click.option(
+    "--metrics-file",
+    type=click.Path(path_type=Path),
+    help="Write Prometheus metrics to this file, periodically and at exit",
+)
+@click.option("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+@click.option(
+    "--metrics-interval", default=15.0, show_default=True, help="Seconds between metrics writes"
+)
+@click.option("--profile", type=click.Path(path_type=Path), help="Write cProfile stats here")
+@click.option("--save", is_flag=True, help="Save the runs to the configured database")
+@click.option("--no-cache", is_flag=True, help="Run again the backtests found in the result cache")
+@click.option(
+    "--chunk-size", type=int, help="Backtest reading this many candles at a time (bounded memory)"
+)
+@click.option(
+    "--float32", is_flag=True, help="Keep the equity curve of chunked backtests as float32"
+)
+def run(
+    mode: str,
+    name: str,
+    config: str,
+    metrics_file: Path | None = None,
+    metrics_port: int | None = None,
+    metrics_interval: float = 15.0,
+    profile: Path | None = None,
+    save: bool = False,
+    no_cache: bool = False,
+    chunk_size: int | None = None,
+    float32: bool = False,
+):
+    from trade_pro.strategy.metrics import profiled, registry
+    from trade_pro.strategy.runner import run as strategy_runner
+
     logger.info(f"Running '{mode}' for strategy '{name}'")
-    strategy_runner(mode, name, config)
+    if metrics_file or metrics_port:
+        registry.enabled = True
+    if metrics_port:
+        registry.serve(metrics_port)
+    stop = registry.write_every(metrics_file, metrics_interval) if metrics_file else None
+    try:
+        with profiled(profile) if profile else nullcontext():
+            strategy_runner(mode, name, config, save, not no_cache, chunk_size, float32)
+    finally:
+        if stop is not None:
+            stop.set()
+            registry.write(metrics_file)
+
+
+@cli.command()
+@click.option("--name", required=True)
+@click.option("--config", required=True)
+@click.option("--simulations", default=10_000, show_default=True, help="Simulations per method")
+@click.option(
+    "--method",
+    multiple=True,
+    type=click.Choice(["shuffle", "bootstrap", "costs"]),
+    help="Trade order shuffles, block bootstrap of bar returns or cost perturbations (all by default)",
+)
+@click.option("--block", default=24, show_default=True, help="Bars per bootstrap block")
+@click.option(
+    "--cost-scale",
+    nargs=2,
+    type=float,
+    default=(0.5, 2.0),
+    show_default=True,
+    help="Range of the slippage and commission multipliers",
+)
+@click.option("--confidence", default=0.95, show_default=True)
+@click.option("--seed", type=int)
+def robustness(
+    name: str,
+    config: str,
+    simulations: int,
+    method: tuple[str, ...],
+    block: int,
+    cost_scale: tuple[float, float],
+    confidence: float,
+    seed: int | None,
+):
+    """Monte Carlo robustness analysis of a strategy backtest"""
+    from trade_pro.strategy import get_module_class
+    from trade_pro.strategy.robustness import METHODS
+    from trade_pro.strategy.robustness import robustness as run_robustness
+    from trade_pro.strategy.utils import load_strategy_config
+
+    strategy_config = load_strategy_config(config)
+    strategy_config.pop("optimization", None)
+    run_robustness(
+        get_module_class(name),
+        strategy_config,
+        config,
+        simulations=simulations,
+        methods=method or METHODS,
+        block=block,
+        scale=cost_scale,
+        confidence=confidence,
+        seed=seed,
+    )
+
+
+@cli.command()
+@click.option("--name", required=True)
+@click.option("--config", required=True)
+@click.option("--start", required=True, help="Replay start (e.g., 2024-01-01)")
+@click.option("--end", help="Replay end, the last stored candle by default")
+@click.option("--tick", help="Also step between candle closes (e.g., 15min) on partial candles")
+def replay(name: str, config: str, start: str, end: str | None, tick: str | None):
+    """Replay stored history through the live engine and diff its trades with a backtest"""
+    import pandas as pd
+
+    from trade_pro.strategy import get_module_class
+    from trade_pro.strategy.replay import replay as run_replay
+    from trade_pro.strategy.utils import load_strategy_config
+
+    strategy_config = load_strategy_config(config)
+    strategy_config.pop("optimization", None)
+    report = run_replay(
+        get_module_class(name),
+        strategy_config,
+        config,
+        pd.Timestamp(start),
+        pd.Timestamp(end) if end else None,
+        tick=pd.Timedelta(tick) if tick else None,
+    )
+    if report["different_trades"]:
+        sys.exit(1)
 
 
 @cli.command()
-@click.option("--ticker", required=True, help="Ticker symbol (e.g., BTCUSDT)")
-@click.option("--timeframe", required=True, help="Timeframe (e.g., 1h, 1d)")
+@click.option("--symbol", required=True, help="Ticker symbol (e.g., BTCUSDT)")
+@click.option("--metric", default="total_pnl", show_default=True)
+@click.option("--strategy", help="Strategy class name")
+@click.option("--mode", type=click.Choice(["backtest", "optimization", "walk_forward"]))
+@click.option("--limit", default=10, show_default=True)
+def best_runs(symbol: str, metric: str, strategy: str | None, mode: str | None, limit: int):
+    """Show the saved runs of a symbol with the best metric"""
+    import pandas as pd
+
+    from trade_pro.database import open_database
+
+    with open_database() as database:
+        table = database.best_runs(symbol, metric, strategy=strategy, mode=mode, limit=limit)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        click.echo(table)
+
+
+@cli.command()
+@click.option("--mode", required=True, type=click.Choice(["live", "backtest"]))
+@click.option("--config", required=True, help="Portfolio config listing the strategies")
+def portfolio(mode: str, config: str):
+    """Run many strategies and symbols in one process"""
+    from trade_pro.strategy.portfolio import run_portfolio
+
+    logger.info(f"Running portfolio '{config}' in '{mode}' mode")
+    run_portfolio(mode, config)
+
+
+@cli.command()
+@click.option("--ticker", required=True, multiple=True, help="Ticker symbol (e.g., BTCUSDT)")
+@click.option("--timeframe", required=True, multiple=True, help="Timeframe (e.g., 1h, 1d)")
 @click.option("--start-date", required=True, help="Start date (YYYY-MM-DD)")
 @click.option("--end-date", help="End date (YYYY-MM-DD)")
-def fetch(ticker: str, timeframe: str, start_date: str, end_date: str | None = None):
-    """Fetch market data for a given ticker and timeframe"""
+@click.option("--concurrency", default=4, show_default=True, help="Requests in flight")
+def fetch(
+    ticker: tuple[str, ...],
+    timeframe: tuple[str, ...],
+    start_date: str,
+    end_date: str | None = None,
+    concurrency: int = 4,
+):
+    """Fetch the market data missing for the given tickers and timeframes"""
+    import asyncio
+
+    import pandas as pd
+
+    from trade_pro.strategy.downloader import download
+
     if end_date is None:
         end_date = pd.Timestamp.today()
     logger.info(
-        f"Fetching data for {ticker}, timeframe={timeframe}, from {start_date} to {end_date}"
+        f"Fetching data for {', '.join(ticker)}, timeframes={', '.join(timeframe)}, "
+        f"from {start_date} to {end_date}"
+    )
+    asyncio.run(
+        download(
+            list(ticker),
+            list(timeframe),
+            pd.Timestamp(start_date),
+            pd.Timestamp(end_date),
+            concurrency=concurrency,
+        )
     )
-    fetch_data(ticker, timeframe, pd.Timestamp(start_date), pd.Timestamp(end_date))
+
+
+@cli.command()
+@click.option("--benchmark", is_flag=True, help="Compare load times against the CSV files")
+def migrate(benchmark: bool):
+    """Convert the CSV market data files to the columnar store"""
+    from trade_pro.strategy.store import benchmark_load, migrate_csv
+
+    for store in migrate_csv():
+        if benchmark:
+            timings = ", ".join(
+                f"{name}={value * 1000:.2f}ms" for name, value in benchmark_load(store).items()
+            )
+            logger.info(f"Load time {store.symbol} {store.timeframe}: {timings}")
+
+
+@cli.command()
+@click.option(
+    "--size",
+    multiple=True,
+    type=click.Choice(list(SIZES)),
+    default=DEFAULT_SIZES,
+    show_default=True,
+    help="Number of synthetic bars",
+)
+@click.option("--timeframe", multiple=True, default=("1h",), show_default=True)
+@click.option("--case", multiple=True, type=click.Choice(CASES), default=CASES, show_default=True)
+@click.option("--repeat", default=3, show_default=True, help="Runs per measure")
+@click.option("--output", type=click.Path(path_type=Path), help="Write the results JSON here")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, path_type=Path),
+    help="Results JSON of a previous run to compare against",
+)
+@click.option(
+    "--threshold", default=0.2, show_default=True, help="Slowdown flagged as a regression"
+)
+def bench(
+    size: tuple[str, ...],
+    timeframe: tuple[str, ...],
+    case: tuple[str, ...],
+    repeat: int,
+    output: Path | None,
+    baseline: Path | None,
+    threshold: float,
+):
+    """Benchmark data loading, indicators, backtest, live ticks and CLI startup"""
+    from trade_pro.strategy.bench import compare, run_benchmarks
+
+    report = run_benchmarks(list(size), list(timeframe), list(case), repeat=repeat)
+    if baseline is not None:
+        regressions = compare(
+            report["results"], json.loads(baseline.read_text())["results"], threshold=threshold
+        )
+        report["regressions"] = regressions
+        for r in regressions:
+            logger.warning(
+                f"Regression {r['case']} {r['size']} {r['timeframe']}: "
+                f"{r['seconds']:.4f}s vs {r['baseline_seconds']:.4f}s (x{r['ratio']:.2f})"
+            )
+    click.echo(json.dumps(report, indent=2))
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -2,15 +2,27 @@ import inspect
 from importlib import import_module
 from pathlib import Path
 from pkgutil import iter_modules
-from typing import Type
+from typing import TYPE_CHECKING, Any, Type
 
-from .base import Base
+if TYPE_CHECKING:
+    from .base import Base
 
 CURRENT_DIR = Path(__file__).parent
 STRATEGIES_PATH = CURRENT_DIR.joinpath("strategies")
 
 
-def get_module_class(name: str) -> Type[Base]:
+def __getattr__(name: str) -> Any:
+    # `Base` pulls pandas and numpy, only import it when asked for
+    if name == "Base":
+        from .base import Base
+
+        return Base
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_module_class(name: str) -> Type["Base"]:
+    from .base import Base
+
     available_names = [mod_name for _, mod_name, _ in iter_modules([STRATEGIES_PATH])]
 
     if name not in available_names:
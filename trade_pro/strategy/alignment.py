@@ -0,0 +1,90 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.utils import timeframe_to_timedelta
+
+
+class TimeframeAlignment:
+    """Maps every candle of a base timeframe to the last candle of a higher
+    timeframe closed when the base candle closes, so higher timeframe values
+    gathered through it never look ahead.
+
+    The map is kept between calls of `update`: when the new candle indexes
+    extend (or slide, as the live window does) the previous ones, only the
+    base candles that can be affected by new higher timeframe candles are
+    searched again.
+
+    Args:
+        base_timeframe (str): timeframe of the candles the values are aligned on
+        higher_timeframe (str): timeframe of the aligned values, any duration
+    """
+
+    def __init__(self, base_timeframe: str, higher_timeframe: str):
+        self.base_timeframe = base_timeframe
+        self.higher_timeframe = higher_timeframe
+        self._base_duration = timeframe_to_timedelta(base_timeframe).value
+        self._higher_duration = timeframe_to_timedelta(higher_timeframe).value
+        self._base_close = np.empty(0, dtype=np.int64)
+        self._higher_close = np.empty(0, dtype=np.int64)
+        self.positions = np.empty(0, dtype=np.int64)
+
+    def update(self, base_index: pd.DatetimeIndex, higher_index: pd.DatetimeIndex) -> np.ndarray:
+        """Position in `higher_index` of the candle used by every candle of
+        `base_index`, -1 when no higher timeframe candle is closed yet"""
+        base_close = base_index.asi8 + self._base_duration
+        higher_close = higher_index.asi8 + self._higher_duration
+        known = self._reusable(base_close, higher_close)
+        if known is None:
+            self.positions = np.searchsorted(higher_close, base_close, "right") - 1
+        else:
+            base_offset, higher_offset, base_known, higher_known = known
+            # base candles closing before the first new higher candle keep their position
+            first = min(
+                base_known,
+                int(np.searchsorted(base_close, higher_close[higher_known:][:1], "left").min())
+                if higher_known < len(higher_close)
+                else base_known,
+            )
+            positions = np.empty(len(base_close), dtype=np.int64)
+            positions[:first] = np.maximum(
+                self.positions[base_offset : base_offset + first] - higher_offset, -1
+            )
+            positions[first:] = np.searchsorted(higher_close, base_close[first:], "right") - 1
+            self.positions = positions
+        self._base_close = base_close
+        self._higher_close = higher_close
+        return self.positions
+
+    def gather(self, values: np.ndarray | pd.Series, fill: Any = np.nan) -> np.ndarray:
+        """`values` of the higher timeframe candles aligned on the base candles"""
+        values = np.asarray(values)
+        if len(values) == 0:
+            return np.full(len(self.positions), fill)
+        gathered = values[np.maximum(self.positions, 0)]
+        return np.where(self.positions >= 0, gathered, fill)
+
+    def _reusable(
+        self, base_close: np.ndarray, higher_close: np.ndarray
+    ) -> tuple[int, int, int, int] | None:
+        """Offsets of the new indexes in the previous ones and number of
+        candles of each already known, None when nothing can be reused"""
+        if len(self._base_close) == 0 or len(base_close) == 0 or len(higher_close) == 0:
+            return None
+        base_offset = int(np.searchsorted(self._base_close, base_close[0]))
+        higher_offset = int(np.searchsorted(self._higher_close, higher_close[0]))
+        base_known = len(self._base_close) - base_offset
+        higher_known = len(self._higher_close) - higher_offset
+        if (
+            base_known <= 0
+            or higher_known <= 0
+            or base_known > len(base_close)
+            or higher_known > len(higher_close)
+            or self._base_close[base_offset] != base_close[0]
+            or self._base_close[-1] != base_close[base_known - 1]
+            or self._higher_close[higher_offset] != higher_close[0]
+            or self._higher_close[-1] != higher_close[higher_known - 1]
+        ):
+            return None
+        return base_offset, higher_offset, base_known, higher_known
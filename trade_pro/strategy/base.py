@@ -1,11 +1,28 @@
+import asyncio
 import logging
+import time
 from abc import abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import pandas as pd
 
-from trade_pro.strategy.utils import fetch_candles, get_data, update_data
+from trade_pro.strategy.alignment import TimeframeAlignment
+from trade_pro.strategy.ledger import TradeLedger, equity_metrics, trade_metrics
+from trade_pro.strategy.metrics import (
+    BACKTEST_BARS,
+    BACKTEST_BARS_PER_SECOND,
+    BACKTEST_SECONDS,
+    BAR_SECONDS,
+    INDICATOR_SECONDS,
+    ORDERS,
+)
+from trade_pro.strategy.result_cache import result_cache
+from trade_pro.strategy.stops import first_touch
+from trade_pro.strategy.utils import candle_store, get_data, timeframe_to_timedelta
+
+if TYPE_CHECKING:
+    from trade_pro.telegram.notifier import Notifier
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +48,11 @@ class Base:
         slippage: float = 0.0005,
         start_backtest_index: int = 0,
         start_live_index: int = -1,
+        vectorized: bool = True,
+        stop_loss: float | None = None,
+        take_profit: float | None = None,
+        trailing_stop: float | None = None,
+        intrabar_timeframe: str | None = None,
     ):
         self.symbol = symbol
         self.initial_balance = initial_balance
@@ -40,12 +62,35 @@ class Base:
         self.slippage = slippage
         self.start_backtest_index = start_backtest_index
         self.start_live_index = start_live_index
+        self.vectorized = vectorized
+        # protective exits as fractions of the entry close (of the highest
+        # price since the entry for the trailing stop), filled in backtests on
+        # the `intrabar_timeframe` candles, the main ones by default
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.trailing_stop = trailing_stop
+        self.intrabar_timeframe = intrabar_timeframe or timeframes[0]
+        self.stops = any(level is not None for level in (stop_loss, take_profit, trailing_stop))
+        if timeframe_to_timedelta(self.intrabar_timeframe) > timeframe_to_timedelta(timeframes[0]):
+            raise Exception(
+                f"Intrabar timeframe {self.intrabar_timeframe} is longer than {timeframes[0]}"
+            )
 
         self.balance = self.initial_balance
         self.peak_balance = self.initial_balance
         self.max_drawdown = 0
-        self.trades = []
+        self.trades = TradeLedger()
+        # mark-to-market balance at every bar of the last simulated data
+        self.equity = pd.Series(dtype=float)
         self.mode = None
+        # entry price, entry time and units of the open position
+        self.entry = (0, pd.NaT, 0)
+        # highest price since the entry, followed by the trailing stop
+        self.peak_price = 0.0
+        # candle maps of the higher timeframes on the main one, kept between calls
+        self.alignments: dict[str, TimeframeAlignment] = {}
+        # Telegram notifications queue, set by the live engine
+        self.notifier: "Notifier | None" = None
 
     @abstractmethod
     def compute_indicators(self, data: dict[str, pd.DataFrame]) -> pd.DataFrame:
@@ -91,136 +136,483 @@ class Base:
         """
         pass
 
-    def run(self, mode: str) -> None:
-        histo_data = {timeframe: get_data(self.symbol, timeframe) for timeframe in self.timeframes}
-        data = self.compute_indicators(histo_data)
+    def compute_signals(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray] | None:
+        """Whole-array entry and exit signals used by the vectorized backtest
+
+        Signals must not depend on the position state, the engine resolves it.
+        Strategies that do not override this method fall back to the per-bar
+        `entry_condition` / `exit_condition` loop.
+
+        Args:
+            df (pd.DataFrame): indicators returned by `compute_indicators`
+
+        Returns:
+            tuple[np.ndarray, np.ndarray] | None: boolean entry and exit arrays
+            aligned with `df`, or None when not supported
+        """
+        return None
+
+    def compute_signals_batch(
+        self, data: dict[str, pd.DataFrame], params: list[dict[str, Any]]
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """Entry and exit signals of many parameter sets at once, used by the
+        batched optimization. Parameters missing from a set keep the value of
+        this instance. Strategies that do not override this method are
+        optimized one parameter set at a time.
+
+        Args:
+            data (dict[str, pd.DataFrame]): candles per timeframe
+            params (list[dict[str, Any]]): parameter sets
+
+        Returns:
+            tuple[np.ndarray, np.ndarray] | None: boolean entry and exit arrays
+            of shape (parameter sets, bars of the main timeframe), or None when
+            not supported
+        """
+        return None
+
+    def warm_up(self, histo_data: dict[str, pd.DataFrame]) -> bool:
+        """Build the incremental indicator state used in live mode from closed
+        historical candles
+
+        Args:
+            histo_data (dict[str, pd.DataFrame]): closed candles per timeframe
+
+        Returns:
+            bool: False when the strategy only supports `compute_indicators`
+        """
+        return False
+
+    def update_indicators(
+        self, timeframe: str, timestamp: pd.Timestamp, candle: dict[str, float]
+    ) -> None:
+        """Feed a newly closed candle to the incremental indicator state, only
+        called when `warm_up` returned True
+
+        Args:
+            timeframe (str): timeframe of the candle
+            timestamp (pd.Timestamp): candle open time
+            candle (dict[str, float]): open, high, low, close and volume
+        """
+
+    def indicator_window(self) -> pd.DataFrame | None:
+        """Latest indicator rows of the main timeframe, enough for
+        `entry_condition` / `exit_condition` with `index=-1`, or None when
+        `warm_up` is not supported"""
+        return None
+
+    def lookback(self) -> dict[str, int]:
+        """Candles per timeframe needed by `compute_indicators` for its latest
+        row, sizes the market data window kept in live mode"""
+        return {}
+
+    def align(
+        self,
+        data: dict[str, pd.DataFrame],
+        timeframe: str,
+        values: np.ndarray | pd.Series,
+        *,
+        fill: Any = np.nan,
+    ) -> np.ndarray:
+        """`values` of the `timeframe` candles aligned on the main timeframe
+        candles, each main candle only sees the last `timeframe` candle closed
+        when it closes (`fill` before the first one)"""
+        main = self.timeframes[0]
+        alignment = self.alignments.get(timeframe)
+        if alignment is None:
+            alignment = self.alignments[timeframe] = TimeframeAlignment(main, timeframe)
+        alignment.update(data[main].index, data[timeframe].index)
+        return alignment.gather(values, fill)
+
+    def load_data(self) -> dict[str, pd.DataFrame]:
+        return {timeframe: get_data(self.symbol, timeframe) for timeframe in self.timeframes}
+
+    def run(
+        self,
+        mode: str,
+        config: dict[str, Any] | None = None,
+        *,
+        chunk_size: int | None = None,
+        float32: bool = False,
+    ) -> None:
+        """Run the strategy in `mode`, a backtest of a strategy built from
+        `config` is read from the result cache when nothing changed. With
+        `chunk_size`, the backtest reads the history by chunks (see
+        `simulate_chunked`) and bypasses the cache, which hashes it whole."""
         self.mode = mode
-        if self.mode == "backtest":
+        if self.mode == "backtest" and chunk_size:
+            self.simulate_chunked(chunk_size, float32=float32)
+            if len(self.trades) > 0:
+                self.resume_backtest(self.trades, self.equity)
+        elif self.mode == "backtest":
+            data = self.load_data()
+            key = None
+            if config is not None and result_cache.enabled:
+                key = result_cache.backtest_key(type(self), config, data)
+                cached = result_cache.load_backtest(key)
+                if cached is not None:
+                    logger.info("Backtest result read from cache entry %s", key)
+                    self.trades, self.equity = cached
+                    if len(self.trades) > 0:
+                        self.resume_backtest(self.trades, self.equity)
+                    return
+            with INDICATOR_SECONDS.time(type(self).__name__, self.mode):
+                data = self.compute_indicators(data)
             self.backtest(data)
+            if key is not None:
+                result_cache.save_backtest(key, self.trades, self.equity)
+                result_cache.evict()
         elif self.mode == "live":
-            self.live(data, histo_data)
+            self.live()
+        else:
+            raise Exception(f"Mode {mode} not supported by {type(self).__name__}.run")
 
-    def live(self, data: pd.DataFrame, histo_data: dict[str, pd.DataFrame]) -> None:
+    def live(self) -> None:
         """run trading strategy"""
-        entry_price = 0
-        entry_time = pd.NaT
-        units = 0
-        while True:
-            new_dfs = {
-                timeframe: update_data(
-                    histo_data[timeframe], fetch_candles(self.symbol, timeframe, 50)
-                )
-                for timeframe in self.timeframes
-            }
-            data = self.compute_indicators(new_dfs)
-
-            row = data.iloc[self.start_live_index]
-            if self.entry_condition(data, index=self.start_live_index):
-                entry_price, entry_time, units = self.execute_entry(row)
-            elif self.exit_condition(data, index=self.start_live_index):
-                self.execute_exit(row, entry_price, entry_time, units)
-            # wait_for_next_candle(self.main_timeframe)
+        # the history is only needed to warm up, the runner keeps a bounded window
+        from trade_pro.strategy.live import LiveRunner
+        from trade_pro.telegram.commands import telegram_commands
+        from trade_pro.telegram.notifier import telegram_notifier
+
+        if self.stops:
+            logger.warning("Stop loss and take profit are only simulated in backtests")
+        runner = LiveRunner(
+            self, self.load_data(), notifier=telegram_notifier(), commands=telegram_commands()
+        )
+        asyncio.run(runner.run())
+
+    def notify(self, msg: str) -> None:
+        """Log `msg` and queue it for Telegram, never waits for the send"""
+        logger.info(msg)
+        if self.notifier is not None:
+            self.notifier.notify(msg)
+
+    def on_bar(self, df: pd.DataFrame, index: int = -1) -> None:
+        """Enter or exit the market on the closed candle `index` of `df`"""
+        with BAR_SECONDS.time(type(self).__name__, self.mode):
+            row = df.iloc[index]
+            if self.entry_condition(df, index=index):
+                self.entry = self.execute_entry(row)
+            elif self.exit_condition(df, index=index):
+                self.execute_exit(row, *self.entry)
 
     def backtest(self, data: pd.DataFrame) -> None:
         """run back testing strategy"""
-        entry_price = 0
-        entry_time = pd.NaT
-        units = 0
-        for i in range(self.start_backtest_index, len(data)):
-            row = data.iloc[i]
-            if self.entry_condition(data, index=i):
-                entry_price, entry_time, units = self.execute_entry(row)
-            elif self.exit_condition(data, index=i):
-                self.execute_exit(row, entry_price, entry_time, units)
+        self.simulate(data)
 
         if len(self.trades) > 0:
-            self.resume_backtest(self.trades)
+            self.resume_backtest(self.trades, self.equity)
         # self.generate_chart(close_prices, close_times)
 
+    def simulate(self, data: pd.DataFrame) -> None:
+        """fill `self.trades` and `self.equity` over `data` with the vectorized
+        engine when available"""
+        start = time.perf_counter()
+        equity = self.simulate_frame(data, self.start_backtest_index)
+        self.equity = pd.Series(equity, index=data.index, name="equity")
+        self.record_simulation(len(data), time.perf_counter() - start)
+
+    def simulate_chunked(self, chunk_size: int, *, float32: bool = False) -> None:
+        """`simulate` over the whole history read `chunk_size` main candles at a
+        time, so memory is bounded by the chunk size rather than the history
+
+        Every chunk is loaded with the indicator warm-up of each timeframe
+        before it (the live window of `lookback`), the position, balance and
+        ledger are carried from one chunk to the next and only the equity curve
+        is kept in full, as float32 with `float32` (the chunks are transient and
+        the indicators are computed in float64, narrowing them does not lower
+        the peak). The candles are read by ranges from their columnar stores,
+        CSV files have to be migrated first.
+        """
+        from trade_pro.strategy.live import DEFAULT_CAPACITY, LOOKBACK_FACTOR
+
+        begin_time = time.perf_counter()
+        main = self.timeframes[0]
+        timeframes = set(self.timeframes) | ({self.intrabar_timeframe} if self.stops else set())
+        stores = {timeframe: candle_store(self.symbol, timeframe) for timeframe in timeframes}
+        timestamps = stores[main].columns()["timestamp"]
+        index = pd.DatetimeIndex(timestamps.view("datetime64[ns]"), name="timestamp")
+        lookback = self.lookback()
+        overlap = {
+            timeframe: LOOKBACK_FACTOR * lookback[timeframe]
+            if timeframe in lookback
+            else DEFAULT_CAPACITY
+            for timeframe in self.timeframes
+        }
+        curves = []
+        for first in range(0, len(index), chunk_size):
+            last = min(first + chunk_size, len(index))
+            begin = max(first - overlap[main], 0)
+            end = index[last - 1]
+            data = {main: stores[main].read(index[begin], end)}
+            for timeframe in self.timeframes[1:]:
+                warm_up = overlap[timeframe] * timeframe_to_timedelta(timeframe)
+                data[timeframe] = stores[timeframe].read(index[first] - warm_up, end)
+            frame = self.compute_indicators(data)
+            start = max(self.start_backtest_index - begin, first - begin)
+            equity = self.simulate_frame(frame, start)[first - begin :]
+            curves.append(equity.astype(np.float32) if float32 else equity)
+            del data, frame
+        equity = np.concatenate(curves) if curves else np.empty(0)
+        self.equity = pd.Series(equity, index=index, name="equity")
+        self.record_simulation(len(index), time.perf_counter() - begin_time)
+
+    def simulate_frame(self, data: pd.DataFrame, start: int) -> np.ndarray:
+        """Trade the bars of `data` from `start` on, returns their mark-to-market
+        balance"""
+        signals = self.compute_signals(data) if self.vectorized else None
+        if signals is None:
+            self.backtest_loop(data, start)
+        else:
+            self.backtest_vectorized(data, *signals, start=start)
+        return self.mark_to_market(data)
+
+    def record_simulation(self, bars: int, elapsed: float) -> None:
+        name = type(self).__name__
+        BACKTEST_SECONDS.observe(elapsed, name)
+        BACKTEST_BARS.inc(name, amount=bars)
+        BACKTEST_BARS_PER_SECOND.set(bars / elapsed if elapsed > 0 else 0.0, name)
+
+    def backtest_loop(self, data: pd.DataFrame, start: int | None = None) -> None:
+        """run back testing strategy bar by bar through the entry/exit conditions"""
+        start = self.start_backtest_index if start is None else start
+        candles = self.intrabar_candles(data) if self.stops else None
+        times = data.index.asi8
+        duration = timeframe_to_timedelta(self.timeframes[0]).value
+        for i in range(start, len(data)):
+            if candles is not None and self.position:
+                # the candles since the previous close
+                begin = times[i - 1] + duration if i > 0 else times[i]
+                self.protect(candles, begin, times[i] + duration)
+            self.on_bar(data, i)
+
+    def backtest_vectorized(
+        self,
+        data: pd.DataFrame,
+        entries: np.ndarray,
+        exits: np.ndarray,
+        start: int | None = None,
+    ) -> None:
+        """run back testing strategy over precomputed entry/exit signal arrays
+
+        Only the bars flagged by a signal are visited, the position state is
+        resolved in a single pass with the same rules as the per-bar loop: an
+        entry is taken when flat, otherwise an exit is taken when in position.
+        With protective exits, the intrabar candles up to the next exit signal
+        are searched once per position and the signals resume from the bar of
+        the fill.
+        """
+        closes = data["close"].to_numpy(dtype=np.float64)
+        times = data.index
+        entries = np.asarray(entries, dtype=bool)
+        exits = np.asarray(exits, dtype=bool)
+        start = self.start_backtest_index if start is None else start
+        events = np.flatnonzero(entries | exits)
+        events = events[events >= start]
+        candles = self.intrabar_candles(data) if self.stops else None
+
+        k = 0
+        if candles is not None and self.position and start < len(data):
+            # position carried from a previous chunk
+            filled = self.protect_until_exit(data, exits, candles, start - 1)
+            if filled is not None:
+                k = int(np.searchsorted(events, filled))
+        while k < len(events):
+            i = events[k]
+            k += 1
+            if not self.position and entries[i]:
+                self.entry = self.open_position(closes[i], times[i])
+                if candles is not None:
+                    filled = self.protect_until_exit(data, exits, candles, i)
+                    if filled is not None:
+                        k = int(np.searchsorted(events, filled))
+            elif self.position and exits[i]:
+                self.close_position(closes[i], times[i], *self.entry)
+
+    def intrabar_candles(self, data: pd.DataFrame) -> tuple[np.ndarray, ...]:
+        """Open times, opens, highs and lows of the `intrabar_timeframe`
+        candles within the main candles of `data`"""
+        main = self.timeframes[0]
+        candles = data
+        if self.intrabar_timeframe != main and len(data) > 0:
+            end = data.index[-1] + timeframe_to_timedelta(main)
+            candles = get_data(self.symbol, self.intrabar_timeframe, data.index[0], end)
+            candles = candles[candles.index < end]
+        prices = (candles[column].to_numpy(dtype=np.float64) for column in ("open", "high", "low"))
+        return (candles.index.asi8, *prices)
+
+    def protect(self, candles: tuple[np.ndarray, ...], begin: int, end: int) -> int | None:
+        """Close the open position at the first intrabar candle opened between
+        the `begin` and `end` timestamps reaching a protective exit, returns
+        the open time of that candle or None"""
+        times, opens, highs, lows = candles
+        first, last = np.searchsorted(times, [begin, end])
+        entry_price, entry_time, units = self.entry
+        at, fill, self.peak_price = first_touch(
+            opens[first:last],
+            highs[first:last],
+            lows[first:last],
+            entry_price / (1 + self.slippage + self.commission),
+            stop_loss=self.stop_loss,
+            take_profit=self.take_profit,
+            trailing_stop=self.trailing_stop,
+            peak=self.peak_price,
+        )
+        if at == last - first:
+            return None
+        exit_time = times[first + at]
+        self.close_position(fill, pd.Timestamp(exit_time, tz=entry_time.tz), *self.entry)
+        return exit_time
+
+    def protect_until_exit(
+        self, data: pd.DataFrame, exits: np.ndarray, candles: tuple[np.ndarray, ...], bar: int
+    ) -> int | None:
+        """`protect` the position held after the close of `bar` until the next
+        exit signal, returns the main bar of the fill or None"""
+        times = data.index.asi8
+        duration = timeframe_to_timedelta(self.timeframes[0]).value
+        following = np.flatnonzero(exits[bar + 1 :])
+        last = bar + 1 + following[0] if len(following) else len(times) - 1
+        begin = times[bar] + duration if bar >= 0 else times[0]
+        exit_time = self.protect(candles, begin, times[last] + duration)
+        if exit_time is None:
+            return None
+        return int(np.searchsorted(times, exit_time, "right")) - 1
+
+    def mark_to_market(self, data: pd.DataFrame) -> np.ndarray:
+        """Balance at every bar of `data`, open positions valued at the close
+        net of the exit costs, rebuilt from the ledger without a bar loop"""
+        closes = data["close"].to_numpy(dtype=np.float64)
+        times = data.index.asi8
+        records = self.trades.records
+        n = len(closes)
+        entry_times = records["entry_time"]
+        units = records["old_balance"] / records["entry_price"]
+        # protective exits fill within a bar, the bar is flat from its close
+        exits = np.searchsorted(times, records["exit_time"], "right") - 1
+        balances = np.concatenate([[self.initial_balance], records["new_balance"]])
+        if self.position:
+            entry_price, entry_time, open_units = self.entry
+            entry_times = np.append(entry_times, pd.Timestamp(entry_time).value)
+            units = np.append(units, open_units)
+        entries = np.searchsorted(times, entry_times)
+
+        bars = np.arange(n)
+        closed = np.searchsorted(exits, bars, "right")
+        opened = np.searchsorted(entries, bars, "right")
+        held = opened > closed
+        trade = np.maximum(opened - 1, 0)
+        flat = balances[np.minimum(closed, len(balances) - 1)]
+        if len(units) == 0:
+            return flat
+        value = units[trade] * closes * (1 - self.slippage - self.commission)
+        return np.where(held, value, flat)
+
     def execute_entry(
         self,
         row: pd.Series,
     ) -> tuple[float, pd.Timestamp, float]:
-        entry_price = row["close"] * (1 + self.slippage + self.commission)
+        return self.open_position(row["close"], row.name)
+
+    def execute_exit(
+        self,
+        row: pd.Series,
+        entry_price: float,
+        entry_time: pd.Timestamp,
+        units: float,
+    ) -> None:
+        self.close_position(row["close"], row.name, entry_price, entry_time, units)
+
+    def open_position(
+        self,
+        close: float,
+        entry_time: pd.Timestamp,
+    ) -> tuple[float, pd.Timestamp, float]:
+        entry_price = close * (1 + self.slippage + self.commission)
         units = self.balance / entry_price
         self.position = True
-        entry_time = row.name
+        self.peak_price = close
+        ORDERS.inc(type(self).__name__, "buy")
         msg = f"📈 [ENTRY] {self.symbol} {entry_time} @ {entry_price:.2f}"
         if self.mode == "backtest":
             logger.info(msg)
         if self.mode == "live":
-            self.bot.send_telegram_message(msg)
+            self.notify(msg)
         return entry_price, entry_time, units
 
-    def execute_exit(
+    def close_position(
         self,
-        row: pd.Series,
+        close: float,
+        exit_time: pd.Timestamp,
         entry_price: float,
         entry_time: pd.Timestamp,
         units: float,
     ) -> None:
-        exit_price = row["close"] * (1 - self.slippage - self.commission)
+        exit_price = close * (1 - self.slippage - self.commission)
         pnl = (exit_price - entry_price) * units
-        exit_time = row.name
         return_pct = pnl / (units * entry_price) * 100
         self.trades.append(
-            {
-                "entry_time": entry_time,
-                "exit_time": exit_time,
-                "entry_price": entry_price,
-                "exit_price": exit_price,
-                "pnl": pnl,
-                "return_pct": return_pct,
-                "old_balance": self.balance,
-                "new_balance": self.balance + pnl,
-            }
+            entry_time,
+            exit_time,
+            entry_price,
+            exit_price,
+            pnl,
+            return_pct,
+            self.balance,
+            self.balance + pnl,
         )
         self.balance += pnl
         self.peak_balance = max(self.peak_balance, self.balance)
         drawdown = (self.peak_balance - self.balance) / self.peak_balance
         self.max_drawdown = max(self.max_drawdown, drawdown)
         self.position = False
+        ORDERS.inc(type(self).__name__, "sell")
         msg = (
             f"📉 [LONG EXIT] {self.symbol} Time: {exit_time} Price: ${exit_price:.2f}."
             f"PnL: ${pnl:.2f} | Return: {return_pct:.2f}%"
         )
         if self.mode == "backtest":
             logger.info(msg)
-        if self.mode == "run":
-            self.bot.send_telegram_message(msg)
+        if self.mode == "live":
+            self.notify(msg)
 
-    def resume_backtest(self, trades: list[dict[str, Any]]):
-        trade_df = pd.DataFrame(trades)
+    def backtest_stats(
+        self, trades: TradeLedger, equity: pd.Series | None = None
+    ) -> dict[str, float]:
+        """Performance metrics of the closed trades, plus the bar level drawdown
+        and Sharpe ratio when the mark-to-market `equity` is given"""
+        stats = trade_metrics(trades.records, self.initial_balance)
+        if equity is not None:
+            stats.update(equity_metrics(equity.to_numpy(), equity.index.asi8))
+        return stats
+
+    def resume_backtest(
+        self, trades: TradeLedger, equity: pd.Series | None = None
+    ) -> dict[str, float]:
+        trade_df = trades.to_frame()
         logger.info("\nTrade Summary:")
         logger.info(trade_df)
 
         # Performance Metrics
-        returns = [t["return_pct"] for t in trades]
-        wins = trade_df[trade_df["pnl"] > 0]
-        losses = trade_df[trade_df["pnl"] <= 0]
-        total_wins = wins["pnl"].sum()
-        total_losses = abs(losses["pnl"].sum())
-        value_weighted_win_rate = (
-            total_wins / (total_wins + total_losses) * 100 if (total_wins + total_losses) > 0 else 0
-        )
-        win_rate = len(wins) / len(trade_df) * 100
-        profit_factor = total_wins / total_losses if total_losses != 0 else float("inf")
-        max_drawdown = (trade_df["pnl"].cumsum().cummax() - trade_df["pnl"].cumsum()).max()
-        total_pnl = trade_df["pnl"].sum()
-        sharpe_like = float("nan")
-        if len(returns) > 0:
-            sharpe_like = np.mean(returns) / (np.std(returns) + 1e-9)  # avoid div by zero
+        stats = self.backtest_stats(trades, equity)
 
         logger.info("\nStats:")
-        logger.info(f"Total Trades: {len(trade_df)}")
-        logger.info(f"Win Trades: {len(wins)}")
-        logger.info(f"Lose Trades: {len(losses)}")
-        logger.info(f"Max win: ${wins['pnl'].max():.2f}")
-        logger.info(f"Max lose: ${losses['pnl'].min():.2f}")
-        logger.info(f"Win Rate (Count-Based): {win_rate:.2f}%")
-        logger.info(f"Win Rate (PnL-Weighted): {value_weighted_win_rate:.2f}%")
-        logger.info(f"Profit Factor: {profit_factor:.2f}")
-        logger.info(f"Sharpe-like Ratio (return_pct/std): {sharpe_like:.2f}")
-        logger.info(f"Max Drawdown: ${max_drawdown:.2f}")
-        logger.info(f"Total PnL: ${total_pnl:.2f}")
-        logger.info(f"Final Balance: ${(total_pnl + self.initial_balance):.2f}")
+        logger.info(f"Total Trades: {stats['total_trades']}")
+        logger.info(f"Win Trades: {stats['win_trades']}")
+        logger.info(f"Lose Trades: {stats['lose_trades']}")
+        logger.info(f"Max win: ${stats['max_win']:.2f}")
+        logger.info(f"Max lose: ${stats['max_lose']:.2f}")
+        logger.info(f"Win Rate (Count-Based): {stats['win_rate']:.2f}%")
+        logger.info(f"Win Rate (PnL-Weighted): {stats['pnl_weighted_win_rate']:.2f}%")
+        logger.info(f"Profit Factor: {stats['profit_factor']:.2f}")
+        logger.info(f"Sharpe-like Ratio (return_pct/std): {stats['sharpe_like']:.2f}")
+        logger.info(f"Max Drawdown: ${stats['max_drawdown']:.2f}")
+        if equity is not None:
+            logger.info(
+                f"Max Drawdown (bar level): ${stats['max_drawdown_bar']:.2f} "
+                f"({stats['max_drawdown_bar_pct']:.2f}%)"
+            )
+            logger.info(f"Sharpe Ratio (annualized, per bar): {stats['sharpe']:.2f}")
+        logger.info(f"Total PnL: ${stats['total_pnl']:.2f}")
+        logger.info(f"Final Balance: ${stats['final_balance']:.2f}")
+        return stats
@@ -0,0 +1,192 @@
+from typing import Any, Type
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.base import Base
+
+# statistics of `Base.backtest_stats` available without the per-bar equity curve
+BATCH_METRICS = (
+    "total_trades",
+    "win_trades",
+    "lose_trades",
+    "max_win",
+    "max_lose",
+    "win_rate",
+    "pnl_weighted_win_rate",
+    "profit_factor",
+    "sharpe_like",
+    "max_drawdown",
+    "total_pnl",
+    "final_balance",
+)
+# engine settings `resolve_batch` takes from the base config, sweeping them
+# needs the single backtests
+ENGINE_PARAMETERS = ("initial_balance", "commission", "slippage", "start_backtest_index")
+# bytes of parameter sets x bars signals alive at once while resolving a batch
+MEMORY_BUDGET = 256 * 2**20
+
+
+def supports_batch(cls: Type[Base]) -> bool:
+    """Whether `cls` overrides `compute_signals_batch`, whose base version
+    returns None"""
+    return cls.compute_signals_batch is not Base.compute_signals_batch
+
+
+def batch_size(bars: int) -> int:
+    """Parameter sets evaluated together on `bars` candles within `MEMORY_BUDGET`"""
+    # boolean entries and exits plus the rows being stacked
+    return max(1, MEMORY_BUDGET // (max(bars, 1) * 4))
+
+
+def following_events(events: np.ndarray, rows: np.ndarray, bars: np.ndarray, n: int) -> np.ndarray:
+    """First event at or after `bars` in each of `rows`, `n` when there is none
+
+    `events` are the flat indices (`row * n + bar`) of a `(rows, n)` boolean
+    array as returned by `np.flatnonzero`, so sorted.
+    """
+    if len(events) == 0:
+        return np.full(len(rows), n)
+    position = np.searchsorted(events, rows * n + bars)
+    found = events[np.minimum(position, len(events) - 1)]
+    valid = (position < len(events)) & (found < (rows + 1) * n)
+    return np.where(valid, found - rows * n, n)
+
+
+def resolve_batch(
+    closes: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    *,
+    start: int = 0,
+    initial_balance: float,
+    commission: float,
+    slippage: float,
+) -> dict[str, np.ndarray]:
+    """Trades and statistics of every parameter set of 2D entry and exit signals
+
+    Applies the rules of `Base.backtest_vectorized` to all the parameter sets
+    at once: each iteration takes the next trade of every set still trading,
+    the next entry after its last exit and the next exit after that entry,
+    found by binary search in the flat signal indices, and updates the running
+    statistics. The work depends on the number of trades, not of bars.
+
+    Args:
+        closes (np.ndarray): close prices of the bars
+        entries (np.ndarray): boolean entry signals, parameter sets x bars
+        exits (np.ndarray): boolean exit signals, parameter sets x bars
+        start (int, optional): first bar traded. Defaults to 0.
+        initial_balance (float): balance of every parameter set
+        commission (float): commission rate per side
+        slippage (float): slippage rate per side
+
+    Returns:
+        dict[str, np.ndarray]: `BATCH_METRICS` per parameter set
+    """
+    count, n = entries.shape
+    entry_events = np.flatnonzero(entries)
+    exit_events = np.flatnonzero(exits)
+    entry_cost = 1 + slippage + commission
+    exit_cost = 1 - slippage - commission
+
+    balance = np.full(count, float(initial_balance))
+    trades = np.zeros(count, dtype=np.int64)
+    wins = np.zeros(count, dtype=np.int64)
+    total_wins = np.zeros(count)
+    total_losses = np.zeros(count)
+    max_win = np.full(count, -np.inf)
+    max_lose = np.full(count, np.inf)
+    mean_return = np.zeros(count)
+    m2_return = np.zeros(count)
+    cumulative = np.zeros(count)
+    peak = np.full(count, -np.inf)
+    max_drawdown = np.zeros(count)
+
+    sets = np.arange(count)
+    cursor = np.full(count, min(start, n))
+    while len(sets):
+        entry_bar = following_events(entry_events, sets, cursor[sets], n)
+        exit_bar = following_events(exit_events, sets, np.minimum(entry_bar + 1, n), n)
+        closed = exit_bar < n
+        sets, entry_bar, exit_bar = sets[closed], entry_bar[closed], exit_bar[closed]
+
+        entry_price = closes[entry_bar] * entry_cost
+        units = balance[sets] / entry_price
+        pnl = (closes[exit_bar] * exit_cost - entry_price) * units
+        returns = pnl / (units * entry_price) * 100
+        balance[sets] += pnl
+
+        trades[sets] += 1
+        won = pnl > 0
+        wins[sets] += won
+        total_wins[sets] += np.where(won, pnl, 0)
+        total_losses[sets] += np.where(won, 0, pnl)
+        max_win[sets] = np.maximum(max_win[sets], np.where(won, pnl, -np.inf))
+        max_lose[sets] = np.minimum(max_lose[sets], np.where(won, np.inf, pnl))
+        delta = returns - mean_return[sets]
+        mean_return[sets] += delta / trades[sets]
+        m2_return[sets] += delta * (returns - mean_return[sets])
+        cumulative[sets] += pnl
+        peak[sets] = np.maximum(peak[sets], cumulative[sets])
+        max_drawdown[sets] = np.maximum(max_drawdown[sets], peak[sets] - cumulative[sets])
+        cursor[sets] = exit_bar + 1
+
+    traded = trades > 0
+    losses = np.abs(total_losses)
+    gross = total_wins + losses
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "total_trades": trades,
+            "win_trades": wins,
+            "lose_trades": trades - wins,
+            "max_win": np.where(np.isfinite(max_win), max_win, np.nan),
+            "max_lose": np.where(np.isfinite(max_lose), max_lose, np.nan),
+            "win_rate": np.where(traded, wins / np.maximum(trades, 1) * 100, 0),
+            "pnl_weighted_win_rate": np.where(gross > 0, total_wins / gross * 100, 0),
+            "profit_factor": np.where(losses != 0, total_wins / losses, np.inf),
+            "sharpe_like": np.where(
+                traded, mean_return / (np.sqrt(m2_return / np.maximum(trades, 1)) + 1e-9), np.nan
+            ),
+            "max_drawdown": np.where(traded, max_drawdown, np.nan),
+            "total_pnl": cumulative,
+            "final_balance": cumulative + initial_balance,
+        }
+
+
+def evaluate_batch(
+    cls: Type[Base],
+    config: dict[str, Any],
+    histo_data: dict[str, pd.DataFrame],
+    params_list: list[dict[str, Any]],
+    end: pd.Timestamp | None = None,
+) -> list[dict[str, Any]]:
+    """Backtest many parameter sets of a strategy supporting
+    `compute_signals_batch` and return their parameters and statistics"""
+    strategy = cls(**config)
+    data = {
+        timeframe: (df if end is None else df.loc[:end]).copy(deep=False)
+        for timeframe, df in histo_data.items()
+    }
+    closes = data[strategy.timeframes[0]]["close"].to_numpy(dtype=np.float64)
+    size = batch_size(len(closes))
+    results = []
+    for first in range(0, len(params_list), size):
+        chunk = params_list[first : first + size]
+        signals = strategy.compute_signals_batch(data, chunk)
+        if signals is None:
+            raise Exception(f"{cls.__name__} does not compute batched signals")
+        entries, exits = signals
+        stats = resolve_batch(
+            closes,
+            entries,
+            exits,
+            start=strategy.start_backtest_index,
+            initial_balance=strategy.initial_balance,
+            commission=strategy.commission,
+            slippage=strategy.slippage,
+        )
+        results += [
+            {**params, **{name: values[i].item() for name, values in stats.items()}}
+            for i, params in enumerate(chunk)
+        ]
+    return results
@@ -0,0 +1,371 @@
+import asyncio
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.config import ROOT
+from trade_pro.strategy.bench_cases import SIZES
+from trade_pro.strategy.fake_exchange import FakeExchange
+from trade_pro.strategy.indicators import indicator_cache
+from trade_pro.strategy.ledger import benchmark_ledger
+from trade_pro.strategy.live import LiveRunner, SimulatedClock
+from trade_pro.strategy.resample import aggregate_ohlcv
+from trade_pro.strategy.stops import benchmark_first_touch
+from trade_pro.strategy.store import ColumnStore
+from trade_pro.strategy.strategies.mas_strategy import MASStrategy
+from trade_pro.strategy.utils import (
+    load_strategy_config,
+    read_csv,
+    timeframe_to_timedelta,
+    update_data,
+)
+
+logger = logging.getLogger(__name__)
+
+SYMBOL = "SYNTH"
+START = pd.Timestamp("2017-01-01")
+# above these sizes the case takes minutes and is skipped
+CSV_MAX_BARS = 1_000_000
+LOOP_MAX_BARS = 20_000
+LIVE_MAX_BARS = 1_000_000
+LEDGER_MAX_TRADES = 1_000_000
+STOPS_MAX_BARS = 10_000_000
+# interpreter arguments of the startup case: CLI help, a command help and
+# what a spawned optimization worker imports
+STARTUP_COMMANDS = {
+    "cli_help": ["-m", "trade_pro.main", "--help"],
+    "fetch_help": ["-m", "trade_pro.main", "fetch", "--help"],
+    "worker_import": ["-c", "import trade_pro.strategy.optimization"],
+}
+# slow imports only the commands using them should pay for
+HEAVY_MODULES = ("numpy", "pandas", "pandas_ta", "ccxt", "telegram", "apischema")
+
+
+def synthetic_ohlcv(
+    n: int, timeframe: str = "1h", *, start: pd.Timestamp = START, seed: int = 0
+) -> pd.DataFrame:
+    """`n` candles of a geometric random walk, reproducible for a given `seed`"""
+    duration = timeframe_to_timedelta(timeframe)
+    if duration.value * (n + 1) > pd.Timestamp.max.value - start.value:
+        raise ValueError(f"{n} candles of {timeframe} do not fit in the timestamp range")
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.003, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.003, n)))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": rng.lognormal(3, 1, n),
+        },
+        index=pd.date_range(start, periods=n, freq=duration, name="timestamp"),
+    )
+
+
+def bench_strategy() -> MASStrategy:
+    """MAS strategy with the BTCUSDT parameters on the synthetic symbol"""
+    config = load_strategy_config("mas_strategy_btcusdt")
+    config.pop("optimization", None)
+    return MASStrategy(**{**config, "symbol": SYMBOL})
+
+
+def synthetic_history(n: int, timeframe: str, *, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """Strategy input of `n` synthetic candles of `timeframe`
+
+    The candles are given as the strategy main timeframe whatever their
+    duration, indicators only depend on the number of bars.
+    """
+    main, trend = bench_strategy().timeframes
+    df = synthetic_ohlcv(n, timeframe, seed=seed)
+    return {main: df, trend: aggregate_ohlcv(df, trend)}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> tuple[list[float], Any]:
+    """Wall time of `repeat` calls of `func` and the result of the last one"""
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - begin)
+    return timings, result
+
+
+def record(case: str, n: int, timeframe: str, timings: list[float], **extra: Any) -> dict:
+    seconds = statistics.median(timings)
+    return {
+        "case": case,
+        "size": n,
+        "timeframe": timeframe,
+        "seconds": seconds,
+        "min_seconds": min(timings),
+        "repeat": len(timings),
+        "bars_per_second": n / seconds if seconds > 0 else float("inf"),
+        **extra,
+    }
+
+
+def bench_load(history: dict[str, pd.DataFrame], timeframe: str, repeat: int) -> list[dict]:
+    df = next(iter(history.values()))
+    n = len(df)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = ColumnStore(SYMBOL, timeframe, Path(directory))
+        store.write(df)
+        timings, _ = measure(store.read, repeat)
+        results.append(record("load_store", n, timeframe, timings))
+        if n <= CSV_MAX_BARS:
+            csv_path = Path(directory).joinpath(f"{SYMBOL}_{timeframe}.csv")
+            df.to_csv(csv_path)
+            timings, _ = measure(lambda: read_csv(csv_path), repeat)
+            results.append(record("load_csv", n, timeframe, timings))
+    # one new candle and the refreshed last one, as received in live mode
+    timings, _ = measure(lambda: update_data(df, df.iloc[-2:]), repeat)
+    results.append(record("update_data", n, timeframe, timings))
+    return results
+
+
+def compute_indicators(history: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    indicator_cache.clear()
+    return bench_strategy().compute_indicators(
+        {timeframe: df.copy(deep=False) for timeframe, df in history.items()}
+    )
+
+
+def bench_indicators(
+    history: dict[str, pd.DataFrame], timeframe: str, repeat: int
+) -> tuple[list[dict], pd.DataFrame]:
+    timings, data = measure(lambda: compute_indicators(history), repeat)
+    return [record("indicators", len(data), timeframe, timings)], data
+
+
+def bench_backtest(data: pd.DataFrame, timeframe: str, repeat: int) -> list[dict]:
+    def simulate(vectorized: bool) -> MASStrategy:
+        strategy = bench_strategy()
+        strategy.vectorized = vectorized
+        strategy.simulate(data)
+        return strategy
+
+    n = len(data)
+    timings, strategy = measure(lambda: simulate(True), repeat)
+    results = [record("backtest", n, timeframe, timings, trades=len(strategy.trades))]
+    if n <= LOOP_MAX_BARS:
+        timings, strategy = measure(lambda: simulate(False), 1)
+        results.append(record("backtest_loop", n, timeframe, timings, trades=len(strategy.trades)))
+    return results
+
+
+def bench_live(history: dict[str, pd.DataFrame], timeframe: str, ticks: int) -> list[dict]:
+    """Warm-up on all but the last `ticks` candles then replay them one candle
+    close at a time through the live engine and a local exchange"""
+    main = next(iter(history))
+    df = history[main]
+    n = len(df)
+    duration = timeframe_to_timedelta(main)
+    start = df.index[n - ticks] + duration / 2
+    clock = SimulatedClock(start)
+    exchange = FakeExchange({(SYMBOL, tf): frame for tf, frame in history.items()}, clock=clock)
+    strategy = bench_strategy()
+    strategy.mode = "bench"
+
+    begin = time.perf_counter()
+    runner = LiveRunner(
+        strategy,
+        {tf: frame.loc[:start] for tf, frame in history.items()},
+        exchange=exchange,
+        clock=clock,
+    )
+    warm_up = time.perf_counter() - begin
+
+    async def replay() -> list[float]:
+        latencies = []
+        for close_time in df.index[n - ticks :] + duration:
+            await clock.sleep_until(close_time + runner.delay)
+            begin = time.perf_counter()
+            await runner.step()
+            latencies.append(time.perf_counter() - begin)
+        return latencies
+
+    latencies = asyncio.run(replay())
+    return [
+        record("live_warm_up", n - ticks, timeframe, [warm_up]),
+        record(
+            "live_tick",
+            ticks,
+            timeframe,
+            latencies,
+            p99_seconds=float(np.percentile(latencies, 99)),
+            streaming=runner.streaming,
+        ),
+    ]
+
+
+def bench_ledger(n: int, repeat: int) -> list[dict]:
+    results = [benchmark_ledger(n) for _ in range(repeat)]
+    return [
+        record(
+            f"ledger_metrics_{kind}",
+            n,
+            "",
+            [result[f"{kind}_metrics_seconds"] for result in results],
+            bytes_per_trade=results[0][f"{kind}_bytes_per_trade"],
+        )
+        for kind in ("dict", "ledger")
+    ]
+
+
+def bench_stops(n: int, repeat: int) -> list[dict]:
+    results = [benchmark_first_touch(n) for _ in range(repeat)]
+    if any(result["mismatches"] for result in results):
+        logger.warning("Vectorized protective exits differ from the loop on %d candles", n)
+    return [
+        record(f"stops_first_touch_{kind}", n, "", [r[f"{kind}_seconds"] for r in results])
+        for kind in ("vectorized", "loop")
+    ]
+
+
+def import_times(stderr: str) -> list[tuple[str, int, float]]:
+    """`(module, nesting depth, cumulative seconds)` of a `-X importtime` log"""
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            times.append((name.strip(), depth, int(cumulative) / 1e6))
+    return times
+
+
+def bench_startup(repeat: int) -> list[dict]:
+    """Wall time of fresh interpreters running `STARTUP_COMMANDS`, with the
+    heavy modules they imported according to `python -X importtime`"""
+    results = []
+    for name, args in STARTUP_COMMANDS.items():
+        timings, imports = [], []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            process = subprocess.run(
+                [sys.executable, "-X", "importtime", *args],
+                cwd=ROOT,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            timings.append(time.perf_counter() - begin)
+            imports = import_times(process.stderr)
+        modules = {module for module, _, _ in imports}
+        heavy = [module for module in HEAVY_MODULES if module in modules]
+        results.append(
+            record(
+                f"startup_{name}",
+                0,
+                "",
+                timings,
+                import_seconds=sum(seconds for _, depth, seconds in imports if depth == 0),
+                heavy_modules=heavy,
+            )
+        )
+    return results
+
+
+def run_benchmarks(
+    sizes: list[str],
+    timeframes: list[str],
+    cases: list[str],
+    *,
+    repeat: int = 3,
+    ticks: int = 200,
+) -> dict[str, Any]:
+    """Run the selected benchmark cases on synthetic data of every size and
+    timeframe
+
+    Args:
+        sizes (list[str]): keys of `SIZES`
+        timeframes (list[str]): timeframes of the synthetic candles
+        cases (list[str]): subset of `CASES`
+        repeat (int, optional): runs per measure, the median is reported.
+            Defaults to 3.
+        ticks (int, optional): candles replayed by the live case. Defaults to 200.
+
+    Returns:
+        dict[str, Any]: `meta` describing the environment and `results`, one
+        record per measure
+    """
+    results = []
+    for size in sizes:
+        n = SIZES[size]
+        for timeframe in timeframes:
+            try:
+                history = synthetic_history(n, timeframe)
+            except ValueError as e:
+                logger.warning("Skipping %s bars of %s: %s", size, timeframe, e)
+                continue
+            logger.info("Benchmarking %s bars of %s", size, timeframe)
+            data = None
+            if "load" in cases:
+                results += bench_load(history, timeframe, repeat)
+            if "indicators" in cases:
+                records, data = bench_indicators(history, timeframe, repeat)
+                results += records
+            if "backtest" in cases:
+                results += bench_backtest(
+                    data if data is not None else compute_indicators(history), timeframe, repeat
+                )
+            # the live engine schedules on the real duration of the strategy timeframe
+            if "live" in cases and timeframe == next(iter(history)) and n <= LIVE_MAX_BARS:
+                results += bench_live(history, timeframe, min(ticks, n // 2))
+        if "ledger" in cases and n <= LEDGER_MAX_TRADES:
+            results += bench_ledger(n, repeat)
+        if "stops" in cases and n <= STOPS_MAX_BARS:
+            results += bench_stops(n, repeat)
+    if "startup" in cases:
+        results += bench_startup(repeat)
+    indicator_cache.clear()
+    return {
+        "meta": {
+            "created": pd.Timestamp.now(tz="UTC").isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: list[dict], baseline: list[dict], *, threshold: float = 0.2
+) -> list[dict[str, Any]]:
+    """Measures slower than the baseline by more than `threshold` (fraction)"""
+    reference = {(r["case"], r["size"], r["timeframe"]): r["seconds"] for r in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get((result["case"], result["size"], result["timeframe"]))
+        if base is None or base == 0:
+            continue
+        ratio = result["seconds"] / base
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "case": result["case"],
+                    "size": result["size"],
+                    "timeframe": result["timeframe"],
+                    "seconds": result["seconds"],
+                    "baseline_seconds": base,
+                    "ratio": ratio,
+                }
+            )
+    return regressions
@@ -0,0 +1,4 @@
+# kept apart from `bench` so the CLI can list them without importing pandas
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = ("10k", "100k", "1m")
+CASES = ("load", "indicators", "backtest", "live", "ledger", "stops", "startup")
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+VALUE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class CandleBuffer:
+    """Fixed-capacity window of the latest candles of one symbol and timeframe
+
+    The candles live in preallocated NumPy arrays of twice the capacity, every
+    row being written at `i` and `i + capacity`, so the window is always one
+    contiguous slice and is exposed without copies while updates stay O(1)
+    per candle. Memory is constant whatever the session length.
+
+    Args:
+        capacity (int): number of candles kept, the oldest ones are dropped
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Candle buffer capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros((2 * capacity, len(VALUE_COLUMNS)), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, capacity: int) -> "CandleBuffer":
+        buffer = cls(capacity)
+        buffer.upsert(df)
+        return buffer
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Open times in nanoseconds, read-only view"""
+        view = self._timestamps[self._start : self._start + self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def values(self) -> np.ndarray:
+        """Open, high, low, close and volume columns, read-only view"""
+        view = self._values[self._start : self._start + self._size]
+        view.flags.writeable = False
+        return view
+
+    def last_timestamp(self) -> pd.Timestamp | None:
+        return pd.Timestamp(self.timestamps[-1]) if self._size else None
+
+    def upsert(self, df: pd.DataFrame) -> None:
+        """Overwrite the buffered candles of `df` in place (e.g. the refreshed
+        still-open candle) and append the newer ones"""
+        if len(df) == 0:
+            return
+        timestamps = df.index.asi8
+        values = df[VALUE_COLUMNS].to_numpy(dtype=np.float64)
+        current = self.timestamps
+        if self._size:
+            known = np.searchsorted(current, timestamps)
+            found = (known < self._size) & (
+                current[np.minimum(known, self._size - 1)] == timestamps
+            )
+            for position, row in zip(known[found], values[found]):
+                self._write(self._start + position, current[position], row)
+            newer = timestamps > current[-1]
+            timestamps, values = timestamps[newer], values[newer]
+        for timestamp, row in zip(timestamps[-self.capacity :], values[-self.capacity :]):
+            self._append(timestamp, row)
+
+    def frame(self) -> pd.DataFrame:
+        """Buffered candles as a DataFrame sharing the buffer memory, columns
+        added to it do not touch the buffer"""
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), name="timestamp")
+        return pd.DataFrame(self.values, index=index, columns=VALUE_COLUMNS, copy=False)
+
+    def _append(self, timestamp: int, row: np.ndarray) -> None:
+        if self._size < self.capacity:
+            self._size += 1
+        elif self._start + self._size == 2 * self.capacity:
+            # both copies are in sync, continue from the first one
+            self._start = 1
+        else:
+            self._start += 1
+        self._write(self._start + self._size - 1, timestamp, row)
+
+    def _write(self, position: int, timestamp: int, row: np.ndarray) -> None:
+        other = position - self.capacity if position >= self.capacity else position + self.capacity
+        for index in (position, other):
+            self._timestamps[index] = timestamp
+            self._values[index] = row
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+from typing import Any
+
+import ccxt
+import ccxt.async_support as ccxt_async
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.metrics import FETCH_ERRORS, FETCH_SECONDS
+from trade_pro.strategy.store import ColumnStore
+from trade_pro.strategy.utils import (
+    DATA_DIR,
+    OHLCV_COLUMNS,
+    ohlcv_to_frame,
+    timeframe_to_timedelta,
+    update_data,
+)
+
+logger = logging.getLogger(__name__)
+
+LIMIT = 1000
+RETRIES = 5
+
+
+def missing_ranges(
+    store: ColumnStore,
+    timeframe: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    covered_from: pd.Timestamp | None = None,
+) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Ranges `[start, end)` of `start`-`end` not covered by the store yet,
+    `covered_from` is the earliest start already requested to the exchange"""
+    first, last = store.first_timestamp(), store.last_timestamp()
+    if first is None:
+        return [(start, end)] if start < end else []
+    if covered_from is not None:
+        first = min(first, covered_from)
+    ranges = []
+    if start < first:
+        ranges.append((start, min(first, end)))
+    # from the last stored candle whatever `start`, the store stays contiguous,
+    # and that candle may still have been open when it was downloaded
+    if last < end:
+        ranges.append((last, end))
+    return ranges
+
+
+def page_starts(
+    ranges: list[tuple[pd.Timestamp, pd.Timestamp]], timeframe: str, limit: int = LIMIT
+) -> list[int]:
+    """Start times in milliseconds of the `limit` candles pages covering `ranges`"""
+    step = timeframe_to_timedelta(timeframe) * limit
+    starts = []
+    for start, end in ranges:
+        starts += [
+            page.value // 10**6 for page in pd.date_range(start, end, freq=step, inclusive="left")
+        ]
+    return starts
+
+
+class Download:
+    """Resumable download of one symbol and timeframe into its `ColumnStore`
+
+    Every page is written to a checkpoint directory as soon as it arrives, a
+    restarted download skips the pages already on disk. Once all pages are
+    there they are merged into the store and the checkpoint is removed.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        *,
+        data_dir: Path = DATA_DIR,
+        limit: int = LIMIT,
+    ):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.limit = limit
+        self.store = ColumnStore(symbol, timeframe, data_dir)
+        self.checkpoint = data_dir.joinpath(".downloads", self.store.path.name)
+        # nothing before the first stored candle when it was requested from earlier
+        self.coverage = data_dir.joinpath(".downloads", f"{self.store.path.name}.coverage")
+        covered_from = None
+        if self.coverage.exists():
+            covered_from = pd.Timestamp(int(self.coverage.read_text()), unit="ms")
+        self.ranges = missing_ranges(self.store, timeframe, start, end, covered_from)
+        self.start, self.end = start, end
+        # candles kept from the pages, the tail range may begin before `start`
+        self.window_start = min([start] + [first for first, _ in self.ranges])
+
+    def pending_pages(self) -> list[int]:
+        done = {int(path.stem) for path in self.checkpoint.glob("*.npy")}
+        return [
+            since
+            for since in page_starts(self.ranges, self.timeframe, self.limit)
+            if since not in done
+        ]
+
+    def save_page(self, since: int, ohlcv: list[list[float]]) -> None:
+        self.checkpoint.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint.joinpath(f"{since}.part")
+        with tmp_path.open("wb") as f:
+            np.save(f, np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS)))
+        tmp_path.replace(self.checkpoint.joinpath(f"{since}.npy"))
+
+    def merge(self) -> int:
+        """Move the downloaded pages into the store, returns the candles count"""
+        paths = sorted(self.checkpoint.glob("*.npy"), key=lambda path: int(path.stem))
+        first = self.store.first_timestamp()
+        stored = len(self.store)
+        if first is not None and paths and int(paths[0].stem) < first.value // 10**6:
+            # backfill before the stored history, the only case needing a rewrite
+            df = self._window(ohlcv_to_frame(np.concatenate([np.load(path) for path in paths])))
+            self.store.write(update_data(self.store.read(), df))
+        else:
+            # pages are appended one at a time so memory stays bounded by a page
+            for path in paths:
+                self.store.append(self._window(ohlcv_to_frame(np.load(path))))
+        count = len(self.store) - stored
+        shutil.rmtree(self.checkpoint, ignore_errors=True)
+        if self.ranges and self.ranges[0][0] == self.start:
+            self.coverage.parent.mkdir(parents=True, exist_ok=True)
+            self.coverage.write_text(str(self.start.value // 10**6))
+        return count
+
+    def _window(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df[(df.index >= self.window_start) & (df.index < self.end)]
+
+
+async def fetch_page(
+    exchange: Any, download: Download, since: int, semaphore: asyncio.Semaphore
+) -> None:
+    delay = 1.0
+    for attempt in range(RETRIES):
+        try:
+            async with semaphore:
+                ohlcv = await fetch_ohlcv(exchange, download, since)
+            download.save_page(since, ohlcv)
+            return
+        except (ccxt.NetworkError, ConnectionError, TimeoutError) as e:
+            error = e
+        if attempt + 1 == RETRIES:
+            break
+        logger.warning(
+            "Page %s of %s %s failed (%s), retry %d/%d in %.0fs",
+            pd.Timestamp(since, unit="ms"),
+            download.symbol,
+            download.timeframe,
+            error,
+            attempt + 1,
+            RETRIES,
+            delay,
+        )
+        await asyncio.sleep(delay)
+        delay *= 2
+    raise error
+
+
+async def fetch_ohlcv(exchange: Any, download: Download, since: int) -> list[list[float]]:
+    labels = (download.symbol, download.timeframe)
+    try:
+        with FETCH_SECONDS.time(*labels):
+            return await exchange.fetch_ohlcv(
+                download.symbol, timeframe=download.timeframe, since=since, limit=download.limit
+            )
+    except Exception:
+        FETCH_ERRORS.inc(*labels)
+        raise
+
+
+async def run_download(download: Download, exchange: Any, semaphore: asyncio.Semaphore) -> int:
+    pages = download.pending_pages()
+    logger.info(
+        "Downloading %s %s: %d missing ranges, %d pages to fetch",
+        download.symbol,
+        download.timeframe,
+        len(download.ranges),
+        len(pages),
+    )
+    await asyncio.gather(*(fetch_page(exchange, download, since, semaphore) for since in pages))
+    count = download.merge()
+    logger.info("Stored %d candles for %s %s", count, download.symbol, download.timeframe)
+    return count
+
+
+async def download(
+    symbols: list[str],
+    timeframes: list[str],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    *,
+    exchange: Any = None,
+    concurrency: int = 4,
+    data_dir: Path = DATA_DIR,
+) -> dict[tuple[str, str], int]:
+    """Download the candles missing from the store for every symbol and timeframe
+
+    Args:
+        symbols (list[str]): exchange symbols (e.g. BTCUSDT)
+        timeframes (list[str]): timeframes (e.g. 1h, 1d)
+        start (pd.Timestamp): first candle open time
+        end (pd.Timestamp): end of the period, exclusive
+        exchange (Any, optional): async ccxt-like exchange. Defaults to binance
+            with ccxt rate limiting enabled.
+        concurrency (int, optional): maximum number of requests in flight.
+            Defaults to 4.
+        data_dir (Path, optional): store location. Defaults to DATA_DIR.
+
+    Returns:
+        dict[tuple[str, str], int]: candles stored per (symbol, timeframe)
+    """
+    own_exchange = exchange is None
+    if own_exchange:
+        exchange = ccxt_async.binance({"enableRateLimit": True})
+    semaphore = asyncio.Semaphore(concurrency)
+    downloads = [
+        Download(symbol, timeframe, start, end, data_dir=data_dir)
+        for symbol in symbols
+        for timeframe in timeframes
+    ]
+    try:
+        counts = await asyncio.gather(*(run_download(d, exchange, semaphore) for d in downloads))
+    finally:
+        if own_exchange:
+            await exchange.close()
+    return {(d.symbol, d.timeframe): count for d, count in zip(downloads, counts)}
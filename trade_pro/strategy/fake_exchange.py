@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.utils import timeframe_to_timedelta
+
+
+class FakeExchange:
+    """Local stand-in for a ccxt exchange serving candles from DataFrames
+
+    Implements the async `fetch_ohlcv` surface of `ccxt.async_support` so the
+    downloader and the live engine can run without network access. With a
+    `clock`, only the candles opened before the clock time are served, the
+    last one being the still open candle. With `partial`, that candle only
+    holds what happened before the clock time: it is aggregated from the
+    candles of the finest shorter timeframe of the symbol, flat at its open
+    without one.
+
+    Args:
+        data (dict[tuple[str, str], pd.DataFrame]): candles per (symbol, timeframe)
+        latency (float, optional): seconds slept by every request. Defaults to 0.
+        failures (int, optional): number of requests failing with a
+            `ConnectionError` before the exchange recovers. Defaults to 0.
+        clock (Any, optional): object with a `now()` method returning the
+            exchange time. Defaults to None.
+        partial (bool, optional): serve the open candle as formed at the clock
+            time rather than complete. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        data: dict[tuple[str, str], pd.DataFrame],
+        *,
+        latency: float = 0.0,
+        failures: int = 0,
+        clock: Any = None,
+        partial: bool = False,
+    ):
+        self.data = {}
+        for (symbol, timeframe), df in data.items():
+            values = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=np.float64)
+            timestamps = df.index.values.astype("datetime64[ms]").astype(np.int64)
+            self.data[(symbol.replace("/", ""), timeframe)] = (timestamps, values)
+        self.latency = latency
+        self.failures = failures
+        self.clock = clock
+        self.partial = partial
+        self.requests = 0
+
+    async def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = "1m",
+        since: int | None = None,
+        limit: int | None = None,
+        params: dict | None = None,
+    ) -> list[list[float]]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("fake exchange unavailable")
+
+        timestamps, values = self.data[(symbol.replace("/", ""), timeframe)]
+        available = len(timestamps)
+        if self.clock is not None:
+            now = self.clock.now().value // 10**6
+            available = int(np.searchsorted(timestamps, now, "right"))
+        limit = limit or 500
+        if since is None:
+            first = max(available - limit, 0)
+        else:
+            first = int(np.searchsorted(timestamps, since, "left"))
+        last = min(first + limit, available)
+        candles = [[int(timestamps[i]), *values[i].tolist()] for i in range(first, last)]
+        if self.partial and self.clock is not None and candles:
+            duration = timeframe_to_timedelta(timeframe).value // 10**6
+            if candles[-1][0] + duration > now:
+                candles[-1] = self.forming_candle(symbol, duration, candles[-1], now)
+        return candles
+
+    def forming_candle(
+        self, symbol: str, duration: int, candle: list[float], now: int
+    ) -> list[float]:
+        """`candle` as formed at `now` (ms), from the closed candles of the finest
+        shorter timeframe"""
+        symbol = symbol.replace("/", "")
+        finer = [
+            (timeframe_to_timedelta(timeframe).value // 10**6, timeframe)
+            for stored_symbol, timeframe in self.data
+            if stored_symbol == symbol
+        ]
+        finer = sorted(item for item in finer if item[0] < duration)
+        open_time, open_price = candle[0], candle[1]
+        if finer:
+            step, timeframe = finer[0]
+            timestamps, values = self.data[(symbol, timeframe)]
+            first = np.searchsorted(timestamps, open_time, "left")
+            last = np.searchsorted(timestamps, now - step, "right")
+            if last > first:
+                part = values[first:last]
+                return [
+                    open_time,
+                    open_price,
+                    max(part[:, 1].max(), open_price),
+                    min(part[:, 2].min(), open_price),
+                    part[-1, 3],
+                    part[:, 4].sum(),
+                ]
+        return [open_time, open_price, open_price, open_price, open_price, 0.0]
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.utils import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def pandas_ta():
+    """`pandas_ta` module, only imported when an indicator is computed as its
+    import takes longer than the rest of the package"""
+    import pandas_ta
+
+    return pandas_ta
+
+
+def fingerprint(series: pd.Series) -> str:
+    """Content hash of a price series and its timestamps"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(series.index.asi8).tobytes())
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """Memoizes indicator arrays by (symbol, timeframe, indicator, params, data
+    fingerprint) with an in-memory LRU and an optional on-disk tier of `.npy`
+    files.
+
+    Args:
+        maxsize (int, optional): number of arrays kept in memory. Defaults to 256.
+        directory (Path | None, optional): on-disk tier location, disabled when
+            None. Defaults to None.
+    """
+
+    def __init__(self, maxsize: int = 256, directory: Path | None = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+    def configure(self, *, maxsize: int | None = None, disk: bool = False) -> None:
+        """Resize the LRU and enable the on-disk tier under `CACHE_DIR`"""
+        if maxsize is not None:
+            self.maxsize = maxsize
+            self._evict()
+        self.directory = CACHE_DIR.joinpath("indicators") if disk else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
+
+    def get(
+        self,
+        symbol: str,
+        timeframe: str,
+        indicator: str,
+        params: tuple[Any, ...],
+        close: pd.Series,
+        compute: Callable[[pd.Series], np.ndarray],
+    ) -> np.ndarray:
+        """Cached `compute(close)`, the returned array is read-only"""
+        key = (symbol, timeframe, indicator, params, fingerprint(close))
+        values = self._entries.get(key)
+        if values is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return values
+
+        path = self._path(key)
+        if path is not None and path.exists():
+            self.disk_hits += 1
+            values = np.load(path)
+        else:
+            self.misses += 1
+            values = np.asarray(compute(close), dtype=np.float64)
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(path, values)
+        values.setflags(write=False)
+        self._entries[key] = values
+        self._evict()
+        return values
+
+    def sma(self, close: pd.Series, length: int, *, symbol: str, timeframe: str) -> pd.Series:
+        values = self.get(
+            symbol, timeframe, "sma", (length,), close, lambda s: pandas_ta().sma(s, length=length)
+        )
+        return pd.Series(values, index=close.index, name=f"SMA_{length}")
+
+    def rsi(self, close: pd.Series, length: int, *, symbol: str, timeframe: str) -> pd.Series:
+        values = self.get(
+            symbol, timeframe, "rsi", (length,), close, lambda s: pandas_ta().rsi(s, length=length)
+        )
+        return pd.Series(values, index=close.index, name=f"RSI_{length}")
+
+    def macd(
+        self, close: pd.Series, fast: int, slow: int, signal: int, *, symbol: str, timeframe: str
+    ) -> pd.DataFrame:
+        """MACD line, histogram and signal with the `pandas_ta` column names"""
+        suffix = f"{fast}_{slow}_{signal}"
+        columns = [f"MACD_{suffix}", f"MACDh_{suffix}", f"MACDs_{suffix}"]
+        values = self.get(
+            symbol,
+            timeframe,
+            "macd",
+            (fast, slow, signal),
+            close,
+            lambda s: pandas_ta().macd(s, fast, slow, signal)[columns].to_numpy(),
+        )
+        return pd.DataFrame(values, index=close.index, columns=columns)
+
+    def _path(self, key: tuple) -> Path | None:
+        if self.directory is None:
+            return None
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return self.directory.joinpath(f"{key[0]}_{key[1]}_{key[2]}_{name}.npy")
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+indicator_cache = IndicatorCache()
+
+
+def log_cache_stats(stats: dict[str, int]) -> None:
+    lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+    if lookups == 0:
+        return
+    logger.info(
+        "Indicator cache: %d lookups, %d memory hits, %d disk hits, %d misses (%.1f%% hit rate)",
+        lookups,
+        stats["hits"],
+        stats["disk_hits"],
+        stats["misses"],
+        (stats["hits"] + stats["disk_hits"]) / lookups * 100,
+    )
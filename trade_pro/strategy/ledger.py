@@ -0,0 +1,193 @@
+import time
+import tracemalloc
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+TRADE_DTYPE = np.dtype(
+    [
+        ("entry_time", "<i8"),
+        ("exit_time", "<i8"),
+        ("entry_price", "<f8"),
+        ("exit_price", "<f8"),
+        ("pnl", "<f8"),
+        ("return_pct", "<f8"),
+        ("old_balance", "<f8"),
+        ("new_balance", "<f8"),
+    ]
+)
+TIME_FIELDS = ("entry_time", "exit_time")
+
+
+class TradeLedger:
+    """Closed trades stored in a preallocated structured NumPy array that
+    doubles its capacity when full (64 bytes per trade)
+
+    Iterating or indexing yields the trades as dicts, like the former list of
+    dicts, while `records` exposes the columns for vectorized metrics.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._data = np.empty(capacity, dtype=TRADE_DTYPE)
+        self._size = 0
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> "TradeLedger":
+        ledger = cls(max(len(records), 1))
+        ledger._data[: len(records)] = records
+        ledger._size = len(records)
+        return ledger
+
+    def append(
+        self,
+        entry_time: pd.Timestamp,
+        exit_time: pd.Timestamp,
+        entry_price: float,
+        exit_price: float,
+        pnl: float,
+        return_pct: float,
+        old_balance: float,
+        new_balance: float,
+    ) -> None:
+        if self._size == len(self._data):
+            self._data = np.resize(self._data, max(2 * len(self._data), 1))
+        self._data[self._size] = (
+            pd.Timestamp(entry_time).value,
+            pd.Timestamp(exit_time).value,
+            entry_price,
+            exit_price,
+            pnl,
+            return_pct,
+            old_balance,
+            new_balance,
+        )
+        self._size += 1
+
+    @property
+    def records(self) -> np.ndarray:
+        """Structured array view of the closed trades"""
+        return self._data[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        record = self.records[index]
+        trade = {name: record[name].item() for name in TRADE_DTYPE.names}
+        for name in TIME_FIELDS:
+            trade[name] = pd.Timestamp(trade[name])
+        return trade
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return (self[i] for i in range(self._size))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TradeLedger):
+            return NotImplemented
+        return np.array_equal(self.records, other.records)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"records": self.records.copy()}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._data = state["records"]
+        self._size = len(self._data)
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.records)
+        for name in TIME_FIELDS:
+            df[name] = pd.to_datetime(df[name])
+        return df
+
+
+def trade_metrics(records: np.ndarray, initial_balance: float) -> dict[str, float]:
+    """`resume_backtest` metrics computed on the ledger columns"""
+    pnl = records["pnl"]
+    returns = records["return_pct"]
+    win_mask = pnl > 0
+    wins, losses = pnl[win_mask], pnl[~win_mask]
+    total_wins = wins.sum()
+    total_losses = abs(losses.sum())
+    cumulative = np.cumsum(pnl)
+    return {
+        "total_trades": len(pnl),
+        "win_trades": len(wins),
+        "lose_trades": len(losses),
+        "max_win": wins.max() if len(wins) else float("nan"),
+        "max_lose": losses.min() if len(losses) else float("nan"),
+        "win_rate": len(wins) / len(pnl) * 100 if len(pnl) else 0,
+        "pnl_weighted_win_rate": (
+            total_wins / (total_wins + total_losses) * 100 if (total_wins + total_losses) > 0 else 0
+        ),
+        "profit_factor": total_wins / total_losses if total_losses != 0 else float("inf"),
+        "sharpe_like": (
+            np.mean(returns) / (np.std(returns) + 1e-9) if len(returns) else float("nan")
+        ),
+        "max_drawdown": (
+            (np.maximum.accumulate(cumulative) - cumulative).max() if len(pnl) else float("nan")
+        ),
+        "total_pnl": pnl.sum(),
+        "final_balance": pnl.sum() + initial_balance,
+    }
+
+
+def equity_metrics(equity: np.ndarray, timestamps: np.ndarray) -> dict[str, float]:
+    """Bar level drawdown and annualized Sharpe ratio of a mark-to-market equity
+    curve"""
+    if len(equity) < 2:
+        return {"max_drawdown_bar": 0.0, "max_drawdown_bar_pct": 0.0, "sharpe": float("nan")}
+    peak = np.maximum.accumulate(equity)
+    returns = np.diff(equity) / equity[:-1]
+    bar_seconds = np.median(np.diff(timestamps)) / 1e9
+    periods_per_year = 365 * 24 * 3600 / bar_seconds if bar_seconds > 0 else 0
+    std = returns.std()
+    return {
+        "max_drawdown_bar": (peak - equity).max(),
+        "max_drawdown_bar_pct": ((peak - equity) / peak).max() * 100,
+        "sharpe": returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else float("nan"),
+    }
+
+
+def benchmark_ledger(n: int = 1_000_000) -> dict[str, float]:
+    """Memory per trade and metrics time of the ledger against a list of dicts"""
+    rng = np.random.default_rng(0)
+    pnl = rng.normal(size=n)
+    times = pd.date_range("2017-01-01", periods=n, freq="h")
+    results = {}
+
+    tracemalloc.start()
+    trades = [
+        {
+            "entry_time": times[i],
+            "exit_time": times[i],
+            "entry_price": 100.0,
+            "exit_price": 100.0 + pnl[i],
+            "pnl": pnl[i],
+            "return_pct": pnl[i],
+            "old_balance": 1000.0,
+            "new_balance": 1000.0 + pnl[i],
+        }
+        for i in range(n)
+    ]
+    results["dict_bytes_per_trade"] = tracemalloc.get_traced_memory()[0] / n
+    tracemalloc.stop()
+    begin = time.perf_counter()
+    df = pd.DataFrame(trades)
+    returns = [t["return_pct"] for t in trades]
+    wins, losses = df[df["pnl"] > 0], df[df["pnl"] <= 0]
+    _ = (len(wins) / len(df), wins["pnl"].sum() / abs(losses["pnl"].sum()), np.mean(returns))
+    _ = (df["pnl"].cumsum().cummax() - df["pnl"].cumsum()).max()
+    results["dict_metrics_seconds"] = time.perf_counter() - begin
+    del trades, df, returns
+
+    tracemalloc.start()
+    ledger = TradeLedger()
+    for i in range(n):
+        ledger.append(times[i], times[i], 100.0, 100.0 + pnl[i], pnl[i], pnl[i], 1000.0, 1000.0)
+    results["ledger_bytes_per_trade"] = tracemalloc.get_traced_memory()[0] / n
+    tracemalloc.stop()
+    begin = time.perf_counter()
+    trade_metrics(ledger.records, 1000.0)
+    results["ledger_metrics_seconds"] = time.perf_counter() - begin
+    return results
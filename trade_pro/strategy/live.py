@@ -0,0 +1,229 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+
+from trade_pro.strategy.buffer import VALUE_COLUMNS, CandleBuffer
+from trade_pro.strategy.metrics import FETCH_ERRORS, FETCH_SECONDS, INDICATOR_SECONDS, STEP_SECONDS
+from trade_pro.strategy.snapshot import SnapshotBoard, StrategySnapshot, snapshot_board
+from trade_pro.strategy.streaming import closed_candles, merge_candles
+from trade_pro.strategy.utils import next_candle_close, ohlcv_to_frame
+
+if TYPE_CHECKING:
+    from trade_pro.strategy.base import Base
+    from trade_pro.telegram.bot import TelegramCommands
+    from trade_pro.telegram.notifier import Notifier
+
+logger = logging.getLogger(__name__)
+
+# candles kept per lookback candle, lets the recursive indicators (EMA, RMA)
+# converge on the bounded live window
+LOOKBACK_FACTOR = 10
+# window of the timeframes without a declared lookback
+DEFAULT_CAPACITY = 5000
+
+
+def async_exchange() -> Any:
+    """Rate limited async binance client, ccxt is imported on first use"""
+    import ccxt.async_support as ccxt_async
+
+    return ccxt_async.binance({"enableRateLimit": True})
+
+
+class Clock:
+    """Wall clock in UTC, candle timestamps are naive UTC"""
+
+    def now(self) -> pd.Timestamp:
+        return pd.Timestamp.now(tz="UTC").tz_localize(None)
+
+    async def sleep_until(self, moment: pd.Timestamp) -> None:
+        await asyncio.sleep(max((moment - self.now()).total_seconds(), 0))
+
+
+class SimulatedClock(Clock):
+    """Virtual clock jumping straight to the requested time when sleeping"""
+
+    def __init__(self, start: pd.Timestamp):
+        self.current = start
+
+    def now(self) -> pd.Timestamp:
+        return self.current
+
+    async def sleep_until(self, moment: pd.Timestamp) -> None:
+        self.current = max(self.current, moment)
+        await asyncio.sleep(0)
+
+
+class LiveRunner:
+    """Event-driven live engine of a strategy
+
+    Sleeps until the next candle close of any of the strategy timeframes,
+    fetches all timeframes concurrently and evaluates the strategy once per
+    newly closed candle of the main timeframe (the first of `timeframes`).
+    Failed requests are retried with an exponential backoff. Candles are kept
+    in one fixed-capacity `CandleBuffer` per timeframe sized from the strategy
+    `lookback`, so memory and per-candle work do not grow with the session.
+    The strategy state is published on `board` after every step.
+
+    Args:
+        strategy (Base): strategy to run
+        histo_data (dict[str, pd.DataFrame]): history per timeframe
+        exchange (Any, optional): async ccxt-like exchange. Defaults to binance.
+        clock (Clock, optional): time source. Defaults to the wall clock.
+        delay (pd.Timedelta, optional): wait after a candle close before
+            fetching it. Defaults to 2 seconds.
+        limit (int, optional): candles fetched per request. Defaults to 50.
+        max_backoff (float, optional): maximum seconds between retries.
+            Defaults to 60.
+        notifier (Notifier | None, optional): Telegram notifications of the
+            strategy, started and stopped with the runner. Defaults to None.
+        commands (TelegramCommands | None, optional): Telegram bot answering
+            the state queries, started and stopped with the runner. Defaults to None.
+        name (str | None, optional): name of the published snapshots.
+            Defaults to the symbol and strategy class.
+        board (SnapshotBoard, optional): where the snapshots are published.
+            Defaults to the process wide board read by the Telegram commands.
+    """
+
+    def __init__(
+        self,
+        strategy: "Base",
+        histo_data: dict[str, pd.DataFrame],
+        *,
+        exchange: Any = None,
+        clock: Clock | None = None,
+        delay: pd.Timedelta = pd.Timedelta(2, "s"),
+        limit: int = 50,
+        max_backoff: float = 60,
+        notifier: "Notifier | None" = None,
+        commands: "TelegramCommands | None" = None,
+        name: str | None = None,
+        board: SnapshotBoard = snapshot_board,
+    ):
+        self.strategy = strategy
+        self.timeframes = strategy.timeframes
+        self.main_timeframe = strategy.timeframes[0]
+        self.own_exchange = exchange is None
+        self.exchange = exchange or async_exchange()
+        self.clock = clock or Clock()
+        self.delay = delay
+        self.limit = limit
+        self.max_backoff = max_backoff
+        self.backoff = 1.0
+        self.notifier = notifier
+        if notifier is not None:
+            strategy.notifier = notifier
+        self.commands = commands
+        self.name = name or f"{strategy.symbol} {type(strategy).__name__}"
+        self.board = board
+
+        now = self.clock.now()
+        histo_data = {
+            timeframe: closed_candles(df, timeframe, now) for timeframe, df in histo_data.items()
+        }
+        self.last_seen = {timeframe: df.index[-1] for timeframe, df in histo_data.items()}
+        lookback = strategy.lookback()
+        self.buffers = {
+            timeframe: CandleBuffer.from_frame(
+                df,
+                LOOKBACK_FACTOR * lookback[timeframe]
+                if timeframe in lookback
+                else DEFAULT_CAPACITY,
+            )
+            for timeframe, df in histo_data.items()
+        }
+        self.streaming = strategy.warm_up(histo_data)
+        self.publish()
+
+    async def run(self, until: pd.Timestamp | None = None) -> None:
+        """Process candle closes until `until`, forever when None"""
+        if self.notifier is not None:
+            await self.notifier.start()
+        if self.commands is not None:
+            await self.commands.start()
+        try:
+            while until is None or self.clock.now() < until:
+                await self.clock.sleep_until(self.next_wake(self.clock.now()))
+                await self.step()
+        finally:
+            if self.commands is not None:
+                await self.commands.stop()
+            if self.notifier is not None:
+                await self.notifier.stop()
+            if self.commands is not None:
+                await self.commands.shutdown()
+            # a stopped strategy is no longer reported as running
+            self.board.remove(self.name)
+            if self.own_exchange:
+                await self.exchange.close()
+
+    def next_wake(self, now: pd.Timestamp) -> pd.Timestamp:
+        """Time of the next step: the next candle close plus `delay`"""
+        return min(next_candle_close(now, timeframe) for timeframe in self.timeframes) + self.delay
+
+    async def step(self) -> None:
+        """Fetch every timeframe and process the candles closed since last step"""
+        with STEP_SECONDS.time(type(self.strategy).__name__):
+            frames = await asyncio.gather(*(self.fetch(timeframe) for timeframe in self.timeframes))
+            self.process(dict(zip(self.timeframes, frames)))
+
+    def process(self, frames: dict[str, pd.DataFrame]) -> None:
+        """Evaluate the strategy on the candles of `frames` closed since last call"""
+        now = self.clock.now()
+        new_candles = {}
+        for timeframe in self.timeframes:
+            df = closed_candles(frames[timeframe], timeframe, now)
+            new_candles[timeframe] = df[df.index > self.last_seen[timeframe]]
+            if len(df) > 0:
+                self.last_seen[timeframe] = max(self.last_seen[timeframe], df.index[-1])
+            self.buffers[timeframe].upsert(new_candles[timeframe])
+
+        name = type(self.strategy).__name__
+        if self.streaming:
+            for timeframe, timestamp, candle in merge_candles(new_candles):
+                with INDICATOR_SECONDS.time(name, "live"):
+                    self.strategy.update_indicators(timeframe, timestamp, candle)
+                if timeframe == self.main_timeframe:
+                    self.strategy.on_bar(self.strategy.indicator_window())
+        elif len(new_candles[self.main_timeframe]) > 0:
+            with INDICATOR_SECONDS.time(name, "live"):
+                data = self.strategy.compute_indicators(
+                    {timeframe: buffer.frame() for timeframe, buffer in self.buffers.items()}
+                )
+            for timestamp in new_candles[self.main_timeframe].index:
+                self.strategy.on_bar(data, data.index.get_loc(timestamp))
+        self.publish()
+
+    def publish(self) -> None:
+        """Swap the snapshot of the strategy state on `board`"""
+        buffer = self.buffers[self.main_timeframe]
+        close = buffer.values[-1, VALUE_COLUMNS.index("close")] if len(buffer) else float("nan")
+        self.board.publish(
+            StrategySnapshot.of(self.name, self.strategy, buffer.last_timestamp(), float(close))
+        )
+
+    async def fetch(self, timeframe: str, symbol: str | None = None) -> pd.DataFrame:
+        """Latest candles of `timeframe`, retried until the exchange answers"""
+        import ccxt
+
+        symbol = symbol or self.strategy.symbol
+        while True:
+            try:
+                with FETCH_SECONDS.time(symbol, timeframe):
+                    ohlcv = await self.exchange.fetch_ohlcv(
+                        symbol, timeframe=timeframe, limit=self.limit
+                    )
+                self.backoff = 1.0
+                return ohlcv_to_frame(ohlcv)
+            except (ccxt.NetworkError, ConnectionError, TimeoutError) as e:
+                FETCH_ERRORS.inc(symbol, timeframe)
+                logger.warning(
+                    "Fetching %s %s failed (%s), retrying in %.0fs",
+                    symbol,
+                    timeframe,
+                    e,
+                    self.backoff,
+                )
+                await self.clock.sleep_until(self.clock.now() + pd.Timedelta(self.backoff, "s"))
+                self.backoff = min(self.backoff * 2, self.max_backoff)
@@ -0,0 +1,281 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# seconds, from a fast bar evaluation to a slow exchange request
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_NULL_TIMER = nullcontext()
+
+
+class Metric:
+    """Values of one metric family per label values"""
+
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.lock = threading.Lock()
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        raise NotImplementedError
+
+    def _label_text(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not self.registry.enabled:
+            return
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        for labels, value in sorted(self.values.items()):
+            yield self.name, self._label_text(labels), value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        with self.lock:
+            self.values[labels] = value
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        for labels, value in sorted(self.values.items()):
+            yield self.name, self._label_text(labels), value
+
+
+class Histogram(Metric):
+    """Prometheus histogram with fixed upper bounds, `time` measures the
+    duration of a `with` block in seconds"""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: counts per bucket (last one is +Inf), sum
+        self.values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        with self.lock:
+            counts, total = self.values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def time(self, *labels: str):
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        bounds = [*(f"{bound:g}" for bound in self.buckets), "+Inf"]
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", self._label_text(labels, f'le="{bound}"'), cumulative
+            yield f"{self.name}_sum", self._label_text(labels), total[0]
+            yield f"{self.name}_count", self._label_text(labels), cumulative
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """Metrics of the process, disabled by default
+
+    While disabled, updating a metric is a single attribute check and timers
+    are a shared no-op context manager. `TRADE_PRO_METRICS=1` enables it at
+    import, the `run` command enables it with its metrics options.
+    """
+
+    def __init__(self, *, enabled: bool = False):
+        self.enabled = enabled
+        self.metrics: dict[str, Metric] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def export(self) -> str:
+        """Prometheus text exposition of every metric with values"""
+        lines = []
+        for metric in self.metrics.values():
+            with metric.lock:
+                samples = list(metric.samples())
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {value:.17g}" for name, labels, value in samples)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, path: Path) -> None:
+        """Write the exposition to `path`, atomically for file based scrapers"""
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(self.export(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def write_every(self, path: Path, interval: float) -> threading.Event:
+        """Rewrite `path` every `interval` seconds from a daemon thread until the
+        returned event is set"""
+        stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(interval):
+                self.write(path)
+
+        threading.Thread(target=loop, name="metrics-file", daemon=True).start()
+        return stop
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serve the exposition on `http://host:port/metrics` from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.export().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                logger.debug(format, *args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_port)
+        return server
+
+    def reset(self) -> None:
+        for metric in self.metrics.values():
+            with metric.lock:
+                metric.values.clear()
+
+    def _register(self, cls: type, name: str, help: str, labels: tuple[str, ...], **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(self, name, help, labels, **kwargs)
+        elif not isinstance(metric, cls) or metric.labels != labels:
+            raise ValueError(f"Metric {name} already registered with another type or labels")
+        return metric
+
+
+@contextmanager
+def profiled(path: Path, *, top: int = 25) -> Iterator[cProfile.Profile]:
+    """Profile the block with cProfile, dump the stats to `path` (for
+    `snakeviz` or `pstats`) and log the `top` functions by cumulative time"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        logger.info("Profile written to %s\n%s", path, stream.getvalue())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+registry = Registry(enabled=os.environ.get("TRADE_PRO_METRICS", "") not in ("", "0"))
+
+BAR_SECONDS = registry.histogram(
+    "trade_pro_bar_seconds",
+    "Entry/exit evaluation and order execution time per bar",
+    ("strategy", "mode"),
+)
+ORDERS = registry.counter("trade_pro_orders_total", "Executed orders", ("strategy", "side"))
+INDICATOR_SECONDS = registry.histogram(
+    "trade_pro_indicator_seconds", "compute_indicators time per call", ("strategy", "mode")
+)
+BACKTEST_SECONDS = registry.histogram(
+    "trade_pro_backtest_seconds", "Backtest simulation time per run", ("strategy",)
+)
+BACKTEST_BARS = registry.counter(
+    "trade_pro_backtest_bars_total", "Bars simulated by backtests", ("strategy",)
+)
+BACKTEST_BARS_PER_SECOND = registry.gauge(
+    "trade_pro_backtest_bars_per_second",
+    "Simulated bars per second of the last backtest",
+    ("strategy",),
+)
+FETCH_SECONDS = registry.histogram(
+    "trade_pro_fetch_seconds", "Exchange candles request time", ("symbol", "timeframe")
+)
+FETCH_ERRORS = registry.counter(
+    "trade_pro_fetch_errors_total", "Failed exchange candles requests", ("symbol", "timeframe")
+)
+NOTIFICATIONS = registry.counter(
+    "trade_pro_notifications_total", "Telegram notifications by outcome", ("status",)
+)
+STEP_SECONDS = registry.histogram(
+    "trade_pro_live_step_seconds", "Live fetch and evaluation time per candle close", ("strategy",)
+)
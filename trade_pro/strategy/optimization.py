@@ -0,0 +1,340 @@
+import itertools
+import logging
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Type
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.batch import (
+    BATCH_METRICS,
+    ENGINE_PARAMETERS,
+    evaluate_batch,
+    supports_batch,
+)
+from trade_pro.strategy.indicators import indicator_cache, log_cache_stats
+from trade_pro.strategy.result_cache import ResultCache, result_cache
+from trade_pro.strategy.stops import uses_stops
+from trade_pro.strategy.utils import RESULTS_DIR, get_data
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("grid", "random", "halving")
+
+# set in each worker process by `init_worker`
+_worker_cls: Type[Base] | None = None
+_worker_config: dict[str, Any] = {}
+_worker_data: dict[str, pd.DataFrame] = {}
+# key of the sweep in the result cache, None when results are not cached
+_worker_sweep_key: str | None = None
+
+
+def expand_range(spec: list[Any] | dict[str, Any]) -> list[Any]:
+    """Values of a parameter range, either an explicit list or an inclusive
+    `{"start", "stop", "step"}` mapping."""
+    if isinstance(spec, dict):
+        start, stop, step = spec["start"], spec["stop"], spec.get("step", 1)
+        return np.arange(start, stop + step / 2, step).tolist()
+    return list(spec)
+
+
+def parameter_grid(
+    parameters: dict[str, Any], constraints: list[list[str]] | None = None
+) -> list[dict[str, Any]]:
+    """Cartesian product of the parameter ranges, `constraints` are `[a, b]`
+    pairs of parameter names that must satisfy `a < b`."""
+    names = list(parameters)
+    values = [expand_range(parameters[name]) for name in names]
+    grid = [dict(zip(names, combination)) for combination in itertools.product(*values)]
+    for a, b in constraints or []:
+        grid = [params for params in grid if params.get(a, -math.inf) < params.get(b, math.inf)]
+    return grid
+
+
+def share_data(histo_data: dict[str, pd.DataFrame], directory: Path) -> dict[str, Any]:
+    """Dump the OHLCV frames as raw `.npy` arrays that workers memory-map instead
+    of re-reading and re-parsing the CSV files."""
+    specs = {}
+    for timeframe, df in histo_data.items():
+        index_path = directory.joinpath(f"{timeframe}_index.npy")
+        values_path = directory.joinpath(f"{timeframe}_values.npy")
+        np.save(index_path, df.index.values.astype("datetime64[ns]").view(np.int64))
+        np.save(values_path, df.to_numpy(dtype=np.float64))
+        specs[timeframe] = (index_path, values_path, list(df.columns))
+    return specs
+
+
+def attach_data(specs: dict[str, Any]) -> dict[str, pd.DataFrame]:
+    data = {}
+    for timeframe, (index_path, values_path, columns) in specs.items():
+        index = pd.DatetimeIndex(
+            np.load(index_path, mmap_mode="r").view("datetime64[ns]"), name="timestamp"
+        )
+        values = np.load(values_path, mmap_mode="r")
+        data[timeframe] = pd.DataFrame(values, index=index, columns=columns, copy=False)
+    return data
+
+
+def init_worker(
+    cls: Type[Base],
+    config: dict[str, Any],
+    specs: dict[str, Any],
+    cache_settings: dict[str, Any],
+    sweep_key: str | None = None,
+) -> None:
+    """Process pool initializer attaching the shared market data"""
+    global _worker_cls, _worker_config, _worker_data, _worker_sweep_key
+    logging.getLogger("trade_pro").setLevel(logging.WARNING)
+    indicator_cache.configure(**cache_settings)
+    _worker_cls = cls
+    _worker_config = config
+    _worker_data = attach_data(specs)
+    _worker_sweep_key = sweep_key
+
+
+def evaluate(
+    cls: Type[Base],
+    config: dict[str, Any],
+    histo_data: dict[str, pd.DataFrame],
+    params: dict[str, Any],
+    end: pd.Timestamp | None = None,
+) -> dict[str, Any]:
+    """Backtest one parameter set and return its parameters and statistics"""
+    strategy = cls(**{**config, **params})
+    strategy.mode = "optimization"
+    data = {
+        timeframe: (df if end is None else df.loc[:end]).copy(deep=False)
+        for timeframe, df in histo_data.items()
+    }
+    strategy.simulate(strategy.compute_indicators(data))
+    return {**params, **strategy.backtest_stats(strategy.trades, strategy.equity)}
+
+
+def _evaluate_in_worker(
+    task: tuple[dict[str, Any], pd.Timestamp | None],
+) -> tuple[dict[str, Any], dict[str, int]]:
+    """Evaluate a parameter set and report the indicator cache lookups it made"""
+    params, end = task
+    before = indicator_cache.stats()
+    result = evaluate(_worker_cls, _worker_config, _worker_data, params, end)
+    _cache_results([params], [result], end)
+    return result, _lookups_since(before)
+
+
+def _evaluate_batch_in_worker(
+    task: tuple[list[dict[str, Any]], pd.Timestamp | None],
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Evaluate parameter sets in batches and report the indicator cache lookups"""
+    params_list, end = task
+    before = indicator_cache.stats()
+    results = evaluate_batch(_worker_cls, _worker_config, _worker_data, params_list, end)
+    _cache_results(params_list, results, end)
+    return results, _lookups_since(before)
+
+
+def _cache_results(
+    params_list: list[dict[str, Any]], results: list[dict[str, Any]], end: pd.Timestamp | None
+) -> None:
+    """Store the results as soon as they exist, an interrupted sweep resumes from them"""
+    if _worker_sweep_key is None:
+        return
+    for params, result in zip(params_list, results):
+        result_cache.save_result(ResultCache.result_key(_worker_sweep_key, params, end), result)
+
+
+def _lookups_since(before: dict[str, int]) -> dict[str, int]:
+    after = indicator_cache.stats()
+    return {key: after[key] - before[key] for key in ("hits", "disk_hits", "misses")}
+
+
+def worker_state() -> tuple[Type[Base], dict[str, Any], dict[str, pd.DataFrame]]:
+    """Strategy class, config and market data attached by `init_worker`"""
+    return _worker_cls, _worker_config, _worker_data
+
+
+def rank_results(results: list[dict[str, Any]], metric: str) -> pd.DataFrame:
+    table = pd.DataFrame(results)
+    table = table.sort_values(metric, ascending=False, na_position="last", ignore_index=True)
+    table.index = table.index + 1
+    table.index.name = "rank"
+    return table
+
+
+def select_candidates(settings: dict[str, Any]) -> list[dict[str, Any]]:
+    """Parameter sets to evaluate: the constrained grid, sampled down to
+    `n_iter` sets for the random and halving methods"""
+    method = settings.get("method", "grid")
+    if method not in METHODS:
+        raise Exception(f"Optimization method {method} not supported, use one of {METHODS}")
+    rng = np.random.default_rng(settings.get("seed"))
+    candidates = parameter_grid(settings["parameters"], settings.get("constraints"))
+    if method in ("random", "halving") and settings.get("n_iter", len(candidates)) < len(
+        candidates
+    ):
+        picks = rng.choice(len(candidates), size=settings["n_iter"], replace=False)
+        candidates = [candidates[i] for i in sorted(picks)]
+    return candidates
+
+
+def search(
+    candidates: list[dict[str, Any]],
+    settings: dict[str, Any],
+    run_round: Callable[[list[dict[str, Any]], float], list[dict[str, Any]]],
+) -> list[dict[str, Any]]:
+    """Evaluate the candidates with `run_round(params_list, fraction)`, which
+    backtests them on the first `fraction` of the history. Successive halving
+    keeps the best `1 / eta` of the candidates on a growing fraction.
+
+    Returns:
+        list[dict[str, Any]]: results of the last round, on the whole history
+    """
+    metric = settings.get("metric", "total_pnl")
+    eta = settings.get("eta", 3)
+    if settings.get("method", "grid") != "halving":
+        return run_round(candidates, 1.0)
+
+    rounds = max(1, math.ceil(math.log(max(len(candidates), 1), eta)))
+    fraction = eta ** -(rounds - 1)
+    while True:
+        results = run_round(candidates, fraction)
+        if fraction >= 1 or len(candidates) <= 1:
+            return results
+        ranked = rank_results(results, metric)
+        keep = max(1, math.ceil(len(candidates) / eta))
+        candidates = ranked[list(settings["parameters"])].head(keep).to_dict("records")
+        fraction = min(1.0, fraction * eta)
+
+
+def use_batch(cls: Type[Base], config: dict[str, Any], settings: dict[str, Any]) -> bool:
+    """Whether the sweep can run in batches, whose engine has no protective
+    exits and applies the engine settings of `config` to every parameter set"""
+    metric = settings.get("metric", "total_pnl")
+    parameters = settings.get("parameters", {})
+    return (
+        settings.get("batch", True)
+        and supports_batch(cls)
+        and metric in BATCH_METRICS
+        and not uses_stops(config, parameters)
+        and not any(key in parameters for key in ENGINE_PARAMETERS)
+    )
+
+
+def optimize(
+    cls: Type[Base],
+    config: dict[str, Any],
+    settings: dict[str, Any],
+    name: str,
+    *,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """Run a parameter search for `cls` and write the ranked results table
+
+    Args:
+        cls (Type[Base]): strategy class
+        config (dict[str, Any]): strategy config used for the fixed parameters
+        settings (dict[str, Any]): `optimization` section of the config file:
+            `parameters` ranges, `method` (grid, random or halving), `metric`
+            to rank on, `n_iter` for random search, `eta` for halving,
+            `constraints`, `seed`, `indicator_cache` settings (`maxsize`,
+            `disk`) and `batch` (default true) to evaluate the parameter sets
+            in vectorized batches when the strategy implements
+            `compute_signals_batch` and the metric is one of `BATCH_METRICS`.
+            Evaluated parameter sets are kept in the result cache, running the
+            same sweep again only evaluates the missing ones
+        name (str): name of the results file
+        workers (int | None, optional): process pool size. Defaults to all cores.
+
+    Returns:
+        pd.DataFrame: ranked parameters and backtest statistics
+    """
+    metric = settings.get("metric", "total_pnl")
+    batch = use_batch(cls, config, settings)
+    workers = workers or os.cpu_count()
+    candidates = select_candidates(settings)
+    logger.info(
+        "Evaluating %d parameter sets with method '%s'%s",
+        len(candidates),
+        settings.get("method", "grid"),
+        " in batches" if batch else "",
+    )
+
+    histo_data = {
+        timeframe: get_data(config["symbol"], timeframe) for timeframe in config["timeframes"]
+    }
+    main_index = histo_data[config["timeframes"][0]].index
+    sweep_key = None
+    if result_cache.enabled:
+        sweep_key = result_cache.sweep_key(
+            cls, config, histo_data, batch, settings.get("parameters", {})
+        )
+
+    cache_stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+    with tempfile.TemporaryDirectory(prefix="trade_pro_") as directory:
+        specs = share_data(histo_data, Path(directory))
+        del histo_data
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(cls, config, specs, settings.get("indicator_cache", {}), sweep_key),
+        ) as executor:
+
+            def run_round(params_list: list[dict[str, Any]], fraction: float) -> list[dict]:
+                end = None
+                if fraction < 1:
+                    end = main_index[max(int(len(main_index) * fraction) - 1, 0)]
+                    logger.info(
+                        "Halving round on %.0f%% of history: %d candidates",
+                        fraction * 100,
+                        len(params_list),
+                    )
+                cached = {}
+                if sweep_key is not None:
+                    for i, params in enumerate(params_list):
+                        key = ResultCache.result_key(sweep_key, params, end)
+                        result = result_cache.load_result(key)
+                        if result is not None:
+                            cached[i] = result
+                    if cached:
+                        logger.info(
+                            "%d of %d parameter sets read from the result cache",
+                            len(cached),
+                            len(params_list),
+                        )
+                missing = [params for i, params in enumerate(params_list) if i not in cached]
+                evaluated = []
+                if batch and missing:
+                    size = math.ceil(len(missing) / (workers * 2))
+                    tasks = [
+                        (missing[first : first + size], end)
+                        for first in range(0, len(missing), size)
+                    ]
+                    outputs = executor.map(_evaluate_batch_in_worker, tasks)
+                else:
+                    chunksize = max(1, len(missing) // (workers * 4))
+                    tasks = [(params, end) for params in missing]
+                    outputs = executor.map(_evaluate_in_worker, tasks, chunksize=chunksize)
+                for output, lookups in outputs:
+                    evaluated += output if batch else [output]
+                    for key, count in lookups.items():
+                        cache_stats[key] += count
+                evaluated = iter(evaluated)
+                return [
+                    cached[i] if i in cached else next(evaluated) for i in range(len(params_list))
+                ]
+
+            results = search(candidates, settings, run_round)
+
+    log_cache_stats(cache_stats)
+    result_cache.evict()
+    table = rank_results(results, metric)
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR.joinpath(f"{name}_optimization.csv")
+    table.to_csv(path)
+    logger.info("Top parameter sets by %s:\n%s", metric, table.head(10))
+    logger.info("Optimization results written to %s", path)
+    return table
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+
+from trade_pro.strategy import get_module_class
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.live import Clock, LiveRunner, async_exchange
+from trade_pro.strategy.utils import (
+    RESULTS_DIR,
+    get_data,
+    load_strategy_config,
+    next_candle_close,
+)
+from trade_pro.telegram.notifier import Notifier, telegram_notifier
+
+if TYPE_CHECKING:
+    from trade_pro.telegram.bot import TelegramCommands
+
+logger = logging.getLogger(__name__)
+
+
+def load_portfolio(file_name: str) -> list[dict[str, Any]]:
+    """Entries of a portfolio config: `strategy` module name, strategy `config`
+    file name and optional parameter `overrides`"""
+    entries = load_strategy_config(file_name)["strategies"]
+    for i, entry in enumerate(entries):
+        entry.setdefault("name", f"{entry['config']}_{i}")
+        entry.setdefault("overrides", {})
+    return entries
+
+
+def build_strategy(entry: dict[str, Any]) -> Base:
+    config = load_strategy_config(entry["config"])
+    config.pop("optimization", None)
+    return get_module_class(entry["strategy"])(**{**config, **entry["overrides"]})
+
+
+class MarketData:
+    """Candles loaded once per (symbol, timeframe) and shared by strategies"""
+
+    def __init__(self):
+        self.frames: dict[tuple[str, str], pd.DataFrame] = {}
+
+    def get(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        key = (symbol, timeframe)
+        if key not in self.frames:
+            self.frames[key] = get_data(symbol, timeframe)
+        # strategies add indicator columns, they get their own column set
+        return self.frames[key].copy(deep=False)
+
+    def histo_data(self, strategy: Base) -> dict[str, pd.DataFrame]:
+        return {
+            timeframe: self.get(strategy.symbol, timeframe) for timeframe in strategy.timeframes
+        }
+
+
+def backtest_symbol(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Backtest every strategy of one symbol on a single copy of its data"""
+    market_data = MarketData()
+    results = []
+    for entry in entries:
+        strategy = build_strategy(entry)
+        strategy.mode = "portfolio"
+        strategy.simulate(strategy.compute_indicators(market_data.histo_data(strategy)))
+        results.append(
+            {
+                "name": entry["name"],
+                "symbol": strategy.symbol,
+                "initial_balance": strategy.initial_balance,
+                "trades": strategy.trades,
+                "equity": strategy.equity,
+                "stats": strategy.backtest_stats(strategy.trades, strategy.equity),
+            }
+        )
+    return results
+
+
+def portfolio_equity(results: list[dict[str, Any]]) -> pd.Series:
+    """Sum of the strategies mark-to-market balances over the union of their bars"""
+    initial = {i: result["initial_balance"] for i, result in enumerate(results)}
+    curves = pd.DataFrame({i: result["equity"] for i, result in enumerate(results)})
+    if len(curves) == 0:
+        return pd.Series([sum(initial.values())], dtype=float)
+    return curves.sort_index().ffill().fillna(initial).sum(axis=1)
+
+
+def backtest_portfolio(
+    entries: list[dict[str, Any]], name: str, *, workers: int | None = None
+) -> pd.DataFrame:
+    """Backtest a portfolio in parallel across symbols and report per strategy
+    and aggregate statistics"""
+    by_symbol = defaultdict(list)
+    for entry in entries:
+        by_symbol[load_strategy_config(entry["config"])["symbol"]].append(entry)
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(by_symbol))) as pool:
+        results = [
+            result for batch in pool.map(backtest_symbol, by_symbol.values()) for result in batch
+        ]
+
+    table = pd.DataFrame(
+        [{"name": r["name"], "symbol": r["symbol"], **r["stats"]} for r in results]
+    )
+    table = table.set_index("name")
+    equity = portfolio_equity(results)
+    drawdown = (equity.cummax() - equity).max()
+    initial = sum(result["initial_balance"] for result in results)
+
+    logger.info("\nPortfolio strategies:\n%s", table)
+    logger.info("\nPortfolio Stats:")
+    logger.info(f"Strategies: {len(results)} on {len(by_symbol)} symbols")
+    logger.info(f"Total Trades: {int(table['total_trades'].sum())}")
+    logger.info(f"Initial Equity: ${initial:.2f}")
+    logger.info(f"Final Equity: ${equity.iloc[-1]:.2f}")
+    logger.info(f"Total PnL: ${equity.iloc[-1] - initial:.2f}")
+    logger.info(f"Max Drawdown: ${drawdown:.2f}")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    table.to_csv(RESULTS_DIR.joinpath(f"{name}_portfolio.csv"))
+    equity.rename("equity").to_csv(RESULTS_DIR.joinpath(f"{name}_portfolio_equity.csv"))
+    return table
+
+
+class PortfolioLiveRunner:
+    """Runs the live engine of many strategies on one event loop with a single
+    exchange client, every (symbol, timeframe) is fetched once per candle close
+    and dispatched to all the strategies using it. Each strategy publishes its
+    snapshot under its name in `names`, answered by the shared `commands`."""
+
+    def __init__(
+        self,
+        strategies: list[Base],
+        market_data: MarketData,
+        *,
+        exchange: Any = None,
+        clock: Clock | None = None,
+        notifier: Notifier | None = None,
+        commands: "TelegramCommands | None" = None,
+        names: list[str] | None = None,
+    ):
+        self.own_exchange = exchange is None
+        self.exchange = exchange or async_exchange()
+        self.clock = clock or Clock()
+        self.runners = [
+            LiveRunner(
+                strategy,
+                market_data.histo_data(strategy),
+                exchange=self.exchange,
+                clock=self.clock,
+                notifier=notifier,
+                name=name,
+            )
+            for strategy, name in zip(strategies, names or [None] * len(strategies))
+        ]
+        self.feeds = sorted(
+            {
+                (runner.strategy.symbol, timeframe)
+                for runner in self.runners
+                for timeframe in runner.timeframes
+            }
+        )
+        # one queue and one bot shared by all the strategies, owned by this runner
+        self.notifier = notifier
+        self.commands = commands
+
+    async def run(self, until: pd.Timestamp | None = None) -> None:
+        if self.notifier is not None:
+            await self.notifier.start()
+        if self.commands is not None:
+            await self.commands.start()
+        try:
+            while until is None or self.clock.now() < until:
+                now = self.clock.now()
+                wake = min(next_candle_close(now, timeframe) for _, timeframe in self.feeds)
+                await self.clock.sleep_until(wake + self.runners[0].delay)
+                await self.step()
+        finally:
+            if self.commands is not None:
+                await self.commands.stop()
+            if self.notifier is not None:
+                await self.notifier.stop()
+            if self.commands is not None:
+                await self.commands.shutdown()
+            for runner in self.runners:
+                runner.board.remove(runner.name)
+            if self.own_exchange:
+                await self.exchange.close()
+
+    async def step(self) -> None:
+        fetcher = self.runners[0]
+        frames = await asyncio.gather(
+            *(fetcher.fetch(timeframe, symbol) for symbol, timeframe in self.feeds)
+        )
+        frames = dict(zip(self.feeds, frames))
+        for runner in self.runners:
+            runner.process(
+                {
+                    timeframe: frames[(runner.strategy.symbol, timeframe)]
+                    for timeframe in runner.timeframes
+                }
+            )
+
+
+def run_portfolio(mode: str, file_name: str) -> None:
+    entries = load_portfolio(file_name)
+    logger.info(
+        "Running portfolio %s with %d strategies in '%s' mode", file_name, len(entries), mode
+    )
+    if mode == "backtest":
+        backtest_portfolio(entries, file_name)
+    elif mode == "live":
+        strategies = [build_strategy(entry) for entry in entries]
+        for strategy in strategies:
+            strategy.mode = "live"
+        from trade_pro.telegram.commands import telegram_commands
+
+        runner = PortfolioLiveRunner(
+            strategies,
+            MarketData(),
+            notifier=telegram_notifier(),
+            commands=telegram_commands(),
+            names=[entry["name"] for entry in entries],
+        )
+        asyncio.run(runner.run())
+    else:
+        raise Exception(f"Mode {mode} not supported for portfolios")
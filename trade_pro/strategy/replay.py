@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from typing import Any, Type
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.fake_exchange import FakeExchange
+from trade_pro.strategy.ledger import TradeLedger
+from trade_pro.strategy.live import LiveRunner, SimulatedClock
+from trade_pro.strategy.streaming import closed_candles
+from trade_pro.strategy.utils import RESULTS_DIR, timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+TRADE_COLUMNS = ("exit_time", "entry_price", "exit_price", "pnl", "new_balance")
+
+
+class ReplayRunner(LiveRunner):
+    """Live engine timing every step, optionally woken every `tick` between
+    candle closes to go through the still open candles as well"""
+
+    def __init__(self, *args, tick: pd.Timedelta | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tick = tick
+        self.latencies: list[float] = []
+
+    def next_wake(self, now: pd.Timestamp) -> pd.Timestamp:
+        wake = super().next_wake(now)
+        if self.tick is None:
+            return wake
+        return min(wake, now.floor(self.tick) + self.tick)
+
+    async def step(self) -> None:
+        begin = time.perf_counter()
+        await super().step()
+        self.latencies.append(time.perf_counter() - begin)
+
+
+def diff_trades(live: TradeLedger, backtest: TradeLedger) -> pd.DataFrame:
+    """Trades of either ledger without an identical one in the other, matched
+    on their entry time"""
+    merged = pd.merge(
+        live.to_frame(),
+        backtest.to_frame(),
+        on="entry_time",
+        how="outer",
+        suffixes=("_live", "_backtest"),
+        indicator=True,
+    )
+    same = merged["_merge"] == "both"
+    for column in TRADE_COLUMNS:
+        left, right = merged[f"{column}_live"], merged[f"{column}_backtest"]
+        if column.endswith("time"):
+            same &= left == right
+        else:
+            same &= np.isclose(left, right, rtol=1e-9, atol=1e-9)
+    differences = merged[~same].rename(columns={"_merge": "found_in"}).reset_index(drop=True)
+    differences["found_in"] = differences["found_in"].map(
+        {"left_only": "live", "right_only": "backtest", "both": "both"}
+    )
+    return differences
+
+
+def replay(
+    cls: Type[Base],
+    config: dict[str, Any],
+    name: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp | None = None,
+    *,
+    tick: pd.Timedelta | None = None,
+) -> dict[str, Any]:
+    """Replay the stored history from `start` to `end` through the live engine
+    and compare its trades with a backtest of the same candles
+
+    A `FakeExchange` serves the candles known at the time of a
+    `SimulatedClock` which jumps to the next wake up, so the replay runs as
+    fast as the live path allows: candle fetches, `closed_candles` filtering,
+    buffers and streaming indicators included.
+
+    Args:
+        cls (Type[Base]): strategy class
+        config (dict[str, Any]): strategy config
+        name (str): name of the results file
+        start (pd.Timestamp): first replayed time, the candles closed before are
+            the warm-up history
+        end (pd.Timestamp | None, optional): end of the replay. Defaults to the
+            last stored candle close.
+        tick (pd.Timedelta | None, optional): also step every `tick` between
+            candle closes, the exchange then serves partially formed candles.
+            Defaults to None.
+
+    Returns:
+        dict[str, Any]: trade counts, differing trades, step latency and speed
+    """
+    strategy = cls(**config)
+    strategy.mode = "live"
+    main = strategy.timeframes[0]
+    duration = timeframe_to_timedelta(main)
+    history = strategy.load_data()
+    if end is None:
+        end = history[main].index[-1] + duration
+    clock = SimulatedClock(start)
+    exchange = FakeExchange(
+        {(strategy.symbol, timeframe): df for timeframe, df in history.items()},
+        clock=clock,
+        partial=tick is not None,
+    )
+    runner = ReplayRunner(
+        strategy,
+        {timeframe: df.loc[:start] for timeframe, df in history.items()},
+        exchange=exchange,
+        clock=clock,
+        tick=tick,
+    )
+    logger.info("Replaying %s %s from %s to %s", strategy.symbol, main, start, end)
+    begin = time.perf_counter()
+    asyncio.run(runner.run(until=end))
+    elapsed = time.perf_counter() - begin
+
+    # backtest of the candles the replay saw, trading from the first new one
+    now = clock.now()
+    data = {
+        timeframe: closed_candles(df, timeframe, now).copy() for timeframe, df in history.items()
+    }
+    first = int(data[main].index.searchsorted(start - duration, "right"))
+    reference = cls(**{**config, "start_backtest_index": max(strategy.start_backtest_index, first)})
+    reference.mode = "replay"
+    reference.simulate(reference.compute_indicators(data))
+
+    differences = diff_trades(strategy.trades, reference.trades)
+    latencies = np.array(runner.latencies) * 1000
+    report = {
+        "steps": len(latencies),
+        "bars": len(data[main]) - first,
+        "live_trades": len(strategy.trades),
+        "backtest_trades": len(reference.trades),
+        "different_trades": len(differences),
+        "seconds": elapsed,
+        "speedup": (now - start).total_seconds() / elapsed if elapsed > 0 else float("inf"),
+        "latency_p50_ms": np.percentile(latencies, 50) if len(latencies) else float("nan"),
+        "latency_p99_ms": np.percentile(latencies, 99) if len(latencies) else float("nan"),
+        "latency_max_ms": latencies.max() if len(latencies) else float("nan"),
+    }
+
+    logger.info("\nReplay:")
+    logger.info(f"Steps: {report['steps']} over {report['bars']} {main} candles")
+    logger.info(
+        f"Trades: {report['live_trades']} live, {report['backtest_trades']} backtest, "
+        f"{report['different_trades']} different"
+    )
+    logger.info(
+        f"Step latency: p50 {report['latency_p50_ms']:.2f} ms, "
+        f"p99 {report['latency_p99_ms']:.2f} ms, max {report['latency_max_ms']:.2f} ms"
+    )
+    logger.info(f"Replayed in {elapsed:.1f}s ({report['speedup']:.0f}x real time)")
+    if len(differences):
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR.joinpath(f"{name}_replay_diff.csv")
+        differences.to_csv(path, index=False)
+        logger.warning("Live and backtest trades differ, see %s:\n%s", path, differences.head())
+    return report
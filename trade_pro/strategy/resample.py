@@ -0,0 +1,123 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.store import COLUMNS, ColumnStore, stored_timeframes
+from trade_pro.strategy.utils import DATA_DIR, WEEK_ORIGIN, timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+DERIVED_DIR = "derived"
+
+
+def candle_starts(timestamps: np.ndarray, timeframe: str) -> np.ndarray:
+    """Open time in ns of the `timeframe` candle containing every timestamp,
+    aligned like the exchange candles"""
+    duration = timeframe_to_timedelta(timeframe).value
+    origin = WEEK_ORIGIN.value if timeframe.endswith("w") else 0
+    return origin + (timestamps - origin) // duration * duration
+
+
+def aggregate_columns(columns: dict[str, np.ndarray], timeframe: str) -> dict[str, np.ndarray]:
+    """OHLCV columns of `timeframe` candles from sorted finer candles columns"""
+    starts = candle_starts(np.asarray(columns["timestamp"]), timeframe)
+    if len(starts) == 0:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    first = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    last = np.append(first[1:], len(starts)) - 1
+    return {
+        "timestamp": starts[first],
+        "open": np.asarray(columns["open"])[first],
+        "high": np.maximum.reduceat(columns["high"], first),
+        "low": np.minimum.reduceat(columns["low"], first),
+        "close": np.asarray(columns["close"])[last],
+        "volume": np.add.reduceat(columns["volume"], first),
+    }
+
+
+def aggregate_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Candles of a higher `timeframe` built from the candles of `df`"""
+    columns = {name: df[name].to_numpy() for name in COLUMNS if name != "timestamp"}
+    columns["timestamp"] = df.index.values.astype("datetime64[ns]").view(np.int64)
+    return columns_to_frame(aggregate_columns(columns, timeframe))
+
+
+def columns_to_frame(columns: dict[str, np.ndarray]) -> pd.DataFrame:
+    columns = dict(columns)
+    index = pd.DatetimeIndex(columns.pop("timestamp").view("datetime64[ns]"), name="timestamp")
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def derivable(base_timeframe: str, timeframe: str) -> bool:
+    """Whether `timeframe` candles are made of whole `base_timeframe` candles"""
+    base = timeframe_to_timedelta(base_timeframe).value
+    target = timeframe_to_timedelta(timeframe).value
+    return target > base and target % base == 0
+
+
+def base_timeframe(symbol: str, timeframe: str, directory: Path = DATA_DIR) -> str | None:
+    """Coarsest stored timeframe of `symbol` `timeframe` can be derived from"""
+    bases = [base for base in stored_timeframes(symbol, directory) if derivable(base, timeframe)]
+    return max(bases, key=timeframe_to_timedelta, default=None)
+
+
+class DerivedStore:
+    """Candles of `timeframe` aggregated from the store of a finer base
+    timeframe, cached as a `ColumnStore` in the `derived` directory.
+
+    Reading refreshes the cache: only the base candles from the last derived
+    candle on are aggregated again (it may have been incomplete), the cache is
+    rebuilt when the base history was extended backwards.
+    """
+
+    def __init__(
+        self, symbol: str, timeframe: str, base_timeframe: str, directory: Path = DATA_DIR
+    ):
+        if not derivable(base_timeframe, timeframe):
+            raise ValueError(f"{timeframe} candles cannot be built from {base_timeframe} candles")
+        self.timeframe = timeframe
+        self.base = ColumnStore(symbol, base_timeframe, directory)
+        self.store = ColumnStore(symbol, timeframe, directory.joinpath(DERIVED_DIR))
+
+    def refresh(self) -> int:
+        """Bring the cache up to date with the base store
+
+        Returns:
+            int: number of appended candles
+        """
+        base = self.base.columns()
+        timestamps = base["timestamp"]
+        if len(timestamps) == 0:
+            return 0
+        first = self.store.first_timestamp()
+        if first is None or first.value != candle_starts(timestamps[:1], self.timeframe)[0]:
+            candles = aggregate_columns(base, self.timeframe)
+            self.store.write(columns_to_frame(candles))
+            logger.info(
+                "Built %d %s candles of %s from %s",
+                len(candles["timestamp"]),
+                self.timeframe,
+                self.base.symbol,
+                self.base.timeframe,
+            )
+            return len(candles["timestamp"])
+
+        last = self.store.last_timestamp().value
+        row = int(np.searchsorted(timestamps, last, "left"))
+        candles = aggregate_columns(
+            {name: values[row:] for name, values in base.items()}, self.timeframe
+        )
+        stored = self.store.columns()
+        if len(candles["timestamp"]) == 1 and all(
+            candles[name][0] == stored[name][-1] for name in COLUMNS
+        ):
+            return 0
+        return self.store.append(columns_to_frame(candles))
+
+    def read(
+        self, start: pd.Timestamp | None = None, end: pd.Timestamp | None = None
+    ) -> pd.DataFrame:
+        self.refresh()
+        return self.store.read(start, end)
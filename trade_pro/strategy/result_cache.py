@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+from functools import cache
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.ledger import TradeLedger
+from trade_pro.strategy.stops import uses_stops
+from trade_pro.strategy.utils import CACHE_DIR, get_data, timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+# modules besides the strategy classes whose code changes the results
+ENGINE_MODULES = (
+    "trade_pro.strategy.alignment",
+    "trade_pro.strategy.batch",
+    "trade_pro.strategy.indicators",
+    "trade_pro.strategy.ledger",
+    "trade_pro.strategy.stops",
+)
+DEFAULT_MAX_BYTES = 512 * 2**20
+
+
+def content_key(*parts: Any) -> str:
+    """Hash of JSON serializable `parts`"""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def data_fingerprint(data: dict[str, pd.DataFrame]) -> dict[str, str]:
+    """Content hash of every market data frame, timestamps and columns included"""
+    fingerprints = {}
+    for timeframe, df in sorted(data.items()):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(list(df.columns)).encode())
+        digest.update(np.ascontiguousarray(df.index.asi8).tobytes())
+        digest.update(np.ascontiguousarray(df.to_numpy(dtype=np.float64)).tobytes())
+        fingerprints[timeframe] = digest.hexdigest()
+    return fingerprints
+
+
+def backtest_inputs(
+    config: dict[str, Any], data: dict[str, pd.DataFrame]
+) -> dict[str, pd.DataFrame]:
+    """Market data read by a backtest of `config`: `data` and, with protective
+    exits, the intrabar candles `Base.intrabar_candles` loads over its span"""
+    main = config["timeframes"][0]
+    intrabar = config.get("intrabar_timeframe") or main
+    if intrabar in data or len(data[main]) == 0:
+        return data
+    end = data[main].index[-1] + timeframe_to_timedelta(main)
+    candles = get_data(config["symbol"], intrabar, data[main].index[0], end)
+    return {**data, intrabar: candles[candles.index < end]}
+
+
+@cache
+def code_fingerprint(cls: type) -> str:
+    """Hash of the source files of `cls`, its base classes and the engine modules"""
+    modules = {c.__module__ for c in cls.__mro__ if c.__module__.startswith("trade_pro")}
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(modules | set(ENGINE_MODULES)):
+        digest.update(name.encode())
+        digest.update(Path(find_spec(name).origin).read_bytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Backtest results on disk addressed by a hash of the market data, the
+    strategy code and its config, so unchanged runs are read back instead of
+    simulated again.
+
+    Backtests keep their trades and equity curve in `.npz` files, parameter
+    sweeps one `.json` file of statistics per parameter set, written as soon as
+    it is evaluated so an interrupted sweep resumes where it stopped. Reading
+    an entry refreshes its modification time and `evict` removes the least
+    recently used entries above `max_bytes`.
+
+    Args:
+        directory (Path): location of the entries
+        max_bytes (int, optional): size of the entries kept by `evict`.
+            Defaults to 512 MiB.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, *, enabled: bool = True, max_bytes: int | None = None) -> None:
+        self.enabled = enabled
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+
+    def backtest_key(self, cls: type, config: dict[str, Any], data: dict[str, pd.DataFrame]) -> str:
+        if uses_stops(config):
+            data = backtest_inputs(config, data)
+        return content_key(
+            "backtest", cls.__qualname__, code_fingerprint(cls), config, data_fingerprint(data)
+        )
+
+    def sweep_key(
+        self,
+        cls: type,
+        config: dict[str, Any],
+        data: dict[str, pd.DataFrame],
+        batch: bool,
+        parameters: dict[str, Any] | None = None,
+    ) -> str:
+        """Key shared by the parameter sets of a sweep of `parameters`, see `result_key`"""
+        if uses_stops(config, parameters):
+            data = backtest_inputs(config, data)
+        return content_key(
+            "sweep", cls.__qualname__, code_fingerprint(cls), config, data_fingerprint(data), batch
+        )
+
+    @staticmethod
+    def result_key(sweep_key: str, params: dict[str, Any], end: pd.Timestamp | None) -> str:
+        return content_key(sweep_key, params, end)
+
+    def load_backtest(self, key: str) -> tuple[TradeLedger, pd.Series] | None:
+        path = self._hit(self.directory.joinpath(f"{key}.npz"))
+        if path is None:
+            return None
+        with np.load(path) as entry:
+            trades = TradeLedger.from_records(entry["trades"])
+            index = pd.DatetimeIndex(entry["equity_index"].view("datetime64[ns]"), name="timestamp")
+            equity = pd.Series(entry["equity"], index=index, name="equity")
+        return trades, equity
+
+    def save_backtest(self, key: str, trades: TradeLedger, equity: pd.Series) -> None:
+        self._write(
+            self.directory.joinpath(f"{key}.npz"),
+            lambda f: np.savez(
+                f,
+                trades=trades.records,
+                equity=equity.to_numpy(dtype=np.float64),
+                equity_index=equity.index.asi8,
+            ),
+        )
+
+    def load_result(self, key: str) -> dict[str, Any] | None:
+        path = self._hit(self.directory.joinpath(f"{key}.json"))
+        if path is None:
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def save_result(self, key: str, result: dict[str, Any]) -> None:
+        text = json.dumps(result, default=_json_scalar)
+        self._write(self.directory.joinpath(f"{key}.json"), lambda f: f.write(text.encode()))
+
+    def evict(self) -> int:
+        """Remove the least recently used entries above `max_bytes`, returns
+        the number of entries removed"""
+        if not self.directory.exists():
+            return 0
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix not in (".npz", ".json"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info("Evicted %d backtest results from the cache", removed)
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _hit(self, path: Path) -> Path | None:
+        if not self.enabled:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def _write(self, path: Path, write) -> None:
+        if not self.enabled:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # atomic, concurrent workers or an interruption never leave partial entries
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+
+def _json_scalar(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+result_cache = ResultCache(CACHE_DIR.joinpath("results"))
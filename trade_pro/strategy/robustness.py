@@ -0,0 +1,382 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Type
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.ledger import TradeLedger
+from trade_pro.strategy.result_cache import result_cache
+from trade_pro.strategy.utils import RESULTS_DIR
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("shuffle", "bootstrap", "costs")
+# float64 cells of the largest (simulations, steps) matrix built at once
+MAX_CELLS = 2**22
+
+
+def sequence_metrics(
+    returns: np.ndarray,
+    initial_balance: float,
+    periods_per_year: float | None = None,
+    *,
+    trades: bool = False,
+) -> dict[str, np.ndarray]:
+    """Metrics of every row of compounded `returns` (simulations x steps)
+
+    Rows are balance paths starting from `initial_balance`, the Sharpe ratio is
+    annualized with `periods_per_year` when given and the profit factor and
+    win rate are added for `trades` returns.
+    """
+    balances = initial_balance * np.cumprod(1 + returns, axis=1)
+    peak = np.maximum(np.maximum.accumulate(balances, axis=1), initial_balance)
+    drawdown = peak - balances
+    metrics = {
+        "final_balance": balances[:, -1],
+        "total_pnl": balances[:, -1] - initial_balance,
+        "max_drawdown": drawdown.max(axis=1),
+        "max_drawdown_pct": (drawdown / peak).max(axis=1) * 100,
+    }
+    if periods_per_year is not None:
+        std = returns.std(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metrics["sharpe"] = np.where(
+                std > 0, returns.mean(axis=1) / std * np.sqrt(periods_per_year), np.nan
+            )
+    if trades:
+        pnl = np.diff(balances, axis=1, prepend=initial_balance)
+        wins = np.where(pnl > 0, pnl, 0).sum(axis=1)
+        losses = -np.where(pnl <= 0, pnl, 0).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metrics["profit_factor"] = np.where(losses > 0, wins / losses, np.inf)
+        metrics["win_rate"] = (pnl > 0).mean(axis=1) * 100
+    return metrics
+
+
+def shuffle_trades(
+    returns: np.ndarray, count: int, rng: np.random.Generator, initial_balance: float
+) -> dict[str, np.ndarray]:
+    """Trade order permutations: same final balance, other drawdown paths"""
+    rows = np.tile(returns, (count, 1))
+    return sequence_metrics(rng.permuted(rows, axis=1), initial_balance, trades=True)
+
+
+def block_summaries(returns: np.ndarray, length: int) -> dict[str, np.ndarray]:
+    """Summary of the `length` bars starting at every bar, enough to chain
+    blocks without building their balance paths: total log return, lowest
+    and highest log level from the block start (the start included in the
+    highest), log drawdown and drawdown relative to the start balance within
+    the block, sums of the returns and of their squares"""
+    windows = np.lib.stride_tricks.sliding_window_view(returns, length)
+    levels = np.cumsum(np.log1p(windows), axis=1)
+    peaks = np.maximum(np.maximum.accumulate(levels, axis=1), 0)
+    return {
+        "total": levels[:, -1],
+        "low": levels.min(axis=1),
+        "high": peaks[:, -1],
+        "drawdown": (peaks - levels).max(axis=1),
+        "drawdown_value": (np.exp(peaks) - np.exp(levels)).max(axis=1),
+        "sum": windows.sum(axis=1),
+        "squares": np.square(windows).sum(axis=1),
+    }
+
+
+def bootstrap_bars(
+    returns: np.ndarray,
+    count: int,
+    rng: np.random.Generator,
+    initial_balance: float,
+    block: int,
+    periods_per_year: float,
+) -> dict[str, np.ndarray]:
+    """Moving block bootstrap of the bar returns of the equity curve, blocks of
+    `block` consecutive bars keep the autocorrelation of the positions
+
+    Rather than gathering (simulations x bars) paths, the blocks are chained
+    from their `block_summaries`: the level and running peak of every
+    simulation are carried from one block to the next, which gives the same
+    `sequence_metrics` in one vectorized step per block.
+    """
+    n = len(returns)
+    block = max(1, min(block, n))
+    blocks = -(-n // block)
+    last = n - (blocks - 1) * block
+    full = block_summaries(returns, block)
+    tail = full if last == block else block_summaries(returns, last)
+
+    level = np.zeros(count)
+    peak = np.zeros(count)
+    drawdown = np.zeros(count)
+    drawdown_value = np.zeros(count)
+    total = np.zeros(count)
+    squares = np.zeros(count)
+    for j in range(blocks):
+        summary = full if j < blocks - 1 else tail
+        start = rng.integers(0, n - block + 1, size=count)
+        low = level + summary["low"][start]
+        drawdown = np.maximum(drawdown, np.maximum(summary["drawdown"][start], peak - low))
+        drawdown_value = np.maximum(
+            drawdown_value,
+            np.maximum(
+                np.exp(peak) - np.exp(low), np.exp(level) * summary["drawdown_value"][start]
+            ),
+        )
+        peak = np.maximum(peak, level + summary["high"][start])
+        level += summary["total"][start]
+        total += summary["sum"][start]
+        squares += summary["squares"][start]
+
+    final = initial_balance * np.exp(level)
+    mean = total / n
+    std = np.sqrt(np.maximum(squares / n - mean**2, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan)
+    return {
+        "final_balance": final,
+        "total_pnl": final - initial_balance,
+        "max_drawdown": initial_balance * drawdown_value,
+        "max_drawdown_pct": -np.expm1(-drawdown) * 100,
+        "sharpe": sharpe,
+    }
+
+
+def perturb_costs(
+    entry_closes: np.ndarray,
+    exit_closes: np.ndarray,
+    count: int,
+    rng: np.random.Generator,
+    initial_balance: float,
+    commission: float,
+    slippage: float,
+    scale: tuple[float, float],
+) -> dict[str, np.ndarray]:
+    """Trades priced again with the slippage of every fill drawn uniformly
+    between `scale` times the configured one and the commission scaled per
+    simulation"""
+    shape = (count, len(entry_closes))
+    low, high = scale
+    entry_costs = slippage * rng.uniform(low, high, shape)
+    exit_costs = slippage * rng.uniform(low, high, shape)
+    fees = commission * rng.uniform(low, high, (count, 1))
+    entry_prices = entry_closes * (1 + entry_costs + fees)
+    exit_prices = exit_closes * (1 - exit_costs - fees)
+    return sequence_metrics(exit_prices / entry_prices - 1, initial_balance, trades=True)
+
+
+def simulate_chunk(task: tuple[str, dict[str, Any], int, np.random.SeedSequence]) -> dict:
+    """Run `count` simulations of one method by matrices of at most `MAX_CELLS`"""
+    method, inputs, count, seed = task
+    rng = np.random.default_rng(seed)
+    # bootstrap simulations only keep a few values each, see `bootstrap_bars`
+    steps = 1 if method == "bootstrap" else len(inputs["returns"])
+    rows = max(1, MAX_CELLS // max(steps, 1))
+    parts = []
+    for first in range(0, count, rows):
+        size = min(rows, count - first)
+        if method == "shuffle":
+            parts.append(shuffle_trades(inputs["returns"], size, rng, inputs["initial_balance"]))
+        elif method == "bootstrap":
+            parts.append(
+                bootstrap_bars(
+                    inputs["returns"],
+                    size,
+                    rng,
+                    inputs["initial_balance"],
+                    inputs["block"],
+                    inputs["periods_per_year"],
+                )
+            )
+        else:
+            parts.append(
+                perturb_costs(
+                    inputs["entry_closes"],
+                    inputs["exit_closes"],
+                    size,
+                    rng,
+                    inputs["initial_balance"],
+                    inputs["commission"],
+                    inputs["slippage"],
+                    inputs["scale"],
+                )
+            )
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def robustness_inputs(
+    strategy: Base, trades: TradeLedger, equity: pd.Series, *, block: int, scale: tuple
+) -> dict[str, dict[str, Any]]:
+    """Arrays each method resamples, taken from the ledger and equity curve"""
+    records = trades.records
+    cost = strategy.slippage + strategy.commission
+    curve = equity.to_numpy(dtype=np.float64)[strategy.start_backtest_index :]
+    bar_seconds = np.median(np.diff(equity.index.asi8)) / 1e9 if len(equity) > 1 else 0
+    base = {"initial_balance": strategy.initial_balance}
+    return {
+        "shuffle": {**base, "returns": records["return_pct"] / 100},
+        "bootstrap": {
+            **base,
+            "returns": np.diff(curve) / curve[:-1],
+            "block": block,
+            "periods_per_year": 365 * 24 * 3600 / bar_seconds if bar_seconds > 0 else 0.0,
+        },
+        "costs": {
+            **base,
+            "returns": records["return_pct"] / 100,
+            # closes of the signal bars, before the configured costs
+            "entry_closes": records["entry_price"] / (1 + cost),
+            "exit_closes": records["exit_price"] / (1 - cost),
+            "commission": strategy.commission,
+            "slippage": strategy.slippage,
+            "scale": scale,
+        },
+    }
+
+
+def observed_metrics(method: str, inputs: dict[str, Any]) -> dict[str, float]:
+    """Metrics of the backtest itself, computed like the simulations"""
+    if method == "bootstrap":
+        metrics = sequence_metrics(
+            inputs["returns"][None], inputs["initial_balance"], inputs["periods_per_year"]
+        )
+    else:
+        metrics = sequence_metrics(inputs["returns"][None], inputs["initial_balance"], trades=True)
+    return {name: values[0].item() for name, values in metrics.items()}
+
+
+def summarize(
+    samples: dict[str, dict[str, np.ndarray]],
+    observed: dict[str, dict[str, float]],
+    confidence: float,
+) -> pd.DataFrame:
+    """Observed value, mean and confidence interval of every metric"""
+    tail = (1 - confidence) / 2 * 100
+    rows = []
+    for method, metrics in samples.items():
+        for name, values in metrics.items():
+            finite = values[np.isfinite(values)]
+            lower, median, upper = (
+                np.percentile(finite, [tail, 50, 100 - tail]) if len(finite) else [np.nan] * 3
+            )
+            rows.append(
+                {
+                    "method": method,
+                    "metric": name,
+                    "observed": observed[method][name],
+                    "mean": finite.mean() if len(finite) else np.nan,
+                    "std": finite.std() if len(finite) else np.nan,
+                    "lower": lower,
+                    "median": median,
+                    "upper": upper,
+                }
+            )
+    return pd.DataFrame(rows).set_index(["method", "metric"])
+
+
+def backtest(cls: Type[Base], config: dict[str, Any]) -> Base:
+    """Strategy backtested on its whole history, read from the result cache
+    when available"""
+    strategy = cls(**config)
+    strategy.mode = "robustness"
+    data = strategy.load_data()
+    key = result_cache.backtest_key(cls, config, data) if result_cache.enabled else None
+    cached = result_cache.load_backtest(key) if key is not None else None
+    if cached is not None:
+        strategy.trades, strategy.equity = cached
+        return strategy
+    strategy.simulate(strategy.compute_indicators(data))
+    if key is not None:
+        result_cache.save_backtest(key, strategy.trades, strategy.equity)
+    return strategy
+
+
+def robustness(
+    cls: Type[Base],
+    config: dict[str, Any],
+    name: str,
+    *,
+    simulations: int = 10_000,
+    methods: tuple[str, ...] = METHODS,
+    block: int = 24,
+    scale: tuple[float, float] = (0.5, 2.0),
+    confidence: float = 0.95,
+    seed: int | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """Monte Carlo robustness analysis of a backtest
+
+    Resamples the backtest with trade order shuffles, block bootstraps of the
+    bar returns and perturbed slippage and commission, each simulation being a
+    row of a NumPy matrix, spread over a process pool.
+
+    Args:
+        cls (Type[Base]): strategy class
+        config (dict[str, Any]): strategy config
+        name (str): name of the results files
+        simulations (int, optional): simulations per method. Defaults to 10000.
+        methods (tuple[str, ...], optional): subset of `METHODS`. Defaults to all.
+        block (int, optional): bars per bootstrap block. Defaults to 24.
+        scale (tuple[float, float], optional): range of the cost multipliers.
+            Defaults to (0.5, 2.0).
+        confidence (float, optional): confidence interval level. Defaults to 0.95.
+        seed (int | None, optional): random seed. Defaults to None.
+        workers (int | None, optional): process pool size. Defaults to all cores.
+
+    Returns:
+        pd.DataFrame: observed value, mean, std and confidence interval per
+            method and metric
+    """
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        raise Exception(f"Robustness methods {sorted(unknown)} not supported, use {METHODS}")
+    strategy = backtest(cls, config)
+    if len(strategy.trades) < 2:
+        raise Exception(f"{len(strategy.trades)} trades, not enough for a robustness analysis")
+    inputs = robustness_inputs(strategy, strategy.trades, strategy.equity, block=block, scale=scale)
+    workers = workers or os.cpu_count()
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(methods) * workers))
+    tasks = [
+        (method, inputs[method], count, next(seeds))
+        for method in methods
+        for count in np.diff(np.linspace(0, simulations, workers + 1).astype(int))
+        if count > 0
+    ]
+    logger.info(
+        "Running %d simulations of %s on %d trades with %d workers",
+        simulations,
+        ", ".join(methods),
+        len(strategy.trades),
+        workers,
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        outputs = list(executor.map(simulate_chunk, tasks))
+
+    samples = {}
+    for method in methods:
+        parts = [output for (name, *_), output in zip(tasks, outputs) if name == method]
+        samples[method] = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    observed = {method: observed_metrics(method, inputs[method]) for method in methods}
+    summary = summarize(samples, observed, confidence)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        logger.info("\nRobustness (%.0f%% intervals):\n%s", confidence * 100, summary)
+    for method in methods:
+        final = samples[method]["final_balance"]
+        logger.info(
+            "%s: probability of loss %.1f%%, 95th percentile max drawdown %.2f%%",
+            method,
+            (final < strategy.initial_balance).mean() * 100,
+            np.percentile(samples[method]["max_drawdown_pct"], 95),
+        )
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(RESULTS_DIR.joinpath(f"{name}_robustness.csv"))
+    distributions = pd.concat(
+        {method: pd.DataFrame(metrics) for method, metrics in samples.items()},
+        names=["method", "simulation"],
+    )
+    distributions.to_csv(RESULTS_DIR.joinpath(f"{name}_robustness_samples.csv"))
+    logger.info("Robustness results written to %s", RESULTS_DIR)
+    return summary
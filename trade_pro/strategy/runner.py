@@ -1,15 +1,51 @@
 import logging
 
+from trade_pro.database import Run, open_database, strategy_run, table_runs
 from trade_pro.strategy import get_module_class
+from trade_pro.strategy.optimization import optimize
+from trade_pro.strategy.result_cache import result_cache
 from trade_pro.strategy.utils import load_strategy_config
+from trade_pro.strategy.walk_forward import walk_forward
 
 logger = logging.getLogger(__name__)
 
 
-def run(mode: str, strategy_name: str, file_name: str) -> None:
+def run(
+    mode: str,
+    strategy_name: str,
+    file_name: str,
+    save: bool = False,
+    cache: bool = True,
+    chunk_size: int | None = None,
+    float32: bool = False,
+) -> None:
+    result_cache.configure(enabled=cache)
     logger.info("Loading strategy config %s", strategy_name)
     config = load_strategy_config(file_name)
+    settings = config.pop("optimization", None)
     cls = get_module_class(strategy_name)
     logger.info("Found strategy class %s", cls)
+    if mode in ("optimization", "walk_forward"):
+        if settings is None:
+            raise Exception(f"No 'optimization' section in config {file_name}")
+        if mode == "optimization":
+            logger.info("Optimizing strategy %s", strategy_name)
+            table = optimize(cls, config, settings, file_name)
+        else:
+            logger.info("Walk-forward validation of strategy %s", strategy_name)
+            table = walk_forward(cls, config, settings, file_name)
+        if save:
+            save_runs(table_runs(table, cls.__name__, file_name, config, mode))
+        return
     logger.info("Running strategy %s", strategy_name)
-    cls(**config).run(mode)
+    strategy = cls(**config)
+    strategy.run(mode, config, chunk_size=chunk_size, float32=float32)
+    if save and mode == "backtest":
+        save_runs([strategy_run(strategy, file_name, config)])
+
+
+def save_runs(runs: list[Run]) -> None:
+    with open_database() as database:
+        ids = database.save_runs(runs)
+    if ids:
+        logger.info("Runs saved with ids %d to %d", ids[0], ids[-1])
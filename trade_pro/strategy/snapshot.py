@@ -0,0 +1,123 @@
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.ledger import TradeLedger, trade_metrics
+
+if TYPE_CHECKING:
+    from trade_pro.strategy.base import Base
+
+
+@dataclass(frozen=True)
+class StrategySnapshot:
+    """State of a running strategy at one point in time, never modified once
+    published. The closed trades are a read-only view of the ledger, whose
+    rows do not change after they are appended, so taking a snapshot copies
+    nothing and its statistics are only computed when first asked for."""
+
+    name: str
+    strategy: str
+    symbol: str
+    timeframe: str
+    candle_time: pd.Timestamp | None
+    last_close: float
+    position: bool
+    entry_price: float
+    entry_time: pd.Timestamp
+    units: float
+    commission: float
+    slippage: float
+    initial_balance: float
+    balance: float
+    peak_balance: float
+    max_drawdown: float
+    trades: np.ndarray
+    published: float
+
+    @classmethod
+    def of(
+        cls,
+        name: str,
+        strategy: "Base",
+        candle_time: pd.Timestamp | None = None,
+        last_close: float = float("nan"),
+    ) -> "StrategySnapshot":
+        trades = strategy.trades.records
+        trades.flags.writeable = False
+        entry_price, entry_time, units = strategy.entry
+        return cls(
+            name=name,
+            strategy=type(strategy).__name__,
+            symbol=strategy.symbol,
+            timeframe=strategy.timeframes[0],
+            candle_time=candle_time,
+            last_close=last_close,
+            position=bool(strategy.position),
+            entry_price=float(entry_price),
+            entry_time=pd.Timestamp(entry_time),
+            units=float(units),
+            commission=strategy.commission,
+            slippage=strategy.slippage,
+            initial_balance=strategy.initial_balance,
+            balance=strategy.balance,
+            peak_balance=strategy.peak_balance,
+            max_drawdown=strategy.max_drawdown,
+            trades=trades,
+            published=time.time(),
+        )
+
+    @property
+    def equity(self) -> float:
+        """Balance with the open position valued at the last close net of the
+        exit costs, as `Base.mark_to_market` does, the balance when flat or
+        before the first close"""
+        if not self.position or np.isnan(self.last_close):
+            return self.balance
+        return self.units * self.last_close * (1 - self.slippage - self.commission)
+
+    @cached_property
+    def stats(self) -> dict[str, float]:
+        return trade_metrics(self.trades, self.initial_balance)
+
+    def recent_trades(self, count: int) -> list[dict[str, Any]]:
+        """The `count` latest closed trades, most recent first"""
+        return list(TradeLedger.from_records(self.trades[-count:][::-1])) if count > 0 else []
+
+
+class SnapshotBoard:
+    """Latest snapshot of every running strategy, by name
+
+    The strategies publish from the trading loop and readers (the Telegram
+    commands) only ever get the current mapping: a publication builds a new
+    mapping and swaps the reference, so readers never wait on a lock, never
+    see a half updated state and cannot slow the trading loop down however
+    often they ask.
+    """
+
+    def __init__(self):
+        self._snapshots: dict[str, StrategySnapshot] = {}
+
+    def publish(self, snapshot: StrategySnapshot) -> None:
+        self._snapshots = {**self._snapshots, snapshot.name: snapshot}
+
+    def remove(self, name: str) -> None:
+        self._snapshots = {k: v for k, v in self._snapshots.items() if k != name}
+
+    def snapshots(self) -> dict[str, StrategySnapshot]:
+        """Current mapping, never modified afterwards"""
+        return self._snapshots
+
+    def find(self, query: str | None = None) -> list[StrategySnapshot]:
+        """Snapshots whose name or symbol contains `query`, all when None"""
+        snapshots = self._snapshots.values()
+        if not query:
+            return list(snapshots)
+        query = query.lower()
+        return [s for s in snapshots if query in s.name.lower() or query in s.symbol.lower()]
+
+
+snapshot_board = SnapshotBoard()
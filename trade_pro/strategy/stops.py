@@ -0,0 +1,177 @@
+import time
+from typing import Any
+
+import numpy as np
+
+# strategy config keys of the protective exits, see `Base`
+STOP_PARAMETERS = ("stop_loss", "take_profit", "trailing_stop")
+# candles searched at once by `first_touch`, doubled until a level is reached
+FIRST_WINDOW = 64
+
+
+def uses_stops(config: dict[str, Any], parameters: dict[str, Any] | None = None) -> bool:
+    """Whether a strategy `config` or the swept `parameters` set a protective exit"""
+    return any(config.get(key) is not None for key in STOP_PARAMETERS) or any(
+        key in (parameters or {}) for key in STOP_PARAMETERS
+    )
+
+
+def first_touch(
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    reference: float,
+    *,
+    stop_loss: float | None = None,
+    take_profit: float | None = None,
+    trailing_stop: float | None = None,
+    peak: float | None = None,
+) -> tuple[int, float, float]:
+    """First candle reaching a protective exit of a long position entered at
+    `reference`, without a loop over the candles
+
+    The stop loss and take profit levels are fixed, so the first touch is a
+    binary search in the running low and high, which only move one way. The
+    trailing stop sits `trailing_stop` below the highest price before each
+    candle. A candle gapping through a level fills at its open, a candle
+    reaching both the stop and the target fills the stop unless it opens
+    above the target (the order within the candle is unknown).
+
+    The candles are searched by windows doubling in size, so an exit reached
+    early in a long span does not pay for the whole span.
+
+    Args:
+        opens (np.ndarray): candle open prices
+        highs (np.ndarray): candle high prices
+        lows (np.ndarray): candle low prices
+        reference (float): price the levels are relative to
+        stop_loss (float | None, optional): fraction below `reference`. Defaults to None.
+        take_profit (float | None, optional): fraction above `reference`. Defaults to None.
+        trailing_stop (float | None, optional): fraction below the highest price.
+            Defaults to None.
+        peak (float | None, optional): highest price before the first candle.
+            Defaults to `reference`.
+
+    Returns:
+        tuple[int, float, float]: index of the candle (`len(lows)` when none
+        is reached), fill price before costs (nan when none) and highest price
+        before that candle
+    """
+    levels = {"stop_loss": stop_loss, "take_profit": take_profit, "trailing_stop": trailing_stop}
+    peak = reference if peak is None else peak
+    first, size = 0, FIRST_WINDOW
+    while first < len(lows):
+        last = min(first + size, len(lows))
+        window = (opens[first:last], highs[first:last], lows[first:last])
+        at, fill, peak = window_touch(*window, reference, peak=peak, **levels)
+        if at < last - first:
+            return first + at, fill, peak
+        first, size = last, size * 2
+    return len(lows), np.nan, peak
+
+
+def window_touch(
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    reference: float,
+    *,
+    stop_loss: float | None,
+    take_profit: float | None,
+    trailing_stop: float | None,
+    peak: float,
+) -> tuple[int, float, float]:
+    """`first_touch` within a single window of candles"""
+    n = len(lows)
+    at = n
+    stops = np.full(n, -np.inf)
+    if stop_loss is not None:
+        stop = reference * (1 - stop_loss)
+        stops[:] = stop
+        # the running low only decreases
+        at = int(np.searchsorted(-np.minimum.accumulate(lows), -stop))
+    if trailing_stop is not None:
+        # up to the candle reaching the fixed stop, included for its fill
+        m = min(at + 1, n)
+        peaks = np.maximum.accumulate(np.concatenate(([peak], highs[: max(m - 1, 0)])))[:m]
+        np.maximum(stops[:m], peaks * (1 - trailing_stop), out=stops[:m])
+        touched = np.flatnonzero(lows[:m] <= stops[:m])
+        at = int(touched[0]) if len(touched) else at
+    if take_profit is not None:
+        target = reference * (1 + take_profit)
+        # the running high only increases
+        take_at = int(np.searchsorted(np.maximum.accumulate(highs[: at + 1]), target))
+        if take_at < at or (take_at == at < n and opens[at] >= target):
+            return (
+                take_at,
+                max(opens[take_at], target),
+                max(peak, highs[:take_at].max(initial=peak)),
+            )
+    peak = max(peak, highs[:at].max(initial=peak))
+    if at == n:
+        return n, np.nan, peak
+    return at, min(opens[at], stops[at]), peak
+
+
+def first_touch_loop(
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    reference: float,
+    *,
+    stop_loss: float | None = None,
+    take_profit: float | None = None,
+    trailing_stop: float | None = None,
+    peak: float | None = None,
+) -> tuple[int, float, float]:
+    """Candle by candle reference of `first_touch`"""
+    peak = reference if peak is None else peak
+    for i in range(len(lows)):
+        stop = -np.inf
+        if stop_loss is not None:
+            stop = reference * (1 - stop_loss)
+        if trailing_stop is not None:
+            stop = max(stop, peak * (1 - trailing_stop))
+        target = np.inf if take_profit is None else reference * (1 + take_profit)
+        stopped, taken = lows[i] <= stop, highs[i] >= target
+        if taken and (not stopped or opens[i] >= target):
+            return i, max(opens[i], target), peak
+        if stopped:
+            return i, min(opens[i], stop), peak
+        peak = max(peak, highs[i])
+    return len(lows), np.nan, peak
+
+
+def benchmark_first_touch(n: int = 1_000_000, trades: int = 1000) -> dict[str, float]:
+    """Time of `first_touch` against `first_touch_loop` over `trades` random
+    spans of `n` synthetic candles, and the number of differing results"""
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    opens = np.concatenate([[100.0], close[:-1]])
+    highs = np.maximum(opens, close) * (1 + np.abs(rng.normal(0, 0.001, n)))
+    lows = np.minimum(opens, close) * (1 - np.abs(rng.normal(0, 0.001, n)))
+    firsts = rng.integers(0, n, trades)
+    bounds = np.stack([firsts, np.minimum(firsts + rng.integers(1, 10_000, trades), n)], axis=1)
+    levels = {"stop_loss": 0.02, "take_profit": 0.04, "trailing_stop": 0.015}
+    results = {"candles": float(np.sum(bounds[:, 1] - bounds[:, 0]))}
+    outcomes = {}
+    for name, func in (("vectorized", first_touch), ("loop", first_touch_loop)):
+        begin = time.perf_counter()
+        outcomes[name] = [
+            func(
+                opens[first:last],
+                highs[first:last],
+                lows[first:last],
+                opens[first],
+                **levels,
+            )
+            for first, last in bounds
+        ]
+        results[f"{name}_seconds"] = time.perf_counter() - begin
+    results["mismatches"] = float(
+        sum(
+            a[0] != b[0] or not np.allclose(a[1:], b[1:], equal_nan=True)
+            for a, b in zip(outcomes["vectorized"], outcomes["loop"])
+        )
+    )
+    return results
@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from trade_pro.strategy.utils import DATA_DIR, read_csv
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+VERSION = 1
+
+
+class ColumnStore:
+    """OHLCV candles of one symbol and timeframe stored as one raw binary file per
+    column next to a `meta.json` header holding the dtypes and the row count.
+
+    Timestamps are int64 nanoseconds since epoch (UTC), prices and volume are
+    float64. Columns are memory-mapped on read, so loading is zero-copy and a
+    date range only touches the pages it needs. New candles are appended to the
+    column files without rewriting them, the header row count is only updated
+    once the data is written so an interrupted append is simply ignored.
+    """
+
+    def __init__(self, symbol: str, timeframe: str, directory: Path = DATA_DIR):
+        self.symbol = symbol.replace("/", "")
+        self.timeframe = timeframe
+        self.path = directory.joinpath(f"{self.symbol}_{timeframe}")
+
+    def exists(self) -> bool:
+        return self.path.joinpath("meta.json").exists()
+
+    def __len__(self) -> int:
+        return self._meta()["length"] if self.exists() else 0
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Read-only memory maps of every column"""
+        length = len(self)
+        return {
+            name: (
+                np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(length,))
+                if length > 0
+                else np.empty(0, dtype=dtype)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+    def bounds(self, start: pd.Timestamp | None = None, end: pd.Timestamp | None = None):
+        """Row range `[first, last)` of the candles opened between `start` and
+        `end` (both inclusive), found by binary search on the timestamps"""
+        timestamps = self.columns()["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start.value, "left"))
+        last = (
+            len(timestamps) if end is None else int(np.searchsorted(timestamps, end.value, "right"))
+        )
+        return first, last
+
+    def read(
+        self, start: pd.Timestamp | None = None, end: pd.Timestamp | None = None
+    ) -> pd.DataFrame:
+        """Candles between `start` and `end` backed by the memory maps"""
+        first, last = self.bounds(start, end)
+        columns = {name: values[first:last] for name, values in self.columns().items()}
+        index = pd.DatetimeIndex(columns.pop("timestamp").view("datetime64[ns]"), name="timestamp")
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def last_timestamp(self) -> pd.Timestamp | None:
+        timestamps = self.columns()["timestamp"]
+        return pd.Timestamp(int(timestamps[-1])) if len(timestamps) > 0 else None
+
+    def first_timestamp(self) -> pd.Timestamp | None:
+        timestamps = self.columns()["timestamp"]
+        return pd.Timestamp(int(timestamps[0])) if len(timestamps) > 0 else None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Replace the stored candles by `df`"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        columns = self._to_columns(df)
+        for name, values in columns.items():
+            with self._column_path(name).open("wb") as f:
+                f.write(values.tobytes())
+        self._write_meta(len(df))
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Upsert candles at the end of the store
+
+        Candles already stored (e.g. the still open candle of the previous call)
+        are overwritten in place, newer ones are appended without rewriting the
+        files.
+
+        Returns:
+            int: number of appended candles
+        """
+        if len(df) == 0:
+            return 0
+        if not self.exists():
+            self.write(df)
+            return len(df)
+
+        df = df.sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        length = len(self)
+        timestamps = self.columns()["timestamp"]
+        new_timestamps = df.index.values.astype("datetime64[ns]").view(np.int64)
+        overlap = int(np.searchsorted(new_timestamps, timestamps[-1], "right")) if length else 0
+        if overlap > 0:
+            positions = np.searchsorted(timestamps, new_timestamps[:overlap])
+            positions = np.minimum(positions, length - 1)
+            if not np.array_equal(timestamps[positions], new_timestamps[:overlap]):
+                raise ValueError(
+                    f"Candles of {self.symbol} {self.timeframe} are not contiguous with the store"
+                )
+            existing = self._to_columns(df.iloc[:overlap])
+            for name, values in existing.items():
+                column = np.memmap(
+                    self._column_path(name), dtype=COLUMNS[name], mode="r+", shape=(length,)
+                )
+                column[positions] = values
+                column.flush()
+                del column
+
+        appended = self._to_columns(df.iloc[overlap:])
+        count = len(df) - overlap
+        if count > 0:
+            itemsize = {name: COLUMNS[name].itemsize for name in COLUMNS}
+            for name, values in appended.items():
+                with self._column_path(name).open("r+b") as f:
+                    # drop the leftovers of an interrupted append
+                    f.truncate(length * itemsize[name])
+                    f.seek(0, os.SEEK_END)
+                    f.write(values.tobytes())
+            self._write_meta(length + count)
+        return count
+
+    def _to_columns(self, df: pd.DataFrame) -> dict[str, np.ndarray]:
+        columns = {"timestamp": df.index.values.astype("datetime64[ns]").view(np.int64)}
+        for name, dtype in COLUMNS.items():
+            if name != "timestamp":
+                columns[name] = df[name].to_numpy(dtype=dtype)
+        return {
+            name: np.ascontiguousarray(values, dtype=COLUMNS[name])
+            for name, values in columns.items()
+        }
+
+    def _column_path(self, name: str) -> Path:
+        return self.path.joinpath(f"{name}.bin")
+
+    def _meta(self) -> dict:
+        with self.path.joinpath("meta.json").open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, length: int) -> None:
+        meta = {
+            "version": VERSION,
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "length": length,
+            "columns": {name: dtype.str for name, dtype in COLUMNS.items()},
+        }
+        tmp_path = self.path.joinpath("meta.json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.path.joinpath("meta.json"))
+
+
+def stored_timeframes(symbol: str, directory: Path = DATA_DIR) -> list[str]:
+    """Timeframes of `symbol` with a store in `directory`"""
+    prefix = f"{symbol.replace('/', '')}_"
+    return sorted(
+        path.parent.name[len(prefix) :] for path in directory.glob(f"{prefix}*/meta.json")
+    )
+
+
+def migrate_csv(directory: Path = DATA_DIR) -> list[ColumnStore]:
+    """Convert every `{SYMBOL}_{timeframe}.csv` file of `directory` to a store"""
+    stores = []
+    for path in sorted(directory.glob("*_*.csv")):
+        symbol, timeframe = path.stem.rsplit("_", 1)
+        df = read_csv(path).sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        store = ColumnStore(symbol, timeframe, directory)
+        store.write(df)
+        logger.info("Migrated %s to %s (%d candles)", path.name, store.path, len(df))
+        stores.append(store)
+    return stores
+
+
+def benchmark_load(store: ColumnStore, *, repeat: int = 5) -> dict[str, float]:
+    """Best load time in seconds of the CSV file against the store, full history
+    and last 10% of it"""
+    csv_path = store.path.parent.joinpath(f"{store.symbol}_{store.timeframe}.csv")
+    start = store.read().index[int(len(store) * 0.9)]
+
+    def best(func) -> float:
+        timings = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - begin)
+        return min(timings)
+
+    results = {"store": best(store.read), "store_last_10pct": best(lambda: store.read(start))}
+    if csv_path.exists():
+        results["csv"] = best(lambda: read_csv(csv_path))
+    return results
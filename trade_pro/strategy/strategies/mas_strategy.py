@@ -1,8 +1,13 @@
+from collections import deque
+from functools import cache
+from typing import Any
+
 import numpy as np
 import pandas as pd
-import pandas_ta as ta
 
 from trade_pro.strategy.base import Base
+from trade_pro.strategy.indicators import indicator_cache
+from trade_pro.strategy.streaming import MACD, RSI, RollingSMA, TrendFilter, merge_candles
 
 
 class MASStrategy(Base):
@@ -20,9 +25,10 @@ class MASStrategy(Base):
         macd_slow: float,
         macd_signal: float,
         trend_sma_period: float,
+        **kwargs,
     ):
         super().__init__(
-            symbol, initial_balance, timeframes, start_backtest_index=start_backtest_index
+            symbol, initial_balance, timeframes, start_backtest_index=start_backtest_index, **kwargs
         )
         self.fast = fast
         self.slow = slow
@@ -40,29 +46,78 @@ class MASStrategy(Base):
         df_1h = data["1h"]
         df_1d = data["1d"]
 
+        close_1h = df_1h["close"]
+        labels = {"symbol": self.symbol, "timeframe": "1h"}
+
         # --- Moving Average Spread ---
-        df_1h["FAST"] = ta.sma(df_1h["close"], length=self.fast)
-        df_1h["SLOW"] = ta.sma(df_1h["close"], length=self.slow)
+        df_1h["FAST"] = indicator_cache.sma(close_1h, self.fast, **labels)
+        df_1h["SLOW"] = indicator_cache.sma(close_1h, self.slow, **labels)
         df_1h["SPREAD"] = df_1h["FAST"] - df_1h["SLOW"]
         df_1h["SPREAD_SIGN"] = np.where(df_1h["SPREAD"] > 0, 1, -1)
 
         # --- RSI ---
-        df_1h["RSI"] = ta.rsi(df_1h["close"], length=self.rsi_period)
+        df_1h["RSI"] = indicator_cache.rsi(close_1h, self.rsi_period, **labels)
 
         # --- MACD ---
-        macd = ta.macd(df_1h["close"], self.macd_fast, self.macd_slow, self.macd_signal)
+        macd = indicator_cache.macd(
+            close_1h, self.macd_fast, self.macd_slow, self.macd_signal, **labels
+        )
         df_1h["MACD"], df_1h["MACD_SIGNAL"] = (
             macd[f"MACD_{self.macd_fast}_{self.macd_slow}_{self.macd_signal}"],
             macd[f"MACDs_{self.macd_fast}_{self.macd_slow}_{self.macd_signal}"],
         )
 
         # --- Daily SMA Trend Filter ---
-        df_1d[f"SMA{self.trend_sma_period}"] = ta.sma(df_1d["close"], self.trend_sma_period)
+        df_1d[f"SMA{self.trend_sma_period}"] = indicator_cache.sma(
+            df_1d["close"], self.trend_sma_period, symbol=self.symbol, timeframe="1d"
+        )
         df_1d["BULLISH_TREND"] = df_1d["close"] > df_1d[f"SMA{self.trend_sma_period}"]
-        df_1h["BULLISH_TREND"] = df_1d["BULLISH_TREND"].reindex(df_1h.index, method="ffill")
+        df_1h["BULLISH_TREND"] = self.align(data, "1d", df_1d["BULLISH_TREND"], fill=False)
 
         return df_1h
 
+    def lookback(self) -> dict[str, int]:
+        return {
+            "1h": max(self.fast, self.slow, self.rsi_period, self.macd_slow + self.macd_signal),
+            "1d": self.trend_sma_period,
+        }
+
+    def warm_up(self, histo_data: dict[str, pd.DataFrame]) -> bool:
+        """Incremental versions of the indicators of `compute_indicators`"""
+        self.fast_sma = RollingSMA(self.fast)
+        self.slow_sma = RollingSMA(self.slow)
+        self.rsi = RSI(self.rsi_period)
+        self.macd = MACD(self.macd_fast, self.macd_slow, self.macd_signal)
+        self.trend = TrendFilter(self.trend_sma_period)
+        self.window = deque(maxlen=3)
+        for timeframe, timestamp, candle in merge_candles(histo_data):
+            self.update_indicators(timeframe, timestamp, candle)
+        return True
+
+    def update_indicators(
+        self, timeframe: str, timestamp: pd.Timestamp, candle: dict[str, float]
+    ) -> None:
+        close = candle["close"]
+        if timeframe == "1d":
+            self.trend.update(close)
+            return
+
+        spread = self.fast_sma.update(close) - self.slow_sma.update(close)
+        macd, macd_signal = self.macd.update(close)
+        row = {
+            "close": close,
+            "SPREAD_SIGN": 1 if spread > 0 else -1,
+            "RSI": self.rsi.update(close),
+            "MACD": macd,
+            "MACD_SIGNAL": macd_signal,
+            "BULLISH_TREND": self.trend.bullish,
+        }
+        self.window.append((timestamp, row))
+
+    def indicator_window(self) -> pd.DataFrame:
+        timestamps, rows = zip(*self.window)
+        return pd.DataFrame(list(rows), index=pd.DatetimeIndex(timestamps, name="timestamp"))
+
     def entry_condition(self, df: pd.DataFrame, *, index: int = 0) -> bool:
         """Buy when the price is higher than the dema indicator and the fast tema
         crosses the slow tema upwards."""
@@ -91,3 +146,69 @@ class MASStrategy(Base):
         return self.position and (
             prev2["SPREAD_SIGN"] == 1 and prev["SPREAD_SIGN"] == 1 and row["SPREAD_SIGN"] == -1
         )
+
+    def compute_signals(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized version of `entry_condition` / `exit_condition` without the
+        position checks."""
+        sign = df["SPREAD_SIGN"].to_numpy()
+        prev = np.roll(sign, 1)
+        prev2 = np.roll(sign, 2)
+
+        entries = (
+            (prev2 == -1)
+            & (prev == -1)
+            & (sign == 1)
+            & (df["RSI"].to_numpy() < self.rsi_threshold)
+            & (df["MACD"].to_numpy() > df["MACD_SIGNAL"].to_numpy())
+            & df["BULLISH_TREND"].to_numpy().astype(bool)
+        )
+        exits = (prev2 == 1) & (prev == 1) & (sign == -1)
+        return entries, exits
+
+    def compute_signals_batch(
+        self, data: dict[str, pd.DataFrame], params: list[dict[str, Any]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """`compute_signals` of many parameter sets, every condition is computed
+        once per distinct value of the parameters it depends on"""
+        close = data["1h"]["close"]
+        df_1d = data["1d"]
+        labels = {"symbol": self.symbol, "timeframe": "1h"}
+
+        @cache
+        def sma(length: int) -> np.ndarray:
+            return indicator_cache.sma(close, length, **labels).to_numpy()
+
+        @cache
+        def crosses(fast: int, slow: int) -> tuple[np.ndarray, np.ndarray]:
+            spread = sma(fast) - sma(slow)
+            sign = np.where(spread > 0, 1, -1)
+            prev = np.roll(sign, 1)
+            prev2 = np.roll(sign, 2)
+            up = (prev2 == -1) & (prev == -1) & (sign == 1)
+            down = (prev2 == 1) & (prev == 1) & (sign == -1)
+            return up, down
+
+        @cache
+        def rsi_below(period: int, threshold: float) -> np.ndarray:
+            return indicator_cache.rsi(close, period, **labels).to_numpy() < threshold
+
+        @cache
+        def macd_above_signal(fast: int, slow: int, signal: int) -> np.ndarray:
+            macd = indicator_cache.macd(close, fast, slow, signal, **labels)
+            suffix = f"{fast}_{slow}_{signal}"
+            return macd[f"MACD_{suffix}"].to_numpy() > macd[f"MACDs_{suffix}"].to_numpy()
+
+        @cache
+        def bullish_trend(period: int) -> np.ndarray:
+            sma_1d = indicator_cache.sma(df_1d["close"], period, symbol=self.symbol, timeframe="1d")
+            return self.align(data, "1d", df_1d["close"] > sma_1d, fill=False)
+
+        entries = np.empty((len(params), len(close)), dtype=bool)
+        exits = np.empty((len(params), len(close)), dtype=bool)
+        for i, overrides in enumerate(params):
+            p = {**vars(self), **overrides}
+            up, exits[i] = crosses(p["fast"], p["slow"])
+            np.logical_and(up, rsi_below(p["rsi_period"], p["rsi_threshold"]), out=entries[i])
+            entries[i] &= macd_above_signal(p["macd_fast"], p["macd_slow"], p["macd_signal"])
+            entries[i] &= bullish_trend(p["trend_sma_period"])
+        return entries, exits
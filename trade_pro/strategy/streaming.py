@@ -0,0 +1,147 @@
+import math
+from collections import deque
+from typing import Any, Iterator
+
+import pandas as pd
+
+from trade_pro.strategy.utils import timeframe_to_timedelta
+
+NAN = float("nan")
+
+
+class RollingSMA:
+    """Simple moving average updated in O(1), matches `ta.sma`"""
+
+    def __init__(self, length: int):
+        self.length = int(length)
+        self.values: deque[float] = deque(maxlen=self.length)
+        self.total = 0.0
+        self.updates = 0
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.length:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self.updates += 1
+        if self.updates % self.length == 0:
+            # resync the running sum to stop floating point drift
+            self.total = math.fsum(self.values)
+        self.value = self.total / self.length if len(self.values) == self.length else NAN
+        return self.value
+
+
+class EMA:
+    """Exponential moving average seeded with the SMA of the first `length`
+    values, matches `ta.ema`"""
+
+    def __init__(self, length: int):
+        self.length = int(length)
+        self.alpha = 2 / (self.length + 1)
+        self.count = 0
+        self.seed = 0.0
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed += value
+        elif self.count == self.length:
+            self.value = (self.seed + value) / self.length
+        else:
+            self.value = self.alpha * value + (1 - self.alpha) * self.value
+        return self.value
+
+
+class RMA:
+    """Wilder moving average computed like `ta.rma`, an adjusted exponential
+    mean with `alpha = 1 / length` that is NaN until `length` values were seen"""
+
+    def __init__(self, length: int):
+        self.length = int(length)
+        self.decay = 1 - 1 / self.length
+        self.count = 0
+        self.weight = 0.0
+        self.mean = NAN
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            self.weight = 1.0
+        else:
+            self.weight *= self.decay
+            self.mean = (self.weight * self.mean + value) / (self.weight + 1)
+            self.weight += 1
+        self.value = self.mean if self.count >= self.length else NAN
+        return self.value
+
+
+class RSI:
+    """Relative strength index with Wilder smoothing, matches `ta.rsi`"""
+
+    def __init__(self, length: int):
+        self.gains = RMA(length)
+        self.losses = RMA(length)
+        self.previous = NAN
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        if not math.isnan(self.previous):
+            change = close - self.previous
+            gain = self.gains.update(max(change, 0.0))
+            loss = self.losses.update(max(-change, 0.0))
+            self.value = 100 * gain / (gain + loss) if gain + loss != 0 else NAN
+        self.previous = close
+        return self.value
+
+
+class MACD:
+    """MACD line and signal, matches `ta.macd`"""
+
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal_ema = EMA(signal)
+        self.macd = NAN
+        self.signal = NAN
+
+    def update(self, close: float) -> tuple[float, float]:
+        self.macd = self.fast.update(close) - self.slow.update(close)
+        if not math.isnan(self.macd):
+            self.signal = self.signal_ema.update(self.macd)
+        return self.macd, self.signal
+
+
+class TrendFilter:
+    """Bullish when the close of a (higher timeframe) bar is above its SMA"""
+
+    def __init__(self, length: int):
+        self.sma = RollingSMA(length)
+        self.bullish = False
+
+    def update(self, close: float) -> bool:
+        self.bullish = bool(close > self.sma.update(close))
+        return self.bullish
+
+
+def closed_candles(df: pd.DataFrame, timeframe: str, now: pd.Timestamp) -> pd.DataFrame:
+    """Candles of `df` whose close time (open time + timeframe) is not after `now`"""
+    return df[df.index + timeframe_to_timedelta(timeframe) <= now]
+
+
+def merge_candles(
+    data: dict[str, pd.DataFrame],
+) -> Iterator[tuple[str, pd.Timestamp, dict[str, Any]]]:
+    """Candles of all timeframes in close time order, higher timeframes first
+    when several candles close at the same time"""
+    events = []
+    for timeframe, df in data.items():
+        duration = timeframe_to_timedelta(timeframe)
+        for timestamp, candle in zip(df.index, df.to_dict("records")):
+            events.append((timestamp + duration, -duration, timeframe, timestamp, candle))
+    events.sort(key=lambda event: event[:2])
+    for _, _, timeframe, timestamp, candle in events:
+        yield timeframe, timestamp, candle
@@ -1,27 +1,64 @@
-import datetime
 import json
-import time
+from functools import cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import ccxt
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from trade_pro.strategy.store import ColumnStore
+
 CURRENT_DIR = Path(__file__).parent
 IMAGES_DIR = CURRENT_DIR.joinpath("images")
 DATA_DIR = CURRENT_DIR.joinpath("data")
 CONFIG_DIR = CURRENT_DIR.joinpath("config")
+RESULTS_DIR = CURRENT_DIR.joinpath("results")
+CACHE_DIR = CURRENT_DIR.joinpath("cache")
+
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+TIMEFRAME_UNITS = {"m": "min", "h": "h", "d": "D", "w": "W"}
+# weekly candles open on Mondays, the other timeframes are aligned on the epoch
+WEEK_ORIGIN = pd.Timestamp("1970-01-05")
+
 
-exchange = ccxt.binance()
+def timeframe_to_timedelta(timeframe: str) -> pd.Timedelta:
+    """Duration of an exchange timeframe such as `15m`, `4h` or `1d`"""
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in TIMEFRAME_UNITS or not amount.isdigit():
+        raise ValueError(f"Timeframe {timeframe} not supported")
+    return pd.Timedelta(int(amount), TIMEFRAME_UNITS[unit])
 
 
-def fetch_candles(symbol: str, timeframe: str, limit=10) -> pd.DataFrame:
-    ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-    df = pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+def next_candle_close(now: pd.Timestamp, timeframe: str) -> pd.Timestamp:
+    """Close time of the candle of `timeframe` open at `now`"""
+    duration = timeframe_to_timedelta(timeframe)
+    origin = WEEK_ORIGIN if timeframe.endswith("w") else pd.Timestamp(0)
+    return origin + ((now - origin) // duration + 1) * duration
+
+
+def ohlcv_to_frame(ohlcv: list[list[float]] | np.ndarray) -> pd.DataFrame:
+    """Candles indexed by open time from the ccxt `fetch_ohlcv` rows"""
+    df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"].astype(np.int64), unit="ms")
     df.set_index("timestamp", inplace=True)
-    df = df.drop_duplicates()
-    return df
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+@cache
+def get_exchange() -> Any:
+    """Synchronous binance client, created on first use"""
+    import ccxt
+
+    return ccxt.binance()
+
+
+def __getattr__(name: str) -> Any:
+    # `exchange` used to be created at import time
+    if name == "exchange":
+        return get_exchange()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def update_data(df: pd.DataFrame, df_new: pd.DataFrame) -> pd.DataFrame:
@@ -30,39 +67,55 @@ def update_data(df: pd.DataFrame, df_new: pd.DataFrame) -> pd.DataFrame:
     return df_combined.sort_index()
 
 
-def wait_for_next_candle(*, timeframe: str = "1h") -> None:
-    now = datetime.datetime.now()
-    if timeframe == "1h":
-        wait_seconds = 3600 - (now.minute * 60 + now.second)
-    time.sleep(wait_seconds + 2)  # buffer time
-
-
-def get_data(symbol: str, timeframe: str) -> pd.DataFrame:
-    df = pd.read_csv(DATA_DIR.joinpath(f"{symbol.replace('/', '')}_{timeframe}.csv"))
+def read_csv(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
     df["timestamp"] = pd.to_datetime(df["timestamp"])
     df.set_index("timestamp", inplace=True)
     return df.drop_duplicates()
 
 
-def fetch_data(
-    symbol: str, timeframe: str, start_date: pd.Timestamp, end_date: pd.Timestamp
-) -> None:
-    ohlcv = []
-    limit = 1000
-    exchange = ccxt.binance()
-    while start_date < end_date:
-        ohlcv += exchange.fetch_ohlcv(
-            symbol, since=start_date.value // 10**6, limit=limit, timeframe=timeframe
+def get_data(
+    symbol: str,
+    timeframe: str,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """Candles from the columnar store, or from the CSV file when the store has
+    not been migrated yet, or aggregated from the store of a finer timeframe
+    when neither exists"""
+    from trade_pro.strategy.resample import DerivedStore, base_timeframe
+    from trade_pro.strategy.store import ColumnStore
+
+    store = ColumnStore(symbol, timeframe)
+    if store.exists():
+        return store.read(start, end)
+    csv_path = DATA_DIR.joinpath(f"{symbol.replace('/', '')}_{timeframe}.csv")
+    base = None if csv_path.exists() else base_timeframe(symbol, timeframe)
+    if base is not None:
+        return DerivedStore(symbol, timeframe, base).read(start, end)
+    df = read_csv(csv_path)
+    return df.loc[start:end]
+
+
+def candle_store(symbol: str, timeframe: str) -> "ColumnStore":
+    """Columnar store of the candles, the cache of the candles aggregated from
+    a finer timeframe when only that one is stored. Raises when the candles
+    are only in a CSV file, which cannot be read by ranges."""
+    from trade_pro.strategy.resample import DerivedStore, base_timeframe
+    from trade_pro.strategy.store import ColumnStore
+
+    store = ColumnStore(symbol, timeframe)
+    if store.exists():
+        return store
+    base = base_timeframe(symbol, timeframe)
+    if base is None:
+        raise Exception(
+            f"No columnar store of {symbol} {timeframe} candles, "
+            "run `python trade_pro/main.py migrate` to convert the CSV files"
         )
-        start_date += pd.Timedelta(1000, timeframe[-1])
-
-    df = pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("timestamp", inplace=True)
-    df = df.drop_duplicates()
-    if df.index.duplicated().any():
-        print(f"There are duplicated dates {df[df.index.duplicated()]}")
-    df.to_csv(DATA_DIR.joinpath(f"{symbol.replace('/', '')}_{timeframe}.csv"))
+    derived = DerivedStore(symbol, timeframe, base)
+    derived.refresh()
+    return derived.store
 
 
 def load_strategy_config(file_name: str) -> dict[str, Any]:
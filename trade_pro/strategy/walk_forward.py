@@ -0,0 +1,226 @@
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Type
+
+import pandas as pd
+
+from trade_pro.strategy.base import Base
+from trade_pro.strategy.batch import evaluate_batch
+from trade_pro.strategy.ledger import equity_metrics
+from trade_pro.strategy.live import DEFAULT_CAPACITY, LOOKBACK_FACTOR
+from trade_pro.strategy.optimization import (
+    evaluate,
+    init_worker,
+    rank_results,
+    search,
+    select_candidates,
+    share_data,
+    use_batch,
+    worker_state,
+)
+from trade_pro.strategy.utils import RESULTS_DIR, get_data, timeframe_to_timedelta
+
+logger = logging.getLogger(__name__)
+
+Window = tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]
+
+
+def walk_forward_windows(
+    index: pd.DatetimeIndex, train: pd.Timedelta, test: pd.Timedelta, *, anchored: bool = False
+) -> list[Window]:
+    """`(train start, test start, test end)` of consecutive windows
+
+    The test windows follow each other from the end of the first train
+    window to the end of `index`, the last one may be shorter. Rolling train
+    windows have the `train` duration, anchored ones start at the first candle.
+    """
+    first, last = index[0], index[-1]
+    windows = []
+    test_start = first + train
+    while test_start <= last:
+        train_start = first if anchored else test_start - train
+        windows.append((train_start, test_start, test_start + test))
+        test_start += test
+    return windows
+
+
+def warm_up_period(
+    cls: Type[Base], config: dict[str, Any], candidates: list[dict[str, Any]]
+) -> pd.Timedelta:
+    """History needed before a window for the indicators of every candidate,
+    the live window of `LiveRunner`"""
+    lookback = {}
+    for params in candidates:
+        for timeframe, bars in cls(**{**config, **params}).lookback().items():
+            lookback[timeframe] = max(lookback.get(timeframe, 0), bars)
+    if not lookback:
+        return DEFAULT_CAPACITY * timeframe_to_timedelta(config["timeframes"][0])
+    return max(
+        LOOKBACK_FACTOR * bars * timeframe_to_timedelta(timeframe)
+        for timeframe, bars in lookback.items()
+    )
+
+
+def window_data(
+    data: dict[str, pd.DataFrame], start: pd.Timestamp, end: pd.Timestamp
+) -> dict[str, pd.DataFrame]:
+    """Candles opened in `[start, end)`, without copying them"""
+    return {
+        timeframe: df.iloc[df.index.searchsorted(start) : df.index.searchsorted(end)].copy(
+            deep=False
+        )
+        for timeframe, df in data.items()
+    }
+
+
+def run_window(
+    cls: Type[Base],
+    config: dict[str, Any],
+    data: dict[str, pd.DataFrame],
+    settings: dict[str, Any],
+    candidates: list[dict[str, Any]],
+    window: Window,
+    warm_up: pd.Timedelta,
+) -> dict[str, Any]:
+    """Optimize on the train window and backtest the best parameters on the
+    test window, both preceded by `warm_up` history where no trade is taken"""
+    train_start, test_start, test_end = window
+    main = config["timeframes"][0]
+    metric = settings.get("metric", "total_pnl")
+    batch = use_batch(cls, config, settings)
+
+    def trading_from(window: dict[str, pd.DataFrame], start: pd.Timestamp) -> dict[str, Any]:
+        first = int(window[main].index.searchsorted(start))
+        return {**config, "start_backtest_index": max(config.get("start_backtest_index", 0), first)}
+
+    train = window_data(data, train_start - warm_up, test_start)
+    train_config = trading_from(train, train_start)
+
+    def run_round(params_list: list[dict[str, Any]], fraction: float) -> list[dict]:
+        end = None
+        if fraction < 1:
+            end = train_start + (test_start - train_start) * fraction
+        if batch:
+            return evaluate_batch(cls, train_config, train, params_list, end)
+        return [evaluate(cls, train_config, train, params, end) for params in params_list]
+
+    best = rank_results(search(candidates, settings, run_round), metric).to_dict("records")[0]
+    params = {name: best[name] for name in settings["parameters"]}
+
+    test = window_data(data, test_start - warm_up, test_end)
+    strategy = cls(**{**trading_from(test, test_start), **params})
+    strategy.mode = "walk_forward"
+    strategy.simulate(strategy.compute_indicators(test))
+    equity = strategy.equity[strategy.equity.index >= test_start]
+    return {
+        "train_start": train_start,
+        "test_start": test_start,
+        "test_end": min(test_end, equity.index[-1]) if len(equity) else test_end,
+        **params,
+        f"train_{metric}": best[metric],
+        **strategy.backtest_stats(strategy.trades, equity),
+        "equity": equity,
+    }
+
+
+def _run_window_in_worker(task: tuple) -> dict[str, Any]:
+    cls, config, data = worker_state()
+    return run_window(cls, config, data, *task)
+
+
+def stitch_equity(curves: list[pd.Series], initial_balance: float) -> pd.Series:
+    """Out-of-sample equity compounding the test windows, each one starting
+    from the balance the previous one ended with"""
+    balance = initial_balance
+    parts = []
+    for curve in curves:
+        if len(curve) == 0:
+            continue
+        part = curve * (balance / initial_balance)
+        balance = part.iloc[-1]
+        parts.append(part)
+    if not parts:
+        return pd.Series(dtype=float, name="equity")
+    return pd.concat(parts).rename("equity")
+
+
+def walk_forward(
+    cls: Type[Base],
+    config: dict[str, Any],
+    settings: dict[str, Any],
+    name: str,
+    *,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """Walk-forward validation: optimize on each train window, backtest on the
+    following test window and stitch the out-of-sample equity curves
+
+    Args:
+        cls (Type[Base]): strategy class
+        config (dict[str, Any]): strategy config used for the fixed parameters
+        settings (dict[str, Any]): `optimization` section of the config file,
+            its `walk_forward` entry holds the `train` and `test` durations
+            (e.g. "365D", "90D") and `anchored` (default false)
+        name (str): name of the results files
+        workers (int | None, optional): process pool size. Defaults to all cores.
+
+    Returns:
+        pd.DataFrame: best parameters and out-of-sample statistics per window
+    """
+    options = settings.get("walk_forward")
+    if options is None:
+        raise Exception("No 'walk_forward' settings in the optimization section")
+    candidates = select_candidates(settings)
+    warm_up = warm_up_period(cls, config, candidates)
+    histo_data = {
+        timeframe: get_data(config["symbol"], timeframe) for timeframe in config["timeframes"]
+    }
+    windows = walk_forward_windows(
+        histo_data[config["timeframes"][0]].index,
+        pd.Timedelta(options["train"]),
+        pd.Timedelta(options["test"]),
+        anchored=options.get("anchored", False),
+    )
+    if not windows:
+        raise Exception(f"History too short for a {options['train']} train window")
+    logger.info(
+        "Walk-forward on %d windows of %d parameter sets, %s of indicator warm-up",
+        len(windows),
+        len(candidates),
+        warm_up,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="trade_pro_") as directory:
+        specs = share_data(histo_data, Path(directory))
+        del histo_data
+        with ProcessPoolExecutor(
+            max_workers=min(workers or os.cpu_count(), len(windows)),
+            initializer=init_worker,
+            initargs=(cls, config, specs, settings.get("indicator_cache", {})),
+        ) as executor:
+            tasks = [(settings, candidates, window, warm_up) for window in windows]
+            results = list(executor.map(_run_window_in_worker, tasks))
+
+    equity = stitch_equity([result.pop("equity") for result in results], config["initial_balance"])
+    table = pd.DataFrame(results)
+    table.index.name = "window"
+    summary = equity_metrics(equity.to_numpy(), equity.index.asi8)
+
+    logger.info("\nWalk-forward windows:\n%s", table)
+    logger.info("\nOut-of-sample Stats:")
+    logger.info(f"Windows: {len(table)}")
+    logger.info(f"Total Trades: {int(table['total_trades'].sum())}")
+    logger.info(f"Final Balance: ${equity.iloc[-1]:.2f}")
+    logger.info(
+        f"Max Drawdown (bar level): ${summary['max_drawdown_bar']:.2f} "
+        f"({summary['max_drawdown_bar_pct']:.2f}%)"
+    )
+    logger.info(f"Sharpe Ratio (annualized, per bar): {summary['sharpe']:.2f}")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    table.to_csv(RESULTS_DIR.joinpath(f"{name}_walk_forward.csv"))
+    equity.to_csv(RESULTS_DIR.joinpath(f"{name}_walk_forward_equity.csv"))
+    return table
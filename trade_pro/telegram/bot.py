@@ -1,9 +1,11 @@
 import logging
+from functools import cache
 
 from telegram import Update
-from telegram.ext import CommandHandler, ContextTypes
+from telegram.ext import Application, CommandHandler, ContextTypes
 
-from trade_pro.telegram.initialize import telegram_app
+from trade_pro.telegram.commands import StateCommands, allowed_chats
+from trade_pro.telegram.initialize import get_telegram_app
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +13,51 @@ logger = logging.getLogger(__name__)
 async def help_command(update_handler: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Displays info on how to use the bot."""
     logger.info("Launching help command")
-    await update_handler.message.reply_text("Use /start to test this bot.")
+    await update_handler.message.reply_text(
+        "/status [name]: position and balance of the running strategies\n"
+        "/stats [name]: performance of their closed trades\n"
+        "/trades [name] [count]: their latest closed trades"
+    )
 
 
-telegram_app.add_handler(CommandHandler("help", help_command))
+@cache
+def build_telegram_bot() -> Application:
+    """Telegram application with the command handlers registered"""
+    telegram_app = get_telegram_app()
+    telegram_app.add_handler(CommandHandler("help", help_command))
+    chats = allowed_chats()
+    if chats is None:
+        # the commands expose balances and trades, nobody is allowed by default
+        logger.warning(
+            "TELEGRAM_CHAT_ID or TELEGRAM_ALLOWED_CHATS not set, state commands disabled"
+        )
+        return telegram_app
+    for command, handler in StateCommands(allowed_chats=chats).handlers().items():
+        telegram_app.add_handler(CommandHandler(command, handler))
+    return telegram_app
+
+
+class TelegramCommands:
+    """Polls the bot commands on the event loop of the live engine, so they
+    answer from the snapshots the running strategies publish
+
+    `stop` ends the polling but keeps the bot usable by a `Notifier` sharing
+    it, `shutdown` releases the application once the notifier is stopped.
+    """
+
+    def __init__(self, application: Application):
+        self.application = application
+
+    async def start(self) -> None:
+        await self.application.initialize()
+        await self.application.start()
+        await self.application.updater.start_polling(drop_pending_updates=True)
+
+    async def stop(self) -> None:
+        if self.application.updater.running:
+            await self.application.updater.stop()
+        if self.application.running:
+            await self.application.stop()
+
+    async def shutdown(self) -> None:
+        await self.application.shutdown()
@@ -0,0 +1,146 @@
+import logging
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+
+from trade_pro.strategy.snapshot import SnapshotBoard, StrategySnapshot, snapshot_board
+from trade_pro.telegram.notifier import split_messages
+
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import ContextTypes
+
+    from trade_pro.telegram.bot import TelegramCommands
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRADES = 5
+MAX_TRADES = 50
+
+
+class StateCommands:
+    """Handlers of the `/status`, `/stats` and `/trades` bot commands
+
+    They answer from the snapshots of `board` only, so a query never touches
+    the running strategies. Every command takes an optional filter on the
+    strategy name or symbol (`/status ETH`), `/trades` also the number of
+    trades (`/trades ETH 10`).
+
+    Args:
+        board (SnapshotBoard, optional): published strategy states. Defaults to
+            the process wide board.
+        allowed_chats (set[str] | None, optional): chats allowed to query, none
+            when None. Defaults to None.
+    """
+
+    def __init__(
+        self, board: SnapshotBoard = snapshot_board, allowed_chats: set[str] | None = None
+    ):
+        self.board = board
+        self.allowed_chats = allowed_chats or set()
+
+    def handlers(self) -> dict[str, Any]:
+        return {"status": self.status, "stats": self.stats, "trades": self.trades}
+
+    async def status(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """Position, balance and drawdown of the running strategies"""
+        await self.answer(update, context, status_text)
+
+    async def stats(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """Performance metrics of the closed trades"""
+        await self.answer(update, context, stats_text)
+
+    async def trades(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE") -> None:
+        """Latest closed trades"""
+        count = next((int(arg) for arg in context.args or [] if arg.isdigit()), DEFAULT_TRADES)
+        count = min(count, MAX_TRADES)
+        await self.answer(update, context, lambda snapshot: trades_text(snapshot, count))
+
+    async def answer(self, update: "Update", context: "ContextTypes.DEFAULT_TYPE", render) -> None:
+        chat_id = str(update.effective_chat.id)
+        if chat_id not in self.allowed_chats:
+            logger.warning("Ignoring a state query from chat %s", chat_id)
+            return
+        query = next((arg for arg in context.args or [] if not arg.isdigit()), None)
+        snapshots = self.board.find(query)
+        if not snapshots:
+            text = f"No running strategy matches '{query}'" if query else "No running strategy"
+            await update.message.reply_text(text)
+            return
+        for text in split_messages([render(snapshot) + "\n" for snapshot in snapshots]):
+            await update.message.reply_text(text)
+
+
+def status_text(snapshot: StrategySnapshot) -> str:
+    lines = [f"📊 {snapshot.name} ({snapshot.timeframe}), candle {_time(snapshot.candle_time)}"]
+    if snapshot.position:
+        change = (snapshot.last_close / snapshot.entry_price - 1) * 100
+        lines.append(
+            f"Position: {snapshot.units:.6f} {snapshot.symbol} @ {snapshot.entry_price:.2f} "
+            f"since {_time(snapshot.entry_time)} (last {snapshot.last_close:.2f}, {change:+.2f}%)"
+        )
+    else:
+        lines.append(f"Position: none (last {snapshot.last_close:.2f})")
+    lines.append(f"Balance: ${snapshot.balance:.2f} | Equity: ${snapshot.equity:.2f}")
+    lines.append(f"Max drawdown: {snapshot.max_drawdown * 100:.2f}%")
+    return "\n".join(lines)
+
+
+def stats_text(snapshot: StrategySnapshot) -> str:
+    stats = snapshot.stats
+    if stats["total_trades"] == 0:
+        return f"📈 {snapshot.name}: no closed trade yet"
+    return "\n".join(
+        [
+            f"📈 {snapshot.name}",
+            f"Trades: {stats['total_trades']} ({stats['win_trades']} won, "
+            f"{stats['lose_trades']} lost)",
+            f"Win rate: {stats['win_rate']:.2f}% | PnL weighted: "
+            f"{stats['pnl_weighted_win_rate']:.2f}%",
+            f"Profit factor: {stats['profit_factor']:.2f}",
+            f"Sharpe-like: {stats['sharpe_like']:.2f}",
+            f"Max drawdown: ${stats['max_drawdown']:.2f}",
+            f"Total PnL: ${stats['total_pnl']:.2f} | Balance: ${stats['final_balance']:.2f}",
+        ]
+    )
+
+
+def trades_text(snapshot: StrategySnapshot, count: int = DEFAULT_TRADES) -> str:
+    trades = snapshot.recent_trades(count)
+    if not trades:
+        return f"🧾 {snapshot.name}: no closed trade yet"
+    lines = [f"🧾 {snapshot.name}, last {len(trades)} of {len(snapshot.trades)} trades"]
+    for trade in trades:
+        lines.append(
+            f"{_time(trade['entry_time'])} → {_time(trade['exit_time'])}: "
+            f"{trade['entry_price']:.2f} → {trade['exit_price']:.2f}, "
+            f"${trade['pnl']:.2f} ({trade['return_pct']:+.2f}%)"
+        )
+    return "\n".join(lines)
+
+
+def _time(timestamp: pd.Timestamp | None) -> str:
+    return "-" if timestamp is None or pd.isna(timestamp) else f"{timestamp:%Y-%m-%d %H:%M}"
+
+
+def allowed_chats() -> set[str] | None:
+    """Chats of `TELEGRAM_ALLOWED_CHATS` (comma separated) and the notified
+    chat, None when neither is configured"""
+    from trade_pro.config import TELEGRAM_ALLOWED_CHATS, TELEGRAM_CHAT_ID
+
+    chats = {chat.strip() for chat in TELEGRAM_ALLOWED_CHATS.split(",") if chat.strip()}
+    if TELEGRAM_CHAT_ID:
+        chats.add(str(TELEGRAM_CHAT_ID))
+    return chats or None
+
+
+def telegram_commands() -> "TelegramCommands | None":
+    """Commands of the Telegram application, None when no bot token is configured,
+    python-telegram-bot is only imported when one is"""
+    from trade_pro.config import TELEGRAM_BOT_TOKEN
+
+    if not TELEGRAM_BOT_TOKEN:
+        return None
+    from trade_pro.telegram.bot import TelegramCommands, build_telegram_bot
+
+    return TelegramCommands(build_telegram_bot())
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any
+
+
+class RetryAfter(Exception):
+    """Rate limit answer, same `retry_after` attribute as `telegram.error.RetryAfter`"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Flood control exceeded. Retry in {retry_after} seconds")
+        self.retry_after = timedelta(seconds=retry_after)
+
+
+class FakeBot:
+    """Local stand-in for the python-telegram-bot `Bot` recording the messages
+
+    Implements the async `send_message` surface used by the `Notifier` so the
+    notification pipeline can run without a bot token or network access.
+
+    Args:
+        latency (float, optional): seconds slept by every request. Defaults to 0.
+        failures (int, optional): number of requests failing with a
+            `ConnectionError` before the bot recovers. Defaults to 0.
+        rate_limited (int, optional): number of requests answered with
+            `RetryAfter` (after the failures). Defaults to 0.
+        retry_after (float, optional): seconds asked by `RetryAfter`. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        failures: int = 0,
+        rate_limited: int = 0,
+        retry_after: float = 1.0,
+    ):
+        self.latency = latency
+        self.failures = failures
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.requests = 0
+        self.messages: list[tuple[int | str, str]] = []
+
+    async def send_message(self, chat_id: int | str, text: str, **kwargs) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("fake Telegram API unavailable")
+        if self.rate_limited > 0:
+            self.rate_limited -= 1
+            raise RetryAfter(self.retry_after)
+        self.messages.append((chat_id, text))
+
+
+class FakeUpdate:
+    """Incoming command message as seen by the command handlers: its
+    `effective_chat` and a `message.reply_text` answering through `bot`"""
+
+    def __init__(self, bot: FakeBot, chat_id: int | str, text: str):
+        self.bot = bot
+        self.effective_chat = SimpleNamespace(id=chat_id)
+        self.message = SimpleNamespace(text=text, reply_text=self.reply_text)
+
+    async def reply_text(self, text: str, **kwargs) -> None:
+        await self.bot.send_message(chat_id=self.effective_chat.id, text=text)
+
+
+async def send_command(
+    bot: FakeBot, handlers: dict[str, Any], text: str, chat_id: int | str = 0
+) -> list[str]:
+    """Dispatch the command `text` (e.g. "/trades ETH 10") to its handler in
+    `handlers` like the application `CommandHandler`s, returns the replies"""
+    command, *args = text.split()
+    update = FakeUpdate(bot, chat_id, text)
+    sent = len(bot.messages)
+    await handlers[command.lstrip("/")](update, SimpleNamespace(args=args))
+    return [reply for chat, reply in bot.messages[sent:] if chat == chat_id]
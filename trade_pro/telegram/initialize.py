@@ -1,4 +1,5 @@
 import logging
+from functools import cache
 
 from telegram.ext import Application, PicklePersistence
 
@@ -16,8 +17,13 @@ def init_telegram_bot_application() -> Application:
         .token(TELEGRAM_BOT_TOKEN)
         .persistence(PicklePersistence(filepath="arbitrarycallbackdatabot"))
         .arbitrary_callback_data(True)
+        # state queries of many chats are answered concurrently
+        .concurrent_updates(True)
         .build()
     )
 
 
-telegram_app: Application = init_telegram_bot_application()
+@cache
+def get_telegram_app() -> Application:
+    """Shared Telegram application, built on first use"""
+    return init_telegram_bot_application()
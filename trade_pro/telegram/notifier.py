@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from trade_pro.strategy.metrics import NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+# longest text accepted by the Telegram sendMessage method
+MAX_MESSAGE_LENGTH = 4096
+
+
+class Notifier:
+    """Non-blocking Telegram notifications
+
+    `notify` only puts the message on a bounded queue, a background task
+    drains it: messages queued while waiting are coalesced into one Telegram
+    message (split at `MAX_MESSAGE_LENGTH`), sends are spaced by
+    `min_interval`, rate limit answers (`retry_after`) are waited for and
+    other errors retried with an exponential backoff. When the queue is full
+    or a batch keeps failing, messages are appended to `spill_path` (dropped
+    without one) and sent again once the queue is empty, so the strategy never
+    waits on Telegram.
+
+    Args:
+        bot (Any): object with an async `send_message(chat_id, text)`, such as
+            `get_telegram_app().bot` or a `FakeBot`
+        chat_id (int | str): chat receiving the notifications
+        maxsize (int, optional): queued messages before spilling. Defaults to 1000.
+        coalesce (float, optional): seconds a first message waits for others
+            to join its batch. Defaults to 1.
+        min_interval (float, optional): minimum seconds between two sends.
+            Defaults to 1, the Telegram limit per chat.
+        max_retries (int, optional): attempts per batch before spilling it.
+            Defaults to 5.
+        max_backoff (float, optional): maximum seconds between retries.
+            Defaults to 60.
+        spill_path (Path | None, optional): JSON lines file of the messages
+            not sent. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        chat_id: int | str,
+        *,
+        maxsize: int = 1000,
+        coalesce: float = 1.0,
+        min_interval: float = 1.0,
+        max_retries: int = 5,
+        max_backoff: float = 60.0,
+        spill_path: Path | None = None,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.coalesce = coalesce
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.spill_path = spill_path
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.task: asyncio.Task | None = None
+        self.sent = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.last_send = float("-inf")
+
+    def notify(self, text: str) -> bool:
+        """Queue `text` without waiting, False when it had to be spilled or dropped"""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.spill([text])
+            return False
+
+    async def start(self) -> None:
+        if hasattr(self.bot, "initialize"):
+            await self.bot.initialize()
+        self.task = asyncio.create_task(self.worker(), name="telegram-notifier")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Send what is queued within `timeout` seconds, spill the rest"""
+        if self.task is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Telegram notifications still queued at shutdown")
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        remaining = []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+            self.queue.task_done()
+        self.spill(remaining)
+        if hasattr(self.bot, "shutdown"):
+            await self.bot.shutdown()
+
+    async def worker(self) -> None:
+        while True:
+            if self.queue.empty():
+                self.replay()
+            batch = [await self.queue.get()]
+            pending = []
+            try:
+                await asyncio.sleep(self.coalesce)
+                while not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                pending = split_messages(batch)
+                while pending:
+                    if not await self.send(pending[0]):
+                        self.spill(pending[:1])
+                    pending.pop(0)
+            except asyncio.CancelledError:
+                # stopped while sending, keep what may not have been delivered
+                self.spill(pending or batch)
+                raise
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def send(self, text: str) -> bool:
+        """Send one message with the rate limit and retries, False on failure"""
+        loop = asyncio.get_running_loop()
+        backoff = min(1.0, self.max_backoff)
+        for attempt in range(self.max_retries):
+            await asyncio.sleep(max(self.last_send + self.min_interval - loop.time(), 0))
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text)
+                self.last_send = loop.time()
+                self.sent += 1
+                NOTIFICATIONS.inc("sent")
+                return True
+            except Exception as e:
+                self.last_send = loop.time()
+                retry_after = getattr(e, "retry_after", None)
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                wait = retry_after if retry_after is not None else backoff
+                logger.warning(
+                    "Telegram message failed (%s), retry %d/%d in %.0fs",
+                    e,
+                    attempt + 1,
+                    self.max_retries,
+                    wait,
+                )
+                await asyncio.sleep(wait)
+                if retry_after is None:
+                    backoff = min(backoff * 2, self.max_backoff)
+        return False
+
+    def spill(self, texts: list[str]) -> None:
+        if not texts:
+            return
+        if self.spill_path is None:
+            self.dropped += len(texts)
+            NOTIFICATIONS.inc("dropped", amount=len(texts))
+            logger.warning("Dropped %d Telegram notifications", len(texts))
+            return
+        with self.spill_path.open("a", encoding="utf-8") as f:
+            f.writelines(json.dumps(text) + "\n" for text in texts)
+        self.spilled += len(texts)
+        NOTIFICATIONS.inc("spilled", amount=len(texts))
+
+    def replay(self) -> None:
+        """Queue the spilled messages again, as many as fit"""
+        if self.spill_path is None or not self.spill_path.exists():
+            return
+        with self.spill_path.open("r", encoding="utf-8") as f:
+            texts = [json.loads(line) for line in f if line.strip()]
+        self.spill_path.unlink()
+        for i, text in enumerate(texts):
+            try:
+                self.queue.put_nowait(text)
+            except asyncio.QueueFull:
+                self.spill(texts[i:])
+                break
+
+
+def split_messages(texts: list[str], limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Join `texts` with new lines in as few messages of at most `limit`
+    characters as possible, longer texts are cut"""
+    messages = []
+    current = ""
+    for text in texts:
+        for start in range(0, max(len(text), 1), limit):
+            part = text[start : start + limit]
+            if current and len(current) + 1 + len(part) <= limit:
+                current += "\n" + part
+            else:
+                if current:
+                    messages.append(current)
+                current = part
+    if current:
+        messages.append(current)
+    return messages
+
+
+def telegram_notifier(**kwargs) -> Notifier | None:
+    """Notifier using the bot of the Telegram application, None when no bot token and
+    chat are configured"""
+    from trade_pro.config import ROOT, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+
+    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
+        logger.warning("TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID not set, notifications disabled")
+        return None
+    from trade_pro.telegram.initialize import get_telegram_app
+
+    kwargs.setdefault("spill_path", ROOT.joinpath("telegram_spill.jsonl"))
+    return Notifier(get_telegram_app().bot, TELEGRAM_CHAT_ID, **kwargs)
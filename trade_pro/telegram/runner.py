@@ -1,10 +1,10 @@
 import logging
 
-from trade_pro.telegram.bot import telegram_app
+from trade_pro.telegram.bot import build_telegram_bot
 
 logger = logging.getLogger(__name__)
 
 
 def run():
     logger.info("initialising telegram bot")
-    telegram_app.run_polling()
+    build_telegram_bot().run_polling()
@@ -1,8 +1,6 @@
 from dataclasses import fields
 from typing import Any, Optional, Type, TypeVar
 
-from apischema import deserialize
-
 _config_fields: dict[Type, Optional[Any]] = {}
 
 Cls = TypeVar("Cls", bound=Type)
@@ -14,6 +12,11 @@ class ConfigurationField:
 
     def __get__(self, instance, owner):
         assert instance is None
+        if _config_fields.get(owner) is None:
+            # the configuration file is read on the first field access
+            from trade_pro.config import ensure_configuration
+
+            ensure_configuration()
         try:
             return getattr(_config_fields[owner], self.name)
         except AttributeError:
@@ -30,5 +33,7 @@ def load_configuration(cls: Cls) -> Cls:
 
 
 def load_configuration_data(config: dict[str, Any]) -> None:
+    from apischema import deserialize
+
     for key, _ in _config_fields.items():
         _config_fields[key] = deserialize(key, config)